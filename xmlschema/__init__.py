@@ -11,11 +11,15 @@
 from .exceptions import XMLSchemaException, XMLSchemaRegexError, XMLSchemaURLError
 from .resources import (
     normalize_url, fetch_resource, load_xml_resource, fetch_namespaces,
-    fetch_schema_locations, fetch_schema, XMLResource
+    fetch_schema_locations, fetch_schema, XMLResource, set_url_opener, set_catalog
 )
+from .openers import CachingUrlOpener
+from .catalogs import XMLCatalog
+from .bundles import ZipBundle
 from .xpath import ElementPathMixin
 from .converters import (
-    ElementData, XMLSchemaConverter, ParkerConverter, BadgerFishConverter, AbderaConverter, JsonMLConverter
+    ElementData, XMLSchemaConverter, ParkerConverter, BadgerFishConverter, AbderaConverter, JsonMLConverter,
+    DataClassConverter, DataElement
 )
 from .documents import validate, to_dict, to_json, from_json
 
@@ -23,8 +27,10 @@ from .validators import (
     XMLSchemaValidatorError, XMLSchemaParseError, XMLSchemaNotBuiltError, XMLSchemaModelError,
     XMLSchemaModelDepthError, XMLSchemaValidationError, XMLSchemaDecodeError, XMLSchemaEncodeError,
     XMLSchemaChildrenValidationError, XMLSchemaIncludeWarning, XMLSchemaImportWarning, XsdGlobals,
-    XMLSchemaBase, XMLSchema, XMLSchema10
+    XMLSchemaBase, XMLSchema, XMLSchema10, ComponentProfiler, IdIndex, Projection, ResultCache,
+    InternTable
 )
+from .codegen import DecoderGenerator, generate_decoder
 
 __version__ = '1.0.13'
 __author__ = "Davide Brunato"
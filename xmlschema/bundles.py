@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains the access to resources bundled in zip archives.
+"""
+import os.path
+import threading
+import zipfile
+
+from .compat import URLError
+from .exceptions import XMLSchemaValueError
+from .openers import UrlResponse
+
+_bundles = {}  # The open bundles, mapped by the absolute path of their archive
+_bundles_lock = threading.Lock()
+_open_lock = threading.Lock()
+
+
+class ZipBundle(object):
+    """
+    A bundle of resources stored in a zip archive, that are accessed without extracting
+    the archive. The members are addressed by paths that continue the path of the archive,
+    like the entries of *sys.path* used by *zipimport*, so the relative locations of the
+    includes and the imports are resolved inside the archive:
+
+    >>> schema = xmlschema.XMLSchema('/srv/schemas-1.2.zip/collection/collection.xsd')
+
+    The archive is opened at the first access to one of its members and the instance is
+    kept open, reading the central directory of the archive only once. An instance that
+    is created explicitly is used for all the paths inside its archive until it's closed.
+
+    :param path: the path of the zip archive.
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        if not zipfile.is_zipfile(self.path):
+            raise XMLSchemaValueError("%r is not a zip archive." % path)
+
+        self._zip_file = zipfile.ZipFile(self.path)
+        self._lock = threading.Lock()
+        with _bundles_lock:
+            previous = _bundles.get(self.path)
+            _bundles[self.path] = self
+        if previous is not None:
+            previous.close()
+
+    def __repr__(self):
+        return '%s(path=%r)' % (self.__class__.__name__, self.path)
+
+    def __contains__(self, name):
+        return name in self._zip_file.NameToInfo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def url(self):
+        """The base URL of the members of the bundle."""
+        path = self.path.replace('\\', '/')
+        return 'file://%s' % path if path.startswith('/') else 'file:///%s' % path
+
+    def get_url(self, name):
+        """Returns the URL of a member of the bundle."""
+        return '%s/%s' % (self.url, name.lstrip('/'))
+
+    def namelist(self):
+        """Returns the names of the members of the bundle."""
+        return self._zip_file.namelist()
+
+    def open(self, name):
+        """
+        Opens a member of the bundle, returning a file-like object.
+
+        :raises: `URLError` if the bundle doesn't contain the member.
+        """
+        try:
+            with self._lock:
+                data = self._zip_file.read(name)
+        except KeyError:
+            raise URLError("%r not found in the zip archive %r" % (name, self.path))
+        except (ValueError, RuntimeError) as err:
+            raise URLError("cannot read %r from the zip archive %r: %s" % (name, self.path, err))
+        return UrlResponse(data, self.get_url(name))
+
+    def close(self):
+        """Closes the archive and unregisters the bundle."""
+        with _bundles_lock:
+            if _bundles.get(self.path) is self:
+                del _bundles[self.path]
+        with self._lock:
+            self._zip_file.close()
+
+
+def split_bundle_path(path):
+    """
+    Splits a path into the path of a zip archive and the name of a member. Returns
+    `None` if the path doesn't refer to a member of an existing zip archive.
+    """
+    lower_path = path.lower()
+    index = lower_path.find('.zip/')
+    while index >= 0:
+        archive_path = path[:index + 4]
+        if archive_path in _bundles or os.path.isfile(archive_path):
+            return archive_path, path[index + 5:]
+        index = lower_path.find('.zip/', index + 1)
+
+
+def open_bundle_member(path):
+    """
+    Opens a member of a zip archive, using the registered bundle of the archive or
+    opening and registering a new one. Returns `None` if the path is not inside an
+    archive.
+    """
+    bundle_path = split_bundle_path(path)
+    if bundle_path is None:
+        return None
+
+    archive_path, name = bundle_path
+
+    bundle = _bundles.get(archive_path)
+    if bundle is None:
+        with _open_lock:
+            bundle = _bundles.get(archive_path)
+            if bundle is None:
+                try:
+                    bundle = ZipBundle(archive_path)
+                except XMLSchemaValueError:
+                    return None
+    return bundle.open(name)
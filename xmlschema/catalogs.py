@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains the resolution of locations and namespaces with OASIS XML Catalogs.
+"""
+import os.path
+
+from .compat import URLError
+from .exceptions import XMLSchemaValueError, XMLSchemaURLError
+from .etree import ElementTree
+from .resources import normalize_url, open_url
+
+CATALOG_NAMESPACE = 'urn:oasis:names:tc:entity:xmlns:xml:catalog'
+XML_BASE = '{http://www.w3.org/XML/1998/namespace}base'
+
+_ENTRY_TABLES = {
+    'public': ('public', 'publicId'),
+    'system': ('system', 'systemId'),
+    'uri': ('uri', 'name'),
+}
+_REWRITE_TABLES = {
+    'rewriteSystem': ('rewrite_system', 'systemIdStartString'),
+    'rewriteURI': ('rewrite_uri', 'uriStartString'),
+}
+_SUFFIX_TABLES = {
+    'systemSuffix': ('system_suffix', 'systemIdSuffix'),
+    'uriSuffix': ('uri_suffix', 'uriSuffix'),
+}
+
+
+class XMLCatalog(object):
+    """
+    A resolver based on OASIS XML Catalogs, that maps public identifiers, system
+    identifiers, URIs and URI prefixes to other locations, usually local files.
+    Supported entries are *public*, *system*, *rewriteSystem*, *systemSuffix*,
+    *uri*, *rewriteURI*, *uriSuffix* and *nextCatalog*, also nested in *group*
+    elements, with relative references resolved against the *xml:base* or the
+    URL of the catalog file. Install an instance with :func:`set_catalog` for
+    resolving the locations of the resources, the schema includes and imports:
+
+    >>> catalog = XMLCatalog('schemas/catalog.xml')
+    >>> previous = set_catalog(catalog)
+    >>> catalog.resolve('http://example.com/schemas/collection.xsd')
+    'file:///home/user/project/schemas/collection.xsd'
+
+    The catalog files are loaded when the instance is created and the resolved
+    locations are cached, so a catalog can be shared between threads.
+
+    :param catalogs: the paths or the URLs of the catalog files, that are \
+    consulted in the order of the arguments.
+    """
+    def __init__(self, *catalogs):
+        self.catalogs = []
+        self._tables = []
+        self._resolved = {}
+        for location in catalogs:
+            self._load(normalize_url(location), set())
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(repr(url) for url in self.catalogs))
+
+    def _load(self, url, loaded):
+        if url in loaded:
+            return
+        loaded.add(url)
+
+        try:
+            resource = open_url(url)
+        except URLError as err:
+            raise XMLSchemaURLError(reason="cannot access to catalog %r: %s" % (url, err.reason))
+        try:
+            root = ElementTree.parse(resource).getroot()
+        except ElementTree.ParseError as err:
+            raise XMLSchemaValueError("catalog %r is not well-formed: %s" % (url, err))
+        finally:
+            resource.close()
+
+        if root.tag != '{%s}catalog' % CATALOG_NAMESPACE:
+            raise XMLSchemaValueError("%r is not an OASIS XML Catalog." % url)
+
+        self.catalogs.append(url)
+        tables = {
+            'public': {}, 'system': {}, 'uri': {}, 'rewrite_system': [],
+            'rewrite_uri': [], 'system_suffix': [], 'uri_suffix': []
+        }
+        self._tables.append(tables)
+        next_catalogs = []
+        self._parse_entries(root, os.path.dirname(url), tables, next_catalogs)
+        for next_url in next_catalogs:
+            self._load(next_url, loaded)
+
+    def _parse_entries(self, elem, base_url, tables, next_catalogs):
+        base_url = normalize_url(elem.get(XML_BASE), base_url) if elem.get(XML_BASE) else base_url
+        for child in elem:
+            if callable(child.tag) or not child.tag.startswith('{%s}' % CATALOG_NAMESPACE):
+                continue  # a comment or a not catalog element
+
+            name = child.tag.split('}')[1]
+            child_base_url = normalize_url(child.get(XML_BASE), base_url) if child.get(XML_BASE) else base_url
+            try:
+                if name in _ENTRY_TABLES:
+                    table, key = _ENTRY_TABLES[name]
+                    tables[table].setdefault(child.attrib[key], normalize_url(child.attrib['uri'], child_base_url))
+                elif name in _REWRITE_TABLES:
+                    table, key = _REWRITE_TABLES[name]
+                    prefix = normalize_url(child.attrib['rewritePrefix'], child_base_url)
+                    tables[table].append((child.attrib[key], prefix))
+                elif name in _SUFFIX_TABLES:
+                    table, key = _SUFFIX_TABLES[name]
+                    tables[table].append((child.attrib[key], normalize_url(child.attrib['uri'], child_base_url)))
+                elif name == 'nextCatalog':
+                    next_catalogs.append(normalize_url(child.attrib['catalog'], child_base_url))
+                elif name == 'group':
+                    self._parse_entries(child, base_url, tables, next_catalogs)
+            except KeyError as err:
+                raise XMLSchemaValueError("missing attribute %s in a catalog entry %r." % (err, name))
+
+    def resolve_public(self, public_id):
+        """Returns the URL mapped to a public identifier, `None` if it's not mapped."""
+        for tables in self._tables:
+            if public_id in tables['public']:
+                return tables['public'][public_id]
+
+    def resolve_system(self, system_id):
+        """Returns the URL mapped to a system identifier, `None` if it's not mapped."""
+        return self._resolve(system_id, 'system', 'rewrite_system', 'system_suffix')
+
+    def resolve_uri(self, uri):
+        """Returns the URL mapped to an URI or a namespace URI, `None` if it's not mapped."""
+        return self._resolve(uri, 'uri', 'rewrite_uri', 'uri_suffix')
+
+    def resolve(self, location):
+        """
+        Returns the URL mapped to a location by the system identifier entries or by the URI
+        entries of the catalogs. The location is returned unchanged if it's not mapped.
+        """
+        url = self.resolve_system(location)
+        if url is None:
+            url = self.resolve_uri(location)
+        return location if url is None else url
+
+    def _resolve(self, identifier, exact, rewrite, suffix):
+        try:
+            return self._resolved[exact, identifier]
+        except KeyError:
+            pass
+
+        url = None
+        for tables in self._tables:
+            if identifier in tables[exact]:
+                url = tables[exact][identifier]
+                break
+
+            matches = [(len(s), p) for s, p in tables[rewrite] if identifier.startswith(s)]
+            if matches:
+                length, prefix = max(matches)
+                url = prefix.rstrip('/') + '/' + identifier[length:].lstrip('/')
+                break
+
+            matches = [(len(s), u) for s, u in tables[suffix] if identifier.endswith(s)]
+            if matches:
+                url = max(matches)[1]
+                break
+
+        self._resolved[exact, identifier] = url
+        return url
@@ -0,0 +1,906 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a generator of Python decoder modules from built schemas.
+"""
+from __future__ import unicode_literals
+import re
+from decimal import Decimal
+
+from elementpath import datatypes
+
+from .compat import long_type, unicode_type
+from .exceptions import XMLSchemaValueError
+from .namespaces import XSI_NAMESPACE
+from .qnames import XSD_ID, XSD_IDREF, XSI_SCHEMA_LOCATION, XSI_NONS_SCHEMA_LOCATION
+from .validators import XMLSchemaBase, XsdSimpleType, XsdAtomicBuiltin, XsdAtomicRestriction, \
+    XsdList, XsdElement, XsdGroup, XsdPatternFacets, XsdEnumerationFacets
+from .validators import builtins
+from .validators.facets import XsdLengthFacet, XsdMinLengthFacet, XsdMaxLengthFacet, \
+    XsdMinInclusiveFacet, XsdMinExclusiveFacet, XsdMaxInclusiveFacet, XsdMaxExclusiveFacet, \
+    XsdTotalDigitsFacet, XsdFractionDigitsFacet
+
+
+BUILTIN_RANGES = {
+    builtins.byte_validator: (-2**7, 2**7),
+    builtins.short_validator: (-2**15, 2**15),
+    builtins.int_validator: (-2**63, 2**63),
+    builtins.long_validator: (-2**127, 2**127),
+    builtins.unsigned_byte_validator: (0, 2**8),
+    builtins.unsigned_short_validator: (0, 2**16),
+    builtins.unsigned_int_validator: (0, 2**64),
+    builtins.unsigned_long_validator: (0, 2**128),
+    builtins.negative_int_validator: (None, 0),
+    builtins.non_positive_int_validator: (None, 1),
+    builtins.positive_int_validator: (1, None),
+    builtins.non_negative_int_validator: (0, None),
+}
+
+FACET_CHECKS = {
+    XsdMinInclusiveFacet: 'value < %s',
+    XsdMinExclusiveFacet: 'value <= %s',
+    XsdMaxInclusiveFacet: 'value > %s',
+    XsdMaxExclusiveFacet: 'value >= %s',
+}
+
+LENGTH_CHECKS = {
+    'length_validator': 'len(value) != %d',
+    'min_length_validator': 'len(value) < %d',
+    'max_length_validator': 'len(value) > %d',
+    'hex_length_validator': 'len(value) != %d * 2',
+    'hex_min_length_validator': 'len(value) < %d * 2',
+    'hex_max_length_validator': 'len(value) > %d * 2',
+    'base64_length_validator': '_base64_length(value) != %d',
+    'base64_min_length_validator': '_base64_length(value) < %d',
+    'base64_max_length_validator': '_base64_length(value) > %d',
+}
+
+MODULE_HEADER = '''\
+# -*- coding: utf-8 -*-
+"""
+Decoder module generated by xmlschema %(version)s from the schema %(url)r.
+Don't edit this module, generate it again when the schema changes.
+
+The module decodes XML documents like the method to_dict() of the schema with the default
+converter. The data is validated and decoded by code specialized for the components of the
+schema, so the schema is not built. Documents that are invalid or that use features that are
+not covered by the generated code are processed by the schema, that is built at first use.
+"""
+import re
+from decimal import Decimal, DecimalException
+from xml.etree import ElementTree
+%(imports)s
+SCHEMA_URL = %(url)r
+SCHEMA_SOURCE = %(source)r
+SCHEMA_BASE_URL = %(base_url)r
+XSD_VERSION = %(xsd_version)r
+XSI_NAMESPACE = %(xsi_namespace)r
+
+
+class _Invalid(Exception):
+    """The document is invalid, the decoding is delegated to the schema."""
+
+
+class _Unsupported(Exception):
+    """The document uses a feature not covered by the generated code."""
+
+
+_INVALID = _Invalid()
+_UNSUPPORTED = _Unsupported()
+_collapse = re.compile(r'\\s+').sub
+_replace = re.compile(r'\\s').sub
+_schema = None
+
+
+def get_schema():
+    """Returns the schema used for invalid documents, building it at first call."""
+    global _schema
+    if _schema is None:
+        import xmlschema
+
+        source = SCHEMA_URL if SCHEMA_URL is not None else SCHEMA_SOURCE
+        if XSD_VERSION == '1.0':
+            _schema = xmlschema.XMLSchema10(source, base_url=SCHEMA_BASE_URL)
+        else:
+            _schema = xmlschema.XMLSchema11(source, base_url=SCHEMA_BASE_URL)
+    return _schema
+
+
+def _base64_length(x):
+    x = x.replace(' ', '')
+    return len(x) // 4 * 3 - (x[-1] == '=') - (x[-2] == '=')
+
+
+def _not_finite(x):
+    try:
+        return x != x or x in (float('inf'), float('-inf'))
+    except TypeError:
+        return False
+
+
+def _is_hex_binary(x):
+    return not x or not len(x) %% 2 and re.match(r'^[0-9a-fA-F]+$', x) is not None
+
+
+def _is_base64_binary(x):
+    return not x or re.search(r'[^0-9a-zA-z+/= \\t\\n]', x) is None
+
+
+def _boolean(x):
+    if x in ('true', '1'):
+        return True
+    elif x in ('false', '0'):
+        return False
+    raise ValueError('not a boolean value: %%r' %% x)
+
+
+class _Context(object):
+    def __init__(self, namespaces, use_defaults):
+        self.namespaces = namespaces
+        self.use_defaults = use_defaults
+        self.default_namespace = namespaces.get('')
+        self.ids = set()
+        self.refs = []
+        self._names = {}
+
+    def add_id(self, value):
+        if value in self.ids:
+            raise _INVALID
+        self.ids.add(value)
+
+    def check_ids(self):
+        ids = self.ids
+        if any(x not in ids for x in self.refs):
+            raise _INVALID
+
+    def map_qname(self, qname):
+        try:
+            return self._names[qname]
+        except KeyError:
+            pass
+        name = qname
+        if qname and qname[0] == '{' and self.namespaces:
+            uri = qname[1:].split('}')[0]
+            for prefix, ns in self.namespaces.items():
+                if ns == uri:
+                    name = qname.replace('{%%s}' %% uri, '%%s:' %% prefix if prefix else '')
+                    break
+        self._names[qname] = name
+        return name
+
+    def map_attributes(self, attributes):
+        return [('@' + self.map_qname(name), value) for name, value in attributes]
+
+    def xmlns(self, schema_namespaces):
+        return [('@xmlns:%%s' %% k if k else '@xmlns', v) for k, v in self.namespaces.items()
+                if v in schema_namespaces or v == XSI_NAMESPACE]
+
+    def child_tags(self, children):
+        if self.default_namespace:
+            ns = '{%%s}' %% self.default_namespace
+            return [t if t[0] == '{' else ns + t for t in (c.tag for c in children)]
+        return [c.tag for c in children]
+
+
+def _build_dict(result, content, ctx):
+    map_qname = ctx.map_qname
+    for name, value, single in content:
+        if name[0] == '{':
+            name = map_qname(name)
+        try:
+            item = result[name]
+        except KeyError:
+            result[name] = value if single else [value]
+        else:
+            if not isinstance(item, list) or not item:
+                result[name] = [item, value]
+            elif isinstance(item[0], list) or not isinstance(value, list):
+                item.append(value)
+            else:
+                result[name] = [item, value]
+    return result
+
+
+def _not_whitespace(elem):
+    if elem.text is not None and elem.text.strip():
+        return True
+    return any(c.tail is not None and c.tail.strip() for c in elem)
+
+
+def _get_namespaces(data, root):
+    nsmap = {}
+    local_root = root.tag[0] != '{'
+    for _, (prefix, uri) in ElementTree.iterparse(_BytesIO(data), events=('start-ns',)):
+        if prefix not in nsmap and (prefix or not local_root):
+            nsmap[prefix] = uri
+        elif not any(uri == ns for ns in nsmap.values()):
+            if not prefix:
+                try:
+                    prefix = re.search(r'(\\w+)$', uri.strip()).group()
+                except AttributeError:
+                    continue
+            while prefix in nsmap:
+                match = re.search(r'(\\d+)$', prefix)
+                if match:
+                    prefix = prefix[:match.span()[0]] + str(int(match.group()) + 1)
+                else:
+                    prefix += '2'
+            nsmap[prefix] = uri
+    return nsmap
+
+
+def _parse(source, namespaces):
+    if hasattr(source, 'tag') and hasattr(source, 'attrib'):
+        root, nsmap = source, {}
+    elif hasattr(source, 'getroot'):
+        root, nsmap = source.getroot(), {}
+    else:
+        if hasattr(source, 'read'):
+            data = source.read()
+        elif source.lstrip().startswith('<'):
+            data = source
+        else:
+            with open(source, 'rb') as fp:
+                data = fp.read()
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+            if data.lstrip().startswith(b'<?xml'):
+                data = re.sub(br'^(\\s*<\\?xml[^>]*?)encoding=["\\'][^"\\']*["\\']', br'\\1', data)
+        if b'<!ENTITY' in data:
+            raise ElementTree.ParseError("Entities are forbidden")
+        root = ElementTree.fromstring(data)
+        nsmap = _get_namespaces(data, root)
+
+    namespaces = {} if namespaces is None else dict(namespaces)
+    namespaces.update(nsmap)
+    return root, namespaces
+
+
+try:
+    from io import BytesIO as _BytesIO
+except ImportError:
+    from StringIO import StringIO as _BytesIO
+
+
+def _decode(root, namespaces, use_defaults):
+    try:
+        function = ELEMENTS[root.tag]
+    except KeyError:
+        raise _UNSUPPORTED
+    ctx = _Context(namespaces, use_defaults)
+    result = function(root, ctx, 0)
+    ctx.check_ids()
+    return result
+
+
+def to_dict(source, validation='strict', namespaces=None, use_defaults=True, **kwargs):
+    """
+    Decodes an XML document like the method to_dict() of the schema. Takes also
+    the other options of the schema's method, that are processed by the schema.
+    """
+    root, namespaces = _parse(source, namespaces)
+    if not kwargs:
+        try:
+            result = _decode(root, namespaces, use_defaults)
+        except (_Invalid, _Unsupported):
+            pass
+        else:
+            return (result, []) if validation == 'lax' else result
+
+    return get_schema().to_dict(root, validation=validation, namespaces=namespaces,
+                                use_defaults=use_defaults, **kwargs)
+
+
+def is_valid(source, namespaces=None, use_defaults=True):
+    """Returns `True` if the XML document is valid, `False` otherwise."""
+    root, namespaces = _parse(source, namespaces)
+    try:
+        _decode(root, namespaces, use_defaults)
+    except _Invalid:
+        return False
+    except _Unsupported:
+        return get_schema().is_valid(root, namespaces=namespaces, use_defaults=use_defaults)
+    return True
+
+
+def iter_errors(source, namespaces=None, use_defaults=True):
+    """Creates an iterator for the validation errors of the XML document."""
+    root, namespaces = _parse(source, namespaces)
+    try:
+        _decode(root, namespaces, use_defaults)
+    except (_Invalid, _Unsupported):
+        for error in get_schema().iter_errors(root, namespaces=namespaces, use_defaults=use_defaults):
+            yield error
+
+
+def validate(source, namespaces=None, use_defaults=True):
+    """Validates the XML document, raising the first validation error."""
+    for error in iter_errors(source, namespaces, use_defaults):
+        raise error
+'''
+
+
+class _Unsupported(Exception):
+    """A component not covered by the code generation."""
+
+
+def _literal(value):
+    if value is None or isinstance(value, (bool, int, long_type)):
+        return repr(value)
+    elif isinstance(value, (unicode_type, str)):
+        return repr(value)
+    elif isinstance(value, Decimal):
+        return 'Decimal(%r)' % str(value)
+    elif isinstance(value, float):
+        return 'float(%r)' % repr(value)
+    elif isinstance(value, (list, tuple)):
+        return '(%s)' % ''.join('%s, ' % _literal(x) for x in value)
+    raise _Unsupported("value %r" % value)
+
+
+class DecoderGenerator(object):
+    """
+    Generator of a Python module that decodes XML documents for a schema. The module has
+    a function for each simple type, attribute and element declaration of the supported
+    subset, with the content models translated into matching code. The generated module
+    imports only the standard library and *elementpath*, so it's loaded without building
+    the schema. Invalid documents are decoded by the schema, built on demand, so the
+    results and the errors are the same of the schema's API.
+
+    Supported components are atomic and list simple types with their facets, attributes
+    with default and fixed values, and elements with simple content or element-only content
+    defined by sequence, choice and all model groups. Elements that use wildcards, mixed
+    content, substitution groups, identity constraints or XSD 1.1 assertions and type
+    alternatives are decoded by the schema.
+
+    :param schema: a built schema instance.
+    :param schema_url: the URL of the schema used by the generated module, for default \
+    is the URL of the schema. If the schema has no URL the source of the schema is \
+    embedded in the module.
+    """
+    def __init__(self, schema, schema_url=None):
+        if not isinstance(schema, XMLSchemaBase):
+            raise XMLSchemaValueError("%r is not a schema instance." % schema)
+        elif not schema.built:
+            schema.maps.build()
+
+        self.schema = schema
+        self.schema_url = schema.url if schema_url is None else schema_url
+        if self.schema_url is None:
+            self.schema_source = schema.source.text or schema.source.tostring()
+            self.schema_base_url = schema.base_url
+        else:
+            self.schema_source = self.schema_base_url = None
+        self.constants = []
+        self.functions = []
+        self.names = {}
+        self.unsupported = []
+        self.uses_datatypes = False
+        self._stack = set()
+
+    def __repr__(self):
+        return '%s(schema=%r)' % (self.__class__.__name__, self.schema)
+
+    def generate(self):
+        """Returns the source code of the decoder module."""
+        elements = []
+        meta_elements = self.schema.meta_schema.maps.elements if self.schema.meta_schema else ()
+        for name, xsd_element in sorted(self.schema.maps.elements.items()):
+            if name in meta_elements:
+                continue
+            try:
+                elements.append('    %r: %s,' % (name, self.get_element_function(xsd_element)))
+            except _Unsupported:
+                pass
+
+        for function_name in self.unsupported:
+            self.functions.append(
+                'def %s(*args):\n    raise _UNSUPPORTED\n' % function_name
+            )
+
+        text = MODULE_HEADER % {
+            'version': _version(),
+            'url': self.schema_url,
+            'source': self.schema_source,
+            'base_url': self.schema_base_url,
+            'xsd_version': self.schema.XSD_VERSION,
+            'xsi_namespace': XSI_NAMESPACE,
+            'imports': 'from elementpath import datatypes\n' if self.uses_datatypes else '',
+        }
+        parts = [text]
+        for code in self.functions:
+            parts.append('\n\n%s' % code)
+        parts.append('\n\n')
+        parts.extend('%s\n' % line for line in self.constants)
+        parts.append('\nELEMENTS = {\n%s\n}\n' % '\n'.join(elements))
+        return ''.join(parts)
+
+    def _new_name(self, prefix):
+        return '_%s%d' % (prefix, len(self.names))
+
+    def _add_constant(self, prefix, code):
+        name = '_%s%d' % (prefix, len(self.constants))
+        self.constants.append('%s = %s' % (name, code))
+        return name
+
+    def _function(self, key, prefix, builder, *args):
+        """Generates the function of a component once, returning its name."""
+        try:
+            return self.names[key]
+        except KeyError:
+            pass
+
+        name = self.names[key] = self._new_name(prefix)
+        self._stack.add(name)
+        try:
+            self.functions.append(builder(name, *args))
+        except _Unsupported:
+            self.unsupported.append(name)
+        finally:
+            self._stack.discard(name)
+        return name
+
+    def _require(self, function_name):
+        if function_name in self.unsupported:
+            raise _Unsupported(function_name)
+        return function_name
+
+    # Simple types
+    def get_simple_type_function(self, xsd_type):
+        return self._require(self._function(id(xsd_type), 's', self._build_simple_type, xsd_type))
+
+    def _build_simple_type(self, name, xsd_type):
+        lines = ['def %s(text, ctx):' % name]
+        if xsd_type.white_space == 'replace':
+            lines.append("    text = _replace(' ', text)")
+        elif xsd_type.white_space == 'collapse':
+            lines.append("    text = _collapse(' ', text).strip()")
+
+        if isinstance(xsd_type, XsdAtomicBuiltin):
+            if xsd_type.name == XSD_ID:
+                lines.append('    ctx.add_id(text)')
+            elif xsd_type.name == XSD_IDREF:
+                lines.append('    ctx.refs.append(text)')
+
+        lines.extend(self._pattern_lines(xsd_type.patterns))
+
+        if isinstance(xsd_type, XsdAtomicBuiltin):
+            lines.append('    try:')
+            lines.append('        value = %s' % self._conversion(xsd_type.to_python))
+            lines.append('    except (ValueError, DecimalException):')
+            lines.append('        raise _INVALID')
+        elif isinstance(xsd_type, XsdList):
+            item_function = self.get_simple_type_function(xsd_type.item_type)
+            lines.append('    value = [%s(x, ctx) for x in text.split()]' % item_function)
+        elif isinstance(xsd_type, XsdAtomicRestriction):
+            base_type = xsd_type.base_type
+            if not base_type.is_simple():
+                if not base_type.has_simple_content():
+                    raise _Unsupported(xsd_type)
+                base_type = base_type.content_type
+            lines.append('    value = %s(text, ctx)' % self.get_simple_type_function(base_type))
+        elif type(xsd_type) is XsdSimpleType:
+            lines.append('    value = text')
+        else:
+            raise _Unsupported(xsd_type)
+
+        for validator in xsd_type.validators:
+            lines.extend('    %s' % line for line in self._validator_lines(validator))
+        lines.append('    return value')
+        return '\n'.join(lines) + '\n'
+
+    def _pattern_lines(self, patterns):
+        if not patterns:
+            return []
+        elif not isinstance(patterns, XsdPatternFacets):
+            raise _Unsupported(patterns)
+
+        names = [self._add_constant('P', 're.compile(%s).match' % _literal(p.pattern)) for p in patterns.patterns]
+        condition = ' and '.join('%s(text) is None' % x for x in names)
+        return ['    if %s:' % condition, '        raise _INVALID']
+
+    def _conversion(self, to_python):
+        if to_python in (unicode_type, str):
+            return 'text'
+        elif to_python in (int, long_type):
+            return 'int(text)'
+        elif to_python is Decimal:
+            return 'Decimal(text)'
+        elif to_python is float:
+            return 'float(text)'
+        elif to_python is builtins.boolean_to_python:
+            return '_boolean(text)'
+
+        cls = getattr(to_python, '__self__', None)
+        if isinstance(cls, type) and getattr(datatypes, cls.__name__, None) is cls \
+                and getattr(to_python, '__name__', None) == 'fromstring':
+            self.uses_datatypes = True
+            return 'datatypes.%s.fromstring(text)' % cls.__name__
+        raise _Unsupported(to_python)
+
+    def _validator_lines(self, validator):
+        if validator in BUILTIN_RANGES:
+            min_value, max_value = BUILTIN_RANGES[validator]
+            checks = []
+            if min_value is not None:
+                checks.append('value < %d' % min_value)
+            if max_value is not None:
+                checks.append('value >= %d' % max_value)
+            condition = ' or '.join(checks)
+        elif validator is builtins.finite_number_validator:
+            condition = '_not_finite(value)'
+        elif validator is builtins.qname_validator:
+            name = self._add_constant('P', 're.compile(%s).match' % _literal(datatypes.QNAME_PATTERN.pattern))
+            condition = '%s(value) is None' % name
+        elif validator is builtins.hex_binary_validator:
+            condition = 'not _is_hex_binary(value)'
+        elif validator is builtins.base64_binary_validator:
+            condition = 'not _is_base64_binary(value)'
+        elif isinstance(validator, XsdEnumerationFacets):
+            name = self._add_constant('E', _literal(validator.enumeration))
+            condition = 'value not in %s' % name
+        elif type(validator) in FACET_CHECKS:
+            condition = FACET_CHECKS[type(validator)] % _literal(validator.value)
+        elif isinstance(validator, (XsdLengthFacet, XsdMinLengthFacet, XsdMaxLengthFacet)):
+            condition = LENGTH_CHECKS[validator.validator.__name__] % validator.value
+        elif isinstance(validator, XsdTotalDigitsFacet):
+            condition = "len([d for d in str(value).strip('0') if d.isdigit()]) > %d" % validator.value
+        elif isinstance(validator, XsdFractionDigitsFacet):
+            condition = "len(str(value).strip('0').partition('.')[2]) > %d" % validator.value
+        else:
+            raise _Unsupported(validator)
+        return ['if %s:' % condition, '    raise _INVALID']
+
+    # Attributes
+    def get_attribute_function(self, xsd_attribute):
+        return self._require(self._function(id(xsd_attribute), 'a', self._build_attribute, xsd_attribute))
+
+    def _build_attribute(self, name, xsd_attribute):
+        type_function = self.get_simple_type_function(xsd_attribute.type)
+        lines = ['def %s(text, ctx):' % name]
+        if xsd_attribute.default is not None:
+            lines.append('    if not text:')
+            lines.append('        text = %s' % _literal(xsd_attribute.default))
+        if xsd_attribute.fixed is not None:
+            lines.append('    if text != %s:' % _literal(xsd_attribute.fixed))
+            lines.append('        raise _INVALID')
+        if self._is_datetime_type(xsd_attribute.type):
+            lines.append('    %s(text, ctx)' % type_function)
+            lines.append('    return text')
+        else:
+            lines.append('    return %s(text, ctx)' % type_function)
+        return '\n'.join(lines) + '\n'
+
+    def _is_datetime_type(self, xsd_type):
+        while not isinstance(xsd_type, XsdAtomicBuiltin):
+            if isinstance(xsd_type, XsdList) or xsd_type.base_type is None:
+                return False
+            xsd_type = xsd_type.base_type
+            if not xsd_type.is_simple():
+                xsd_type = xsd_type.content_type
+        return getattr(xsd_type.to_python, '__name__', None) == 'fromstring'
+
+    def _attributes_lines(self, attribute_group):
+        """Lines that decode the attributes of *elem* into the local *attributes*."""
+        if None in attribute_group:
+            raise _Unsupported(attribute_group)  # attribute wildcard
+
+        table = {k: self.get_attribute_function(v) for k, v in attribute_group.items()}
+        xsi_table = {}
+        for xsi_name in (XSI_SCHEMA_LOCATION, XSI_NONS_SCHEMA_LOCATION):
+            try:
+                xsd_attribute = self.schema.maps.lookup_attribute(xsi_name)
+            except LookupError:
+                continue
+            try:
+                xsi_table[xsi_name] = self.get_attribute_function(xsd_attribute)
+            except _Unsupported:
+                pass
+
+        table_name = self._add_constant('A', '{%s}' % ', '.join(
+            '%r: %s' % (k, v) for k, v in sorted(table.items()) + sorted(xsi_table.items())
+        ))
+        lines = ['attrs = elem.attrib']
+        if not attribute_group:
+            lines.append('if not attrs:')
+            lines.append('    attributes = None')
+            lines.append('else:')
+            indent = '    '
+        else:
+            indent = ''
+
+        required = attribute_group._required
+        if required:
+            name = self._add_constant('R', 'frozenset(%s)' % _literal(sorted(required)))
+            lines.append(indent + 'if %s.difference(attrs):' % name)
+            lines.append(indent + '    raise _INVALID')
+
+        predefined = attribute_group._predefined_values
+        if predefined:
+            fixed = attribute_group._fixed_values
+            all_name = self._add_constant('D', '[%s]' % ', '.join(
+                '(%r, %s)' % (k, _literal(v)) for k, v in predefined.items()
+            ))
+            fixed_name = self._add_constant('D', '[%s]' % ', '.join(
+                '(%r, %s)' % (k, _literal(v)) for k, v in predefined.items() if k in fixed
+            ))
+            lines.append(indent + 'predefined = %s if ctx.use_defaults else %s' % (all_name, fixed_name))
+            lines.append(indent + 'if any(k not in attrs for k, _ in predefined):')
+            lines.append(indent + '    attrs = dict(attrs)')
+            lines.append(indent + '    attrs.update((k, v) for k, v in predefined if k not in attrs)')
+
+        lines.append(indent + 'attributes = []')
+        lines.append(indent + 'for name, value in attrs.items():')
+        lines.append(indent + '    try:')
+        lines.append(indent + '        attributes.append((name, %s[name](value, ctx)))' % table_name)
+        lines.append(indent + '    except KeyError:')
+        lines.append(indent + "        raise _UNSUPPORTED if name.startswith('{%s}') else _INVALID" % XSI_NAMESPACE)
+        return lines
+
+    # Elements
+    def get_element_function(self, xsd_element):
+        name = self._function(id(xsd_element), 'e', self._build_element, xsd_element)
+        if name in self._stack:
+            return name  # a recursive reference
+        return self._require(name)
+
+    def _build_element(self, name, xsd_element):
+        if xsd_element.abstract or xsd_element.constraints or list(xsd_element.iter_substitutes()) \
+                or getattr(xsd_element, 'alternatives', None):
+            raise _Unsupported(xsd_element)
+
+        xsd_type = xsd_element.type
+        if getattr(xsd_type, 'assertions', None) or getattr(xsd_type, 'open_content', None):
+            raise _Unsupported(xsd_type)
+
+        lines = ['def %s(elem, ctx, level):' % name]
+        body = self._attributes_lines(getattr(xsd_type, 'attributes', xsd_element.attributes))
+
+        if xsd_type.is_simple() or xsd_type.has_simple_content():
+            simple_type = xsd_type if xsd_type.is_simple() else xsd_type.content_type
+            type_function = self.get_simple_type_function(simple_type)
+            body.extend([
+                'if len(elem):',
+                '    raise _INVALID',
+                'text = elem.text',
+            ])
+            if xsd_element.fixed is not None:
+                body.extend([
+                    'if text is None:',
+                    '    text = %s' % _literal(xsd_element.fixed),
+                    'elif text != %s:' % _literal(xsd_element.fixed),
+                    '    raise _INVALID',
+                ])
+            elif xsd_element.default is not None:
+                body.extend([
+                    'if not text and ctx.use_defaults:',
+                    '    text = %s' % _literal(xsd_element.default),
+                ])
+            body.extend([
+                'if text is None:',
+                "    %s('', ctx)" % type_function,
+                '    value = None',
+                'else:',
+                '    value = %s(text, ctx)' % type_function,
+            ])
+            if self._is_datetime_type(simple_type):
+                body.append('    value = elem.text')
+
+            if xsd_element.is_global:
+                body.append('if level == 0 and ctx.namespaces:')
+                body.append('    result = ctx.xmlns(%s)' % self._schema_namespaces(xsd_element))
+                body.append('else:')
+                body.append('    result = []')
+            else:
+                body.append('result = []')
+            body.extend([
+                'if attributes:',
+                '    result.extend(ctx.map_attributes(attributes))',
+                "    if value is not None and value != '':",
+                "        result.append(('$', value))",
+                '    return dict(result)',
+                "return value if value != '' else None",
+            ])
+        else:
+            content_type = xsd_type.content_type
+            if not isinstance(content_type, XsdGroup) or content_type.mixed:
+                raise _Unsupported(xsd_type)
+
+            body.extend([
+                'if _not_whitespace(elem):',
+                '    raise _INVALID',
+            ])
+            if xsd_element.is_global:
+                body.append('if level == 0 and ctx.namespaces:')
+                body.append('    result = dict(ctx.xmlns(%s))' % self._schema_namespaces(xsd_element))
+                body.append('else:')
+                body.append('    result = {}')
+            else:
+                body.append('result = {}')
+            body.extend([
+                'if attributes:',
+                '    result.update(ctx.map_attributes(attributes))',
+            ])
+
+            if content_type:
+                single = content_type.is_single()
+                group_function = self.get_group_function(content_type, single)
+                body.extend([
+                    'children = [c for c in elem if not callable(c.tag)]  # skip comments and PIs',
+                    'tags = ctx.child_tags(children)',
+                    'content = []',
+                    'if %s(children, tags, 0, content, ctx, level + 1) != len(children):' % group_function,
+                    '    raise _INVALID',
+                    'if content:',
+                    '    _build_dict(result, content, ctx)',
+                ])
+            else:
+                body.extend([
+                    'if len(elem):',
+                    '    raise _INVALID',
+                ])
+            body.append('return result if result else None')
+
+        lines.extend('    %s' % line for line in body)
+        return '\n'.join(lines) + '\n'
+
+    def _schema_namespaces(self, xsd_element):
+        return self._add_constant('N', 'frozenset(%s)' % _literal(sorted(set(xsd_element.namespaces.values()))))
+
+    # Model groups
+    def get_group_function(self, group, single):
+        return self._require(self._function((id(group), single), 'g', self._build_group, group, single))
+
+    def _first_tags(self, particle):
+        if isinstance(particle, XsdElement):
+            return set(particle.names)
+        elif not isinstance(particle, XsdGroup):
+            raise _Unsupported(particle)
+        elif particle.model == 'sequence':
+            tags = set()
+            for item in particle:
+                tags.update(self._first_tags(item))
+                if not item.is_emptiable():
+                    break
+            return tags
+        else:
+            return set().union(*[self._first_tags(item) for item in particle])
+
+    def _particle_lines(self, particle, single):
+        """Lines that match a particle at the index *i*, updating the index."""
+        if isinstance(particle, XsdGroup):
+            return ['i = %s(children, tags, i, content, ctx, level)' % self.get_group_function(particle, single)]
+
+        function = self.get_element_function(particle)
+        names = self._add_constant('T', 'frozenset(%s)' % _literal(sorted(particle.names)))
+        is_single = single and particle.is_single()
+        lines = []
+        if particle.max_occurs == 1:
+            lines.append('if i < n and tags[i] in %s:' % names)
+            lines.append('    content.append((children[i].tag, %s(children[i], ctx, level), %r))' % (
+                function, is_single
+            ))
+            lines.append('    i += 1')
+            if particle.min_occurs:
+                lines.append('else:')
+                lines.append('    raise _INVALID')
+        else:
+            lines.append('k = 0')
+            if particle.max_occurs is None:
+                lines.append('while i < n and tags[i] in %s:' % names)
+            else:
+                lines.append('while i < n and k < %d and tags[i] in %s:' % (particle.max_occurs, names))
+            lines.append('    content.append((children[i].tag, %s(children[i], ctx, level), %r))' % (
+                function, is_single
+            ))
+            lines.append('    i += 1')
+            lines.append('    k += 1')
+            if particle.min_occurs:
+                lines.append('if k < %d:' % particle.min_occurs)
+                lines.append('    raise _INVALID')
+        return lines
+
+    def _build_group(self, name, group, single):
+        if group.model == 'all' or any(not isinstance(x, (XsdElement, XsdGroup)) for x in group):
+            return self._build_all_group(name, group, single)
+
+        lines = [
+            'def %s(children, tags, i, content, ctx, level):' % name,
+            '    n = len(children)',
+            '    count = 0',
+        ]
+        first = self._add_constant('T', 'frozenset(%s)' % _literal(sorted(self._first_tags(group))))
+        if group.max_occurs is None:
+            lines.append('    while i < n and tags[i] in %s:' % first)
+        else:
+            lines.append('    while count < %d and i < n and tags[i] in %s:' % (group.max_occurs, first))
+        lines.append('        start = i')
+
+        body = []
+        if group.model == 'sequence':
+            for particle in group:
+                body.extend(self._particle_lines(particle, single))
+        else:
+            for k, particle in enumerate(group):
+                tags = self._add_constant('T', 'frozenset(%s)' % _literal(sorted(self._first_tags(particle))))
+                body.append('%s tags[i] in %s:' % ('if' if not k else 'elif', tags))
+                body.extend('    %s' % line for line in self._particle_lines(particle, single))
+            body.append('else:')
+            body.append('    break')
+
+        lines.extend('        %s' % line for line in body)
+        lines.append('        count += 1')
+        lines.append('        if i == start:')
+        lines.append('            break')
+        if not group.is_emptiable():
+            lines.append('    if count < %d:' % group.min_occurs)
+            lines.append('        raise _INVALID')
+        lines.append('    return i')
+        return '\n'.join(lines) + '\n'
+
+    def _build_all_group(self, name, group, single):
+        if group.model != 'all' or group.max_occurs != 1:
+            raise _Unsupported(group)
+
+        table = {}
+        required = []
+        for particle in group:
+            if not isinstance(particle, XsdElement) or particle.max_occurs != 1:
+                raise _Unsupported(particle)
+            function = self.get_element_function(particle)
+            for tag in particle.names:
+                table[tag] = '(%r, %s, %r)' % (particle.name, function, single)
+            if particle.min_occurs:
+                required.append(particle.name)
+
+        table_name = self._add_constant('A', '{%s}' % ', '.join('%r: %s' % x for x in sorted(table.items())))
+        lines = [
+            'def %s(children, tags, i, content, ctx, level):' % name,
+            '    n = len(children)',
+            '    found = set()',
+            '    while i < n and tags[i] in %s:' % table_name,
+            '        key, function, single = %s[tags[i]]' % table_name,
+            '        if key in found:',
+            '            raise _INVALID',
+            '        found.add(key)',
+            '        content.append((children[i].tag, function(children[i], ctx, level), single))',
+            '        i += 1',
+        ]
+        if required:
+            required_name = self._add_constant('R', 'frozenset(%s)' % _literal(sorted(required)))
+            condition = '%s.difference(found)' % required_name
+            if group.min_occurs == 0:
+                condition = 'found and ' + condition
+            lines.append('    if %s:' % condition)
+            lines.append('        raise _INVALID')
+        lines.append('    return i')
+        return '\n'.join(lines) + '\n'
+
+
+def _version():
+    from . import __version__
+    return __version__
+
+
+def generate_decoder(schema, schema_url=None):
+    """
+    Generates the source code of a Python module for decoding XML documents with a
+    schema. The generated module has the functions *to_dict*, *is_valid*, *iter_errors*
+    and *validate*, that process documents without building the schema. See
+    :class:`DecoderGenerator` for the supported components.
+
+    :param schema: a built schema instance.
+    :param schema_url: the URL of the schema used by the generated module for processing \
+    invalid documents and not supported components, for default is the URL of the schema. \
+    If the schema has no URL the source of the schema is embedded in the module.
+    :return: a string with the Python source code of the module.
+    """
+    return DecoderGenerator(schema, schema_url).generate()
@@ -22,6 +22,8 @@ try:
     from io import StringIO, BytesIO
     from collections.abc import Iterable, MutableSet, Sequence, MutableSequence, Mapping, MutableMapping
     from functools import lru_cache
+    from collections import ChainMap
+    import http.client as http_client
 except ImportError:
     # Python 2.7 imports
     from urllib import pathname2url
@@ -29,6 +31,7 @@ except ImportError:
     from urlparse import urlsplit, urljoin, uses_relative, urlparse, urlunsplit
     from StringIO import StringIO  # the io.StringIO accepts only unicode type
     from io import BytesIO
+    import httplib as http_client
     from collections import Iterable, MutableSet, Sequence, MutableSequence, Mapping, MutableMapping
     from functools import wraps
 
@@ -43,6 +46,49 @@ except ImportError:
             return wrapper
         return lru_cache_decorator
 
+    class ChainMap(MutableMapping):
+        """
+        A minimal backport of Python 3 ChainMap for Python 2.7 compatibility until support ends.
+        Lookups search the mappings in order, writes and deletions operate only on the first one.
+        """
+        def __init__(self, *maps):
+            self.maps = list(maps) or [{}]
+
+        def __getitem__(self, key):
+            for mapping in self.maps:
+                try:
+                    return mapping[key]
+                except KeyError:
+                    pass
+            raise KeyError(key)
+
+        def get(self, key, default=None):
+            return self[key] if key in self else default
+
+        def __contains__(self, key):
+            return any(key in m for m in self.maps)
+
+        def __len__(self):
+            return len(set().union(*self.maps))
+
+        def __iter__(self):
+            return iter(set().union(*self.maps))
+
+        def __setitem__(self, key, value):
+            self.maps[0][key] = value
+
+        def __delitem__(self, key):
+            del self.maps[0][key]
+
+        def __repr__(self):
+            return '%s(%s)' % (self.__class__.__name__, ', '.join(map(repr, self.maps)))
+
+        def clear(self):
+            self.maps[0].clear()
+
+        def new_child(self, m=None):
+            return self.__class__({} if m is None else m, *self.maps)
+
 
 PY3 = sys.version_info[0] == 3
 
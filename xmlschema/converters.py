@@ -12,11 +12,13 @@ This module contains converter classes and definitions.
 """
 from __future__ import unicode_literals
 from collections import namedtuple, OrderedDict
+import keyword
 import string
 
 from .compat import ordered_dict_class, unicode_type
 from .exceptions import XMLSchemaValueError
 from .etree import etree_element, lxml_etree_element, etree_register_namespace, lxml_etree_register_namespace
+from .helpers import local_name
 from .namespaces import XSI_NAMESPACE
 from xmlschema.namespaces import NamespaceMapper
 
@@ -68,6 +70,14 @@ class XMLSchemaConverter(NamespaceMapper):
     only. Defaults to `False`.
     :param force_list: if set to `True` child elements are decoded within a list in any case. \
     Applicable to default converter only. Defaults to `False`.
+    :param intern_table: an optional :class:`InternTable` instance for sharing the keys \
+    of decoded data, like the mapped names of elements and attributes.
+    :param value_table: an optional :class:`InternTable` instance for sharing the keys \
+    that depend on the decoded document: the keys of names not in *declared_names*, the \
+    keys with a namespace prefix and the keys of namespace declarations. It's used for \
+    keeping in *intern_table* only the keys that are limited by the schema.
+    :param declared_names: the names of the declared elements and attributes, whose \
+    keys are shared through *intern_table* when a *value_table* is provided.
 
     :ivar dict: dictionary class to use for decoded data.
     :ivar list: list class to use for decoded data.
@@ -80,10 +90,14 @@ class XMLSchemaConverter(NamespaceMapper):
     :ivar preserve_root: preserve the root element on decoding
     :ivar force_dict: force dictionary for complex elements with simple content
     :ivar force_list: force list for child elements
+    :ivar intern_table: the table for sharing the keys of decoded data
+    :ivar value_table: the table for sharing the keys derived from the decoded document
+    :ivar declared_names: the names whose keys are shared by *intern_table*
     """
     def __init__(self, namespaces=None, dict_class=None, list_class=None, etree_element_class=None,
                  text_key='$', attr_prefix='@', cdata_prefix=None, indent=4, strip_namespaces=False,
-                 preserve_root=False, force_dict=False, force_list=False, **kwargs):
+                 preserve_root=False, force_dict=False, force_list=False, intern_table=None,
+                 value_table=None, declared_names=frozenset(), **kwargs):
         if etree_element_class is not None and etree_element_class not in (etree_element, lxml_etree_element):
             raise XMLSchemaValueError("%r: unsupported element.")
 
@@ -98,6 +112,9 @@ class XMLSchemaConverter(NamespaceMapper):
         self.preserve_root = preserve_root
         self.force_dict = force_dict
         self.force_list = force_list
+        self.intern_table = intern_table
+        self.value_table = value_table
+        self.declared_names = declared_names
 
         if self.etree_element_class is etree_element:
             super(XMLSchemaConverter, self).__init__(namespaces, etree_register_namespace)
@@ -105,6 +122,9 @@ class XMLSchemaConverter(NamespaceMapper):
             super(XMLSchemaConverter, self).__init__(namespaces, lxml_etree_register_namespace)
         if strip_namespaces:
             self.map_qname = self.unmap_qname = self._unmap_attribute_qname = self._local_name
+        if intern_table is not None:
+            map_qname, intern_key = self.map_qname, self.intern_key
+            self.map_qname = lambda qname: intern_key(map_qname(qname), qname)
 
     def __setattr__(self, name, value):
         if name in ('attr_prefix', 'text_key', 'cdata_prefix'):
@@ -141,6 +161,9 @@ class XMLSchemaConverter(NamespaceMapper):
             preserve_root=kwargs.get('preserve_root', self.preserve_root),
             force_dict=kwargs.get('force_dict', self.force_dict),
             force_list=kwargs.get('force_list', self.force_list),
+            intern_table=kwargs.get('intern_table', self.intern_table),
+            value_table=kwargs.get('value_table', self.value_table),
+            declared_names=kwargs.get('declared_names', self.declared_names),
         )
 
     def map_attributes(self, attributes):
@@ -155,6 +178,10 @@ class XMLSchemaConverter(NamespaceMapper):
         """
         if self.attr_prefix is None or not attributes:
             return
+        elif self.attr_prefix and self.intern_table is not None:
+            intern_key = self.intern_key
+            for name, value in attributes:
+                yield intern_key('%s%s' % (self.attr_prefix, self.map_qname(name)), name), value
         elif self.attr_prefix:
             for name, value in attributes:
                 yield '%s%s' % (self.attr_prefix, self.map_qname(name)), value
@@ -162,6 +189,24 @@ class XMLSchemaConverter(NamespaceMapper):
             for name, value in attributes:
                 yield self.map_qname(name), value
 
+    def map_namespace_key(self, prefix):
+        """Returns the key of a namespace declaration in decoded data."""
+        key = '%s:%s' % (self.ns_prefix, prefix) if prefix else self.ns_prefix
+        return key if self.intern_table is None else self.intern_key(key)
+
+    def intern_key(self, key, name=None):
+        """
+        Returns the shared instance of a key of decoded data. If *value_table* is provided
+        the key is shared through it when the key depends on the decoded document.
+
+        :param key: the key string.
+        :param name: the name of the element or of the attribute the key is derived from.
+        """
+        if self.value_table is not None and (name not in self.declared_names or
+                                             ':' in key and '{' not in key):
+            return self.value_table.intern(key)  # an undeclared name or a document's prefix
+        return self.intern_table.intern(key)
+
     def _unmap_attribute_qname(self, name):
         if name[0] == '{' or ':' not in name:
             return name
@@ -249,7 +294,7 @@ class XMLSchemaConverter(NamespaceMapper):
         if level == 0 and xsd_element.is_global and self:
             schema_namespaces = set(xsd_element.namespaces.values())
             result_dict.update(
-                ('%s:%s' % (self.ns_prefix, k) if k else self.ns_prefix, v) for k, v in self.items()
+                (self.map_namespace_key(k), v) for k, v in self.items()
                 if v in schema_namespaces or v == XSI_NAMESPACE
             )
 
@@ -975,3 +1020,255 @@ class JsonMLConverter(XMLSchemaConverter):
                 for e in obj[content_index:]
             ]
             return ElementData(xsd_element.name, None, content, attributes)
+
+
+class DataElement(object):
+    """
+    Base class of the data classes derived from the complex types of a schema by
+    :class:`DataClassConverter`. A data class has a slot for each attribute and child
+    element declaration of the complex type, plus a slot for the text of types with
+    simple content. Child elements that can occur more than once are kept within a
+    list. The slots of missing attributes and elements are unset and read as `None`,
+    an empty element is decoded setting its slot to `None`.
+
+    :param kwargs: the initial values of the slots.
+
+    :cvar xsd_type: the complex type of the data class.
+    """
+    __slots__ = ('_extra',)
+
+    xsd_type = None
+    _attributes = {}  # Map from attribute names to slots
+    _elements = {}  # Map from child element names to slots and multiplicity
+    _text = None  # The slot of the simple content
+    _fields = ()
+
+    def __init__(self, **kwargs):
+        self._extra = None
+        for name, value in kwargs.items():
+            if name not in self._fields:
+                raise XMLSchemaValueError("%r: unknown field %r." % (type(self), name))
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        if name in self._fields:
+            return None  # an unset slot
+        raise AttributeError("%r object has no attribute %r" % (self.__class__.__name__, name))
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join('%s=%r' % item for item in self.items()))
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self._extra == other._extra and list(self.items()) == list(other.items())
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    @classmethod
+    def fields(cls):
+        """Returns the names of the slots with the data of the element."""
+        return cls._fields
+
+    def items(self):
+        """Creates an iterator for the couples of name and value of the set slots."""
+        for name in self._fields:
+            try:
+                yield name, object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+
+
+def _field_name(qname, names):
+    name = ''.join(c if c in _FIELD_CHARS else '_' for c in local_name(qname)) or '_'
+    if name[0].isdigit() or keyword.iskeyword(name) or hasattr(DataElement, name):
+        name += '_'
+    while name in names:
+        name += '_'
+    names.append(str(name))
+    return str(name)
+
+
+def _iter_model_elements(group, multiple=False):
+    """
+    Yields the elements of a model group, each one with a flag that is `True` if
+    the element can occur more than once, also for a repetition of the groups that
+    contain it.
+    """
+    multiple = multiple or not group.is_single()
+    for item in group:
+        if hasattr(item, 'model'):
+            for xsd_element, item_multiple in _iter_model_elements(item, multiple):
+                yield xsd_element, item_multiple
+        else:
+            yield item, multiple or not item.is_single()
+
+
+_FIELD_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+
+
+def get_data_class(xsd_type, name=None):
+    """
+    Returns the data class derived from a complex type, building it on the first
+    call. The classes are cached in the global maps of the schema of the type, so
+    the elements of the same type are always decoded to instances of the same class.
+
+    :param xsd_type: an XSD complex type.
+    :param name: the name of the class, used for anonymous types. For default \
+    the name is derived from the local name of the type.
+    """
+    data_classes = xsd_type.maps.data_classes
+    try:
+        return data_classes[xsd_type]
+    except KeyError:
+        pass
+
+    names = []
+    attributes = {}
+    elements = {}
+    text = None
+
+    for qname in getattr(xsd_type, 'attributes', ()):
+        if qname is not None:  # skip attribute wildcards
+            attributes[qname] = _field_name(qname, names)
+
+    if xsd_type.has_simple_content():
+        text = _field_name('text', names)
+    elif not xsd_type.is_simple():
+        for xsd_child, multiple in _iter_model_elements(xsd_type.content_type):
+            if xsd_child.name is None:
+                continue  # skip element wildcards
+            for xsd_element in [xsd_child] + list(xsd_child.iter_substitutes()):
+                try:
+                    field = elements[xsd_element.name][0]
+                except KeyError:
+                    elements[xsd_element.name] = _field_name(xsd_element.name, names), multiple
+                else:
+                    elements[xsd_element.name] = field, True  # a name repeated in the model
+
+    if xsd_type.name is not None:
+        class_name = local_name(xsd_type.name)
+    else:
+        class_name = name or 'Anonymous'
+    class_name = ''.join(
+        x[:1].upper() + x[1:] for x in ''.join(c if c in _FIELD_CHARS else '_' for c in class_name).split('_')
+    ) or 'Anonymous'
+    if class_name[0].isdigit():
+        class_name = '_' + class_name
+
+    cls = type(str(class_name), (DataElement,), {
+        '__slots__': tuple(names),
+        '__module__': __name__,
+        'xsd_type': xsd_type,
+        '_attributes': attributes,
+        '_elements': elements,
+        '_text': text,
+        '_fields': tuple(names),
+    })
+    return data_classes.setdefault(xsd_type, cls)
+
+
+class DataClassConverter(XMLSchemaConverter):
+    """
+    XML Schema based converter class that decodes elements with a complex type to
+    instances of slotted data classes, derived from the schema's types. The slots
+    are named after the local names of the attribute and child element declarations,
+    child elements that can occur more than once are decoded to a list and the text
+    of a type with simple content is stored in the slot *text*. Names that aren't
+    Python identifiers or that are already used are adapted appending underscores.
+    Elements with a simple type are decoded to their values.
+
+    Data that doesn't match a declaration (wildcards, character data of mixed content
+    is ignored) is kept with the instance and encoded back, so decoded data instances
+    can be encoded again with the same converter. Child elements are encoded following
+    the order of the content model, like with :class:`UnorderedConverter`.
+
+    :param namespaces: map from namespace prefixes to URI.
+    :param list_class: list class to use for decoded data. Default is `list`.
+    """
+    def __init__(self, namespaces=None, dict_class=None, list_class=None, **kwargs):
+        kwargs.update(attr_prefix='', text_key='', cdata_prefix=None)
+        super(DataClassConverter, self).__init__(namespaces, dict_class, list_class, **kwargs)
+
+    @property
+    def lossless(self):
+        return False
+
+    def data_class(self, xsd_element):
+        """Returns the data class for an element with a complex type."""
+        return get_data_class(xsd_element.type, local_name(xsd_element.name or ''))
+
+    def element_decode(self, data, xsd_element, level=0):
+        if xsd_element.type.is_simple():
+            return data.text if data.text != '' else None
+
+        cls = self.data_class(xsd_element)
+        obj = cls()
+        extra_attributes = []
+        extra_content = []
+
+        if data.attributes:
+            for name, value in data.attributes:
+                try:
+                    setattr(obj, cls._attributes[name], value)
+                except KeyError:
+                    extra_attributes.append((name, value))
+
+        if cls._text is not None:
+            if data.text is not None and data.text != '':
+                setattr(obj, cls._text, data.text)
+        elif data.content:
+            for name, value, _ in data.content:
+                try:
+                    field, multiple = cls._elements[name]
+                except KeyError:
+                    if not isinstance(name, int):  # skip character data of mixed content
+                        extra_content.append((name, value))
+                    continue
+
+                if not multiple:
+                    setattr(obj, field, value)
+                else:
+                    try:
+                        object.__getattribute__(obj, field).append(value)
+                    except AttributeError:
+                        setattr(obj, field, self.list([value]))
+
+        if extra_attributes or extra_content:
+            obj._extra = extra_attributes, extra_content
+        return obj
+
+    def element_encode(self, obj, xsd_element, level=0):
+        if not isinstance(obj, DataElement):
+            if xsd_element.type.is_simple() or xsd_element.type.has_simple_content():
+                return ElementData(xsd_element.name, obj, None, self.dict())
+            else:
+                return ElementData(xsd_element.name, None, obj, self.dict())
+
+        cls = type(obj)
+        values = dict(obj.items())
+        attributes = self.dict()
+        for name, field in cls._attributes.items():
+            if field in values:
+                attributes[name] = values[field]
+
+        content = {}
+        for name, (field, multiple) in cls._elements.items():
+            if field not in values:
+                continue
+            elif multiple and values[field] is not None:
+                content[name] = list(values[field])
+            else:
+                content[name] = [values[field]]
+
+        if obj._extra is not None:
+            attributes.update(obj._extra[0])
+            for name, value in obj._extra[1]:
+                content.setdefault(name, []).append(value)
+
+        text = values.get(cls._text)
+        return ElementData(xsd_element.name, text, content, attributes)
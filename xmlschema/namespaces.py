@@ -177,17 +177,30 @@ class NamespaceMapper(MutableMapping):
 class NamespaceView(Mapping):
     """
     A read-only map for filtered access to a dictionary that stores objects mapped from QNames.
+
+    :param qname_dict: the dictionary that stores the objects mapped from QNames.
+    :param namespace_uri: the namespace URI of the view.
+    :param lookup: an optional function that takes a QName and returns the object \
+    to get for it. It's used for item access, when a stored object has to be processed \
+    before being returned (e.g. a global component built on demand).
     """
-    def __init__(self, qname_dict, namespace_uri):
+    def __init__(self, qname_dict, namespace_uri, lookup=None):
         self.target_dict = qname_dict
         self.namespace = namespace_uri
+        self.lookup = lookup
         if namespace_uri:
             self._key_fmt = '{' + namespace_uri + '}%s'
         else:
             self._key_fmt = '%s'
 
     def __getitem__(self, key):
-        return self.target_dict[self._key_fmt % key]
+        if self.lookup is None:
+            return self.target_dict[self._key_fmt % key]
+
+        qname = self._key_fmt % key
+        if qname not in self.target_dict:
+            raise KeyError(key)
+        return self.lookup(qname)
 
     def __len__(self):
         return len(self.as_dict())
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains URL openers for accessing remote resources, with connection
+reuse and an on-disk cache of HTTP responses.
+"""
+import hashlib
+import json
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+from .compat import BytesIO, http_client, urlopen, urlsplit, urlunsplit, urljoin, URLError
+from .exceptions import XMLSchemaValueError
+
+_replace_file = getattr(os, 'replace', os.rename)
+
+_MAX_AGE_PATTERN = re.compile(r'max-age\s*=\s*"?(\d+)"?')
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+
+
+class UrlResponse(BytesIO):
+    """
+    The in-memory response returned by a :class:`CachingUrlOpener`, a file-like
+    object with the body of the resource.
+
+    :param data: the bytes of the body.
+    :param url: the URL of the resource, after redirects.
+    :param headers: a dictionary with the relevant headers of the response.
+    :param from_cache: `True` if the body is served from the on-disk cache.
+    """
+    def __init__(self, data, url, headers=None, from_cache=False):
+        super(UrlResponse, self).__init__(data)
+        self.url = url
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    def __repr__(self):
+        return '%s(url=%r, from_cache=%r)' % (self.__class__.__name__, self.url, self.from_cache)
+
+    def geturl(self):
+        return self.url
+
+
+class CachingUrlOpener(object):
+    """
+    An opener for URLs that reuses the HTTP connections, keeping them alive in a pool
+    for each host, and that optionally stores the responses in an on-disk cache. A cached
+    response is served without requests while it's fresh according to the *max-age* of
+    its Cache-Control header, otherwise it's validated with a conditional request based
+    on its ETag and Last-Modified headers. Responses with *no-store* are not cached. URLs
+    with schemes other than HTTP and HTTPS are opened with `urlopen`.
+
+    Install an instance with :func:`set_url_opener` for using it for all the resources:
+
+    >>> opener = CachingUrlOpener(cache_dir='/var/cache/xmlschema')
+    >>> previous = set_url_opener(opener)
+    >>> schema = xmlschema.XMLSchema('https://example.com/schemas/collection.xsd')
+
+    The opener is thread-safe and can be shared by the schemas and the resources of
+    different threads. The bodies are read in memory before being returned.
+
+    :param cache_dir: the directory of the on-disk cache. If not provided the responses \
+    are not cached and the opener provides only the connection reuse.
+    :param offline: if `True` only the cached resources are served, without any request \
+    to the network, also if they are stale. Requires a *cache_dir*.
+    :param max_idle: the maximum number of idle connections kept for each host.
+    :param headers: an optional dictionary with additional headers for the requests.
+    """
+    user_agent = 'python-xmlschema'
+
+    def __init__(self, cache_dir=None, offline=False, max_idle=4, headers=None):
+        if cache_dir is not None and not os.path.isdir(cache_dir):
+            raise XMLSchemaValueError("%r is not a directory." % cache_dir)
+        elif offline and cache_dir is None:
+            raise XMLSchemaValueError("offline mode requires a cache directory.")
+
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.max_idle = max_idle
+        self.headers = dict(headers or ())
+        self._idle = {}  # Idle connections for each (scheme, netloc) couple
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s(cache_dir=%r, offline=%r)' % (self.__class__.__name__, self.cache_dir, self.offline)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __call__(self, url, timeout=30):
+        """
+        Opens an URL, with the same interface of `urlopen`.
+
+        :param url: the URL of the resource.
+        :param timeout: the timeout in seconds for the connection attempts.
+        :return: a file-like object.
+        :raises: `URLError` if the resource is not accessible.
+        """
+        if urlsplit(url).scheme not in ('http', 'https'):
+            return urlopen(url, timeout=timeout)
+
+        entry = self._load_entry(url) if self.cache_dir is not None else None
+        if self.offline:
+            if entry is None:
+                raise URLError("offline mode: the resource %r is not cached" % url)
+            return self._cached_response(entry)
+        elif entry is not None and entry['expires'] is not None and entry['expires'] > time.time():
+            return self._cached_response(entry)
+
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        target = url
+        for _ in range(_MAX_REDIRECTS + 1):
+            status, reason, response_headers, body = self._request(target, headers, timeout)
+            if status in _REDIRECT_CODES and response_headers.get('location'):
+                target = urljoin(target, response_headers['location'])
+                headers = {}
+                entry = None  # a conditional request applies only to the first URL
+            else:
+                break
+        else:
+            raise URLError("too many redirects for %r" % url)
+
+        if status == 304 and entry is not None:
+            entry.update(self._get_freshness(response_headers, entry))
+            self._save_entry(url, entry)
+            return self._cached_response(entry)
+        elif status >= 400:
+            raise URLError("HTTP Error %d: %s (%r)" % (status, reason, target))
+
+        if self.cache_dir is not None:
+            entry = {'url': url, 'location': target, 'content_type': response_headers.get('content-type')}
+            entry.update(self._get_freshness(response_headers))
+            if entry['cacheable']:
+                self._save_entry(url, entry, body)
+        return UrlResponse(body, target, response_headers)
+
+    def close(self):
+        """Closes the idle connections."""
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+    def clear(self):
+        """Removes the cached entries from the cache directory."""
+        if self.cache_dir is not None:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith(('.json', '.data')):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+
+    def _request(self, url, headers, timeout):
+        parts = urlsplit(url)
+        key = parts.scheme, parts.netloc
+        path = urlunsplit(('', '', parts.path or '/', parts.query, ''))
+        request_headers = {'User-Agent': self.user_agent}
+        request_headers.update(self.headers)
+        request_headers.update(headers)
+
+        for attempt in range(2):
+            connection, reused = self._acquire(key, timeout)
+            try:
+                connection.request('GET', path, headers=request_headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http_client.HTTPException, socket.error) as err:
+                connection.close()
+                if reused and not attempt:
+                    continue  # A stale keep-alive connection closed by the server
+                raise URLError(err)
+
+            response_headers = {
+                name: response.getheader(name)
+                for name in ('etag', 'last-modified', 'cache-control', 'expires', 'location', 'content-type')
+                if response.getheader(name) is not None
+            }
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return response.status, response.reason, response_headers, body
+
+    def _acquire(self, key, timeout):
+        with self._lock:
+            try:
+                connection = self._idle[key].pop()
+            except (KeyError, IndexError):
+                pass
+            else:
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+
+        if key[0] == 'https':
+            return http_client.HTTPSConnection(key[1], timeout=timeout), False
+        return http_client.HTTPConnection(key[1], timeout=timeout), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_idle:
+                connections.append(connection)
+                return
+        connection.close()
+
+    @staticmethod
+    def _get_freshness(headers, entry=None):
+        cache_control = headers.get('cache-control', '').lower()
+        freshness = {
+            'etag': headers.get('etag', entry and entry['etag']),
+            'last_modified': headers.get('last-modified', entry and entry['last_modified']),
+            'cacheable': 'no-store' not in cache_control,
+            'expires': None,
+        }
+        if 'no-cache' not in cache_control:
+            match = _MAX_AGE_PATTERN.search(cache_control)
+            if match is not None:
+                freshness['expires'] = time.time() + int(match.group(1))
+            elif headers.get('expires'):
+                expires = parsedate_tz(headers['expires'])
+                if expires is not None:
+                    freshness['expires'] = mktime_tz(expires)
+        return freshness
+
+    def _get_paths(self, url):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + '.json'), os.path.join(self.cache_dir, name + '.data')
+
+    def _load_entry(self, url):
+        meta_path, data_path = self._get_paths(url)
+        try:
+            with open(meta_path) as fp:
+                entry = json.load(fp)
+            if entry.get('url') != url or not os.path.isfile(data_path):
+                return None
+        except (IOError, OSError, ValueError):
+            return None
+        entry['data_path'] = data_path
+        return entry
+
+    def _cached_response(self, entry):
+        try:
+            with open(entry['data_path'], 'rb') as fp:
+                data = fp.read()
+        except (IOError, OSError) as err:
+            raise URLError(err)
+        headers = {'content-type': entry['content_type']} if entry.get('content_type') else {}
+        return UrlResponse(data, entry['location'], headers, from_cache=True)
+
+    def _save_entry(self, url, entry, data=None):
+        meta_path, data_path = self._get_paths(url)
+        entry = {k: v for k, v in entry.items() if k not in ('data_path', 'cacheable')}
+        if data is not None:
+            self._write_file(data_path, data)
+        self._write_file(meta_path, json.dumps(entry).encode('utf-8'))
+
+    def _write_file(self, path, content):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix='xmlschema-', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(content)
+            _replace_file(tmp_path, path)
+        except (IOError, OSError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -21,10 +21,69 @@ from .exceptions import XMLSchemaTypeError, XMLSchemaValueError, XMLSchemaURLErr
 from .qnames import XSI_SCHEMA_LOCATION, XSI_NONS_SCHEMA_LOCATION
 from .helpers import get_namespace
 from .etree import ElementTree, PyElementTree, SafeXMLParser, is_etree_element, etree_tostring
+from .bundles import open_bundle_member
 
 
 DEFUSE_MODES = ('always', 'remote', 'never')
 
+_url_opener = urlopen
+
+
+def set_url_opener(opener=None):
+    """
+    Sets the opener used for accessing the URLs of the resources, that is a callable with
+    the interface of `urlopen`, eg. a :class:`CachingUrlOpener` instance. Returns the
+    previous opener, for restoring it.
+
+    :param opener: the URL opener, if `None` the default `urlopen` is restored.
+    """
+    global _url_opener
+    previous, _url_opener = _url_opener, urlopen if opener is None else opener
+    return previous
+
+
+def open_url(url, timeout=30):
+    """
+    Opens an URL with the current URL opener, returning a file-like object. Local
+    paths that continue the path of a zip archive are opened from the archive.
+    """
+    url_parts = urlsplit(url)
+    if url_parts.scheme in ('', 'file') and '.zip/' in url_parts.path.lower():
+        resource = open_bundle_member(url_parts.path)
+        if resource is not None:
+            return resource
+    return _url_opener(url, timeout=timeout)
+
+
+_catalog = None
+
+
+def set_catalog(catalog=None):
+    """
+    Sets the catalog used for resolving the locations of the resources and the namespaces
+    of the schema imports, that is an :class:`XMLCatalog` instance. Returns the previous
+    catalog, for restoring it.
+
+    :param catalog: the catalog, if `None` the resolution with a catalog is disabled.
+    """
+    global _catalog
+    previous, _catalog = _catalog, catalog
+    return previous
+
+
+def resolve_location(location, base_url=None):
+    """
+    Returns the normalized URL of a location, eventually mapped to another URL by
+    the catalog installed with :func:`set_catalog`.
+    """
+    url = normalize_url(location, base_url)
+    return url if _catalog is None else _catalog.resolve(url)
+
+
+def resolve_namespace(namespace):
+    """Returns the URL mapped to a namespace by the installed catalog, `None` if it's not mapped."""
+    return None if _catalog is None else _catalog.resolve_uri(namespace)
+
 
 def is_remote_url(url):
     return url is not None and urlsplit(url).scheme not in ('', 'file')
@@ -130,14 +189,14 @@ def fetch_resource(location, base_url=None, timeout=30):
     if not location:
         raise XMLSchemaValueError("'location' argument must contains a not empty string.")
 
-    url = normalize_url(location, base_url)
+    url = resolve_location(location, base_url)
     try:
-        resource = urlopen(url, timeout=timeout)
+        resource = open_url(url, timeout=timeout)
     except URLError as err:
         # fallback joining the path without a base URL
-        url = normalize_url(location)
+        url = resolve_location(location)
         try:
-            resource = urlopen(url, timeout=timeout)
+            resource = open_url(url, timeout=timeout)
         except URLError:
             raise XMLSchemaURLError(reason=err.reason)
         else:
@@ -302,7 +361,7 @@ class XMLResource(object):
                     raise
             finally:
                 self._url = _url
-            url = normalize_url(source) if '\n' not in source else None
+            url = resolve_location(source) if '\n' not in source else None
 
         elif isinstance(source, StringIO):
             _url, self._url = self._url, None
@@ -354,7 +413,7 @@ class XMLResource(object):
                 "string containing XML data or an URL or a file-like object is required." % type(source)
             )
         else:
-            resource = urlopen(url, timeout=self.timeout)
+            resource = open_url(url, timeout=self.timeout)
             _url, self._url = self._url, url
             try:
                 if lazy:
@@ -485,25 +544,29 @@ class XMLResource(object):
         if self._url is None:
             raise XMLSchemaValueError("can't open, the resource has no URL associated.")
         try:
-            return urlopen(self._url, timeout=self.timeout)
+            return open_url(self._url, timeout=self.timeout)
         except URLError as err:
             raise XMLSchemaURLError(reason="cannot access to resource %r: %s" % (self._url, err.reason))
 
-    def load(self):
+    def load(self, data=None):
         """
         Loads the XML text from the data source. If the data source is an Element
         the source XML text can't be retrieved.
+
+        :param data: optional bytes already read from the URL of the resource, \
+        for loading the text without accessing the resource again.
         """
         if self._url is None:
             return  # Created from Element or text source --> already loaded
 
-        resource = self.open()
-        try:
-            data = resource.read()
-        except (OSError, IOError) as err:
-            raise XMLSchemaOSError("cannot load data from %r: %s" % (self._url, err))
-        finally:
-            resource.close()
+        if data is None:
+            resource = self.open()
+            try:
+                data = resource.read()
+            except (OSError, IOError) as err:
+                raise XMLSchemaOSError("cannot load data from %r: %s" % (self._url, err))
+            finally:
+                resource.close()
 
         try:
             self._text = data.decode('utf-8') if PY3 else data.encode('utf-8')
@@ -529,7 +592,7 @@ class XMLResource(object):
                 yield elem
             return
         elif self._url is not None:
-            resource = urlopen(self._url, timeout=self.timeout)
+            resource = open_url(self._url, timeout=self.timeout)
         else:
             resource = StringIO(self._text)
 
@@ -551,7 +614,7 @@ class XMLResource(object):
                     yield e
             return
         elif self._url is not None:
-            resource = urlopen(self._url, timeout=self.timeout)
+            resource = open_url(self._url, timeout=self.timeout)
         else:
             self.load()
             resource = StringIO(self._text)
@@ -639,27 +702,27 @@ class XMLResource(object):
         local_root = self.root.tag[0] != '{'
         nsmap = {}
 
-        if self._url is not None:
-            resource = self.open()
+        if isinstance(self._text, string_base_type):
             try:
-                for event, node in self.iterparse(resource, events=('start-ns', 'end')):
+                for event, node in self.iterparse(StringIO(self._text), events=('start-ns', 'end')):
                     if event == 'start-ns':
                         update_nsmap(*node)
                     else:
                         node.clear()
             except (ElementTree.ParseError, PyElementTree.ParseError, UnicodeEncodeError):
                 pass
-            finally:
-                resource.close()
-        elif isinstance(self._text, string_base_type):
+        elif self._url is not None:
+            resource = self.open()
             try:
-                for event, node in self.iterparse(StringIO(self._text), events=('start-ns', 'end')):
+                for event, node in self.iterparse(resource, events=('start-ns', 'end')):
                     if event == 'start-ns':
                         update_nsmap(*node)
                     else:
                         node.clear()
             except (ElementTree.ParseError, PyElementTree.ParseError, UnicodeEncodeError):
                 pass
+            finally:
+                resource.close()
         else:
             # Warning: can extracts namespace information only from lxml etree structures
             try:
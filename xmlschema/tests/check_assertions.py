@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+Benchmark of the XSD 1.1 assertions evaluation, comparing the evaluation of the
+compiled tests on typed values with the evaluation of all the tests with XPath.
+
+Without arguments runs the benchmark on a generated document. With the path of
+the index file (suite.xml) of the W3C XSD test suite runs the benchmark on the
+XSD 1.1 test groups that have assertions.
+"""
+from __future__ import print_function, unicode_literals
+import argparse
+import os.path
+import time
+import xml.etree.ElementTree as ElementTree
+
+from xmlschema import XMLSchemaException
+from xmlschema.validators import XMLSchema11
+
+TEST_SUITE_NAMESPACE = "http://www.w3.org/XML/2004/xml-schema-test-suite/"
+XLINK_NAMESPACE = "http://www.w3.org/1999/xlink"
+
+SCHEMA_SOURCE = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="ranges">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="range" type="rangeType" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+  <xs:complexType name="rangeType">
+    <xs:sequence>
+      <xs:element name="item" type="xs:string" minOccurs="0" maxOccurs="unbounded"/>
+    </xs:sequence>
+    <xs:attribute name="min" type="xs:int" use="required"/>
+    <xs:attribute name="max" type="xs:int" use="required"/>
+    <xs:attribute name="size" type="xs:nonNegativeInteger" use="required"/>
+    <xs:attribute name="label" type="xs:string" use="required"/>
+    <xs:assert test="@min le @max"/>
+    <xs:assert test="@size = count(item)"/>
+    <xs:assert test="count(item) lt 10"/>
+    <xs:assert test="@label ne ''"/>
+  </xs:complexType>
+</xs:schema>"""
+
+
+parser = argparse.ArgumentParser(add_help=True)
+parser.add_argument('suite_file', metavar='SUITE_FILE', nargs='?',
+                    help="the index file of the W3C XSD test suite")
+parser.add_argument('-n', dest='number', type=int, default=5, help="number of runs of each test")
+parser.add_argument('--size', type=int, default=10000, help="size of the generated document")
+
+
+def generate_document(size):
+    root = ElementTree.Element('ranges')
+    for k in range(size):
+        elem = ElementTree.SubElement(root, 'range', min=str(k), max=str(k + k % 7),
+                                      size=str(k % 4), label='r%d' % k)
+        for _ in range(k % 4):
+            ElementTree.SubElement(elem, 'item').text = 'x'
+    return root
+
+
+def disable_compiled_tests(schema):
+    for assertion in schema.maps.iter_components():
+        if getattr(assertion, 'operands', None) is not None:
+            assertion.operands = None
+
+
+def run_validation(schema, sources, number):
+    errors = 0
+    start_time = time.time()
+    for _ in range(number):
+        for source in sources:
+            errors += sum(1 for _ in schema.iter_errors(source))
+    return time.time() - start_time, errors // number
+
+
+def iter_assertion_cases(suite_file):
+    """Yields the schema and the instances of the XSD 1.1 test groups with assertions."""
+    suite_dir = os.path.dirname(suite_file)
+    for testset_ref in ElementTree.parse(suite_file).iter('{%s}testSetRef' % TEST_SUITE_NAMESPACE):
+        testset_file = os.path.join(suite_dir, testset_ref.get('{%s}href' % XLINK_NAMESPACE, ''))
+        testset_dir = os.path.dirname(testset_file)
+
+        for group_elem in ElementTree.parse(testset_file).iter('{%s}testGroup' % TEST_SUITE_NAMESPACE):
+            if group_elem.get('version') == '1.0':
+                continue
+
+            schema_document = group_elem.find('{%s}schemaTest/{%s}schemaDocument' % (
+                TEST_SUITE_NAMESPACE, TEST_SUITE_NAMESPACE
+            ))
+            if schema_document is None:
+                continue
+            schema_path = os.path.normpath(
+                os.path.join(testset_dir, schema_document.get('{%s}href' % XLINK_NAMESPACE))
+            )
+            with open(schema_path, 'rb') as fp:
+                if b'assert' not in fp.read():
+                    continue
+
+            instances = [
+                os.path.normpath(os.path.join(testset_dir, e.get('{%s}href' % XLINK_NAMESPACE)))
+                for e in group_elem.iter('{%s}instanceDocument' % TEST_SUITE_NAMESPACE)
+            ]
+            if instances:
+                yield schema_path, instances
+
+
+def main():
+    args = parser.parse_args()
+
+    if args.suite_file is None:
+        cases = [(SCHEMA_SOURCE, [generate_document(args.size)])]
+        print("Validate a generated document with %d assertions ..." % (args.size * 4))
+    else:
+        cases = list(iter_assertion_cases(args.suite_file))
+        print("Validate the instances of %d XSD 1.1 test groups with assertions ..." % len(cases))
+
+    schemas = []
+    for source, instances in cases:
+        try:
+            schemas.append((XMLSchema11(source), [ElementTree.parse(x).getroot()
+                                                  if not hasattr(x, 'tag') else x for x in instances]))
+        except (XMLSchemaException, ElementTree.ParseError, IOError):
+            continue
+
+    if not schemas:
+        print("  no test cases to run.")
+        return
+
+    results = [run_validation(schema, instances, args.number) for schema, instances in schemas]
+    print("  with compiled tests: %.3f seconds, %d errors" % tuple(map(sum, zip(*results))))
+
+    for schema, _ in schemas:
+        disable_compiled_tests(schema)
+    results = [run_validation(schema, instances, args.number) for schema, instances in schemas]
+    print("  with XPath tests: %.3f seconds, %d errors" % tuple(map(sum, zip(*results))))
+
+
+if __name__ == '__main__':
+    main()
@@ -21,8 +21,8 @@ from memory_profiler import profile
 
 
 def test_choice_type(value):
-    if value not in (str(v) for v in range(1, 9)):
-        msg = "%r must be an integer between [1 ... 8]." % value
+    if value not in (str(v) for v in range(1, 11)):
+        msg = "%r must be an integer between [1 ... 10]." % value
         raise argparse.ArgumentTypeError(msg)
     return int(value)
 
@@ -39,6 +39,8 @@ Run memory tests:
   6) Decode XML file with xmlschema in lazy mode
   7) Validate XML file with xmlschema
   8) Validate XML file with xmlschema in lazy mode
+  9) Build schema and compact its global maps
+ 10) Build schema and compact its global maps discarding the XSD sources
 
 """
 
@@ -59,6 +61,13 @@ def build_schema(source):
     return xs
 
 
+@profile
+def build_compacted_schema(source, discard_sources=False):
+    xs = xmlschema.XMLSchema(source)
+    xs.maps.compact(discard_sources)
+    return xs
+
+
 @profile
 def etree_parse(source):
     xt = ElementTree.parse(source)
@@ -138,3 +147,9 @@ if __name__ == '__main__':
     elif args.test_num == 8:
         import xmlschema
         lazy_validate(args.xml_file)
+    elif args.test_num == 9:
+        import xmlschema
+        build_compacted_schema(args.xml_file)
+    elif args.test_num == 10:
+        import xmlschema
+        build_compacted_schema(args.xml_file, discard_sources=True)
@@ -14,6 +14,7 @@ This module runs tests concerning model groups validation.
 """
 import unittest
 
+from xmlschema import XMLSchemaParseError, XMLSchemaModelError
 from xmlschema.validators import ModelVisitor
 from xmlschema.tests import XMLSchemaTestCase
 
@@ -465,6 +466,42 @@ class TestModelValidation(XMLSchemaTestCase):
         self.assertEqual(model.element, group[0][0])
         self.check_stop(model)
 
+    def test_large_model_checks(self):
+        elements = ''.join('<xs:element name="e%d" minOccurs="0"/>' % k for k in range(300))
+        restricted = ''.join('<xs:element name="e%d" minOccurs="0"/>' % k for k in range(0, 300, 3))
+        source = """
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:group name="largeGroup"><xs:sequence>{0}</xs:sequence></xs:group>
+                <xs:complexType name="baseType">
+                    <xs:choice maxOccurs="unbounded">{0}</xs:choice>
+                </xs:complexType>
+                <xs:complexType name="derivedType">
+                    <xs:complexContent>
+                        <xs:restriction base="baseType">
+                            <xs:choice maxOccurs="unbounded">{1}</xs:choice>
+                        </xs:restriction>
+                    </xs:complexContent>
+                </xs:complexType>
+                <xs:complexType name="type1"><xs:group ref="largeGroup"/></xs:complexType>
+                <xs:complexType name="type2">
+                    <xs:sequence><xs:group ref="largeGroup"/><xs:element name="e299"/></xs:sequence>
+                </xs:complexType>
+            </xs:schema>"""
+        schema = self.schema_class(source.format(elements, restricted), validation='lax')
+        derived_type = schema.types['derivedType']
+        base_group = schema.types['baseType'].content_type
+        self.assertIn((derived_type.content_type, base_group, True), schema.maps.restrictions)
+
+        schema.types['type1'].content_type.check_model()
+        self.assertEqual(schema.types['type1'].errors, [])
+        self.assertEqual(len(schema.types['type2'].errors), 1)
+        self.assertIsInstance(schema.types['type2'].errors[0], XMLSchemaModelError)
+        self.assertIn("Unique Particle Attribution violation", str(schema.types['type2'].errors[0]))
+
+        # A restriction that adds an element not allowed by the base type
+        with self.assertRaises(XMLSchemaParseError):
+            self.schema_class(source.format(elements, restricted + '<xs:element name="extra"/>'))
+
     #
     # Tests on issues
     def test_issue_086(self):
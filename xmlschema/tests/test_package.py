@@ -186,6 +186,27 @@ class TestMemoryUsage(unittest.TestCase):
         self.assertLess(validate_mem, 2)
         self.assertLessEqual(lazy_validate_mem, validate_mem / 2)
 
+    def test_schema_compaction_memory_usage(self):
+        test_dir = os.path.dirname(__file__) or '.'
+        xhtml_schema_file = os.path.join(
+            os.path.dirname(os.path.abspath(test_dir)), 'validators/schemas/xhtml1-strict.xsd'
+        )
+
+        cmd = [os.path.join(test_dir, 'check_memory.py'), '1', xhtml_schema_file]
+        output = subprocess.check_output(cmd, universal_newlines=True)
+        build_mem = self.check_memory_profile(output)
+
+        cmd = [os.path.join(test_dir, 'check_memory.py'), '9', xhtml_schema_file]
+        output = subprocess.check_output(cmd, universal_newlines=True)
+        compacted_mem = self.check_memory_profile(output)
+
+        cmd = [os.path.join(test_dir, 'check_memory.py'), '10', xhtml_schema_file]
+        output = subprocess.check_output(cmd, universal_newlines=True)
+        discarded_mem = self.check_memory_profile(output)
+
+        self.assertLessEqual(compacted_mem, build_mem)
+        self.assertLess(discarded_mem, compacted_mem)
+
 
 @unittest.skipIf(platform.system() == 'Windows', "Skip packaging test on Windows platform.")
 class TestPackaging(unittest.TestCase):
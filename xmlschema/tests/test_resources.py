@@ -15,18 +15,32 @@ This module runs tests concerning resources.
 import unittest
 import os
 import platform
+import hashlib
+import shutil
+import tempfile
+import threading
+import zipfile
 
 try:
     from pathlib import PureWindowsPath, PurePath
 except ImportError:
     from pathlib2 import PureWindowsPath, PurePath
 
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
 from xmlschema import (
     fetch_namespaces, fetch_resource, normalize_url, fetch_schema, fetch_schema_locations,
-    load_xml_resource, XMLResource, XMLSchemaURLError
+    load_xml_resource, XMLResource, XMLSchemaURLError, CachingUrlOpener, set_url_opener,
+    XMLCatalog, set_catalog, ZipBundle
 )
 from xmlschema.tests import XMLSchemaTestCase, SKIP_REMOTE_TESTS
-from xmlschema.compat import urlopen, urlsplit, uses_relative, StringIO
+from xmlschema.compat import urlopen, urlsplit, uses_relative, StringIO, URLError
+from xmlschema.exceptions import XMLSchemaValueError
 from xmlschema.etree import ElementTree, PyElementTree, lxml_etree, is_etree_element, etree_element, py_etree_element
 
 
@@ -39,6 +53,50 @@ def add_leading_slash(path):
     return '/' + path if path and path[0] not in ('/', '\\') else path
 
 
+class LocalHTTPServer(ThreadingMixIn, HTTPServer):
+    """A local HTTP server for the files of a directory, that records the requests."""
+    daemon_threads = True
+
+    def __init__(self, directory, max_age=0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), LocalRequestHandler)
+        self.directory = directory
+        self.max_age = max_age
+        self.requests = []  # Couples of client port and response status
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:%d/' % self.server_address[1]
+
+
+class LocalRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        try:
+            with open(os.path.join(self.server.directory, self.path.lstrip('/')), 'rb') as fp:
+                data = fp.read()
+        except (IOError, OSError):
+            self.server.requests.append((self.client_address[1], 404))
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        status = 304 if self.headers.get('If-None-Match') == etag else 200
+        self.server.requests.append((self.client_address[1], status))
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'max-age=%d' % self.server.max_age)
+        self.send_header('Content-Length', str(len(data) if status == 200 else 0))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
 class TestResources(XMLSchemaTestCase):
 
     def check_url(self, url, expected):
@@ -377,6 +435,141 @@ class TestResources(XMLSchemaTestCase):
                                       "xmlschema/tests/test_cases/examples/vehicles/vehicles.xsd")
         self.assertTrue(isinstance(vh_schema, self.schema_class))
 
+    def test_caching_url_opener(self):
+        server = LocalHTTPServer(self.vh_dir)
+        threading.Thread(target=server.serve_forever).start()
+        cache_dir = tempfile.mkdtemp()
+        opener = CachingUrlOpener(cache_dir)
+        previous = set_url_opener(opener)
+        try:
+            url = server.base_url + 'vehicles.xsd'
+            self.assertIsInstance(self.schema_class(url), self.schema_class)
+            statuses = [status for _, status in server.requests]
+            self.assertEqual(statuses.count(200), 4)  # vehicles.xsd, cars.xsd, bikes.xsd and types.xsd
+            self.assertEqual(statuses.count(304), len(statuses) - 4)  # repeated accesses
+            self.assertEqual(len(set(port for port, _ in server.requests)), 1)  # a kept-alive connection
+
+            # Stale entries are validated with conditional requests
+            del server.requests[:]
+            server.max_age = 3600
+            self.assertIsInstance(self.schema_class(url), self.schema_class)
+            self.assertEqual([status for _, status in server.requests], [304] * 4)
+
+            # Fresh entries are served without requests
+            del server.requests[:]
+            resource = XMLResource(url)
+            self.assertEqual(resource.root.tag, '{http://www.w3.org/2001/XMLSchema}schema')
+            self.assertEqual(server.requests, [])
+
+            self.assertRaises(URLError, opener, server.base_url + 'unknown.xsd')
+            self.assertRaises(XMLSchemaURLError, fetch_resource, server.base_url + 'unknown.xsd')
+        finally:
+            set_url_opener(previous)
+            opener.close()
+            server.shutdown()
+            server.server_close()
+
+        # An offline opener serves only the cached entries
+        try:
+            with CachingUrlOpener(cache_dir, offline=True) as opener:
+                previous = set_url_opener(opener)
+                try:
+                    self.assertIsInstance(self.schema_class(url), self.schema_class)
+                    self.assertRaises(URLError, opener, server.base_url + 'unknown.xsd')
+                finally:
+                    set_url_opener(previous)
+
+                opener.clear()
+                self.assertRaises(URLError, opener, url)
+        finally:
+            shutil.rmtree(cache_dir)
+
+        self.assertRaises(ValueError, CachingUrlOpener, offline=True)
+
+    def test_xml_catalog(self):
+        catalog_dir = tempfile.mkdtemp()
+        with open(os.path.join(catalog_dir, 'catalog.xml'), 'w') as fp:
+            fp.write("""<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                <group xml:base="%s/">
+                    <system systemId="http://example.com/schemas/vehicles.xsd" uri="vehicles.xsd"/>
+                    <rewriteSystem systemIdStartString="http://example.com/remote/" rewritePrefix="."/>
+                    <!-- The namespace of the vehicles schema -->
+                    <uri name="http://example.com/vehicles" uri="vehicles.xsd"/>
+                </group>
+                <nextCatalog catalog="next-catalog.xml"/>
+            </catalog>""" % self.vh_dir)
+        with open(os.path.join(catalog_dir, 'next-catalog.xml'), 'w') as fp:
+            fp.write("""<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                <systemSuffix systemIdSuffix="/collection.xsd" uri="%s"/>
+                <uri name="http://example.com/vehicles" uri="unused.xsd"/>
+            </catalog>""" % self.col_xsd_file)
+
+        def offline_opener(url, timeout=30):
+            if urlsplit(url).scheme not in ('', 'file'):
+                raise URLError("network access to %r" % url)
+            return urlopen(url, timeout=timeout)
+
+        try:
+            catalog = XMLCatalog(os.path.join(catalog_dir, 'catalog.xml'))
+            self.assertEqual(len(catalog.catalogs), 2)
+            self.check_url(catalog.resolve('http://example.com/schemas/vehicles.xsd'), self.vh_xsd_file)
+            self.check_url(catalog.resolve('http://example.com/remote/cars.xsd'),
+                           os.path.join(self.vh_dir, 'cars.xsd'))
+            self.check_url(catalog.resolve_uri('http://example.com/vehicles'), self.vh_xsd_file)
+            self.check_url(catalog.resolve('http://example.org/a/collection.xsd'), self.col_xsd_file)
+            self.assertEqual(catalog.resolve('http://example.com/other.xsd'), 'http://example.com/other.xsd')
+            self.assertIsNone(catalog.resolve_public('-//W3C//DTD XMLSCHEMA 200102//EN'))
+
+            previous_opener = set_url_opener(offline_opener)
+            previous_catalog = set_catalog(catalog)
+            try:
+                schema = self.schema_class('http://example.com/schemas/vehicles.xsd')
+                self.check_url(schema.url, self.vh_xsd_file)
+                self.assertTrue(schema.is_valid(self.vh_xml_file))
+                schema = self.schema_class("""
+                    <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                        <xs:import namespace="http://example.com/vehicles"
+                                   schemaLocation="http://unreachable.example.org/vehicles.xsd"/>
+                    </xs:schema>""")
+                self.check_url(schema.imports['http://example.com/vehicles'].url, self.vh_xsd_file)
+                self.check_url(fetch_resource('http://example.com/remote/bikes.xsd'),
+                               os.path.join(self.vh_dir, 'bikes.xsd'))
+            finally:
+                set_url_opener(previous_opener)
+                set_catalog(previous_catalog)
+
+            self.assertRaises(XMLSchemaValueError, XMLCatalog, self.vh_xsd_file)
+        finally:
+            shutil.rmtree(catalog_dir)
+
+    def test_zip_bundles(self):
+        bundle_dir = tempfile.mkdtemp()
+        archive_path = os.path.join(bundle_dir, 'schemas-1.0.zip')
+        with zipfile.ZipFile(archive_path, 'w') as zip_file:
+            for filename in os.listdir(self.vh_dir):
+                zip_file.write(os.path.join(self.vh_dir, filename), 'vehicles/' + filename)
+
+        try:
+            schema = self.schema_class(os.path.join(archive_path, 'vehicles/vehicles.xsd'))
+            self.assertEqual(len(schema.maps.namespaces[schema.target_namespace]), 4)
+            self.assertTrue(all(s.url.startswith(normalize_url(archive_path) + '/vehicles/')
+                                for s in schema.maps.iter_schemas() if s.meta_schema is not None))
+            xml_file = os.path.join(archive_path, 'vehicles/vehicles.xml')
+            self.assertTrue(schema.is_valid(xml_file))
+            self.assertTrue(schema.is_valid(XMLResource(xml_file, lazy=True)))
+            self.assertRaises(XMLSchemaURLError, fetch_resource, os.path.join(archive_path, 'unknown.xsd'))
+
+            # The archive is opened once and shared by the resources
+            with ZipBundle(archive_path) as bundle:
+                self.assertIn('vehicles/cars.xsd', bundle)
+                self.assertEqual(len(bundle.namelist()), len(os.listdir(self.vh_dir)))
+                resource = XMLResource(bundle.get_url('vehicles/bikes.xsd'))
+                self.assertEqual(resource.root.attrib['targetNamespace'], 'http://example.com/vehicles')
+                self.assertEqual(resource.open().read(), bundle.open('vehicles/bikes.xsd').read())
+            self.assertRaises(ValueError, ZipBundle, self.vh_xsd_file)
+        finally:
+            shutil.rmtree(bundle_dir)
+
     def test_schema_defuse(self):
         vh_schema = self.schema_class(self.vh_xsd_file, defuse='always')
         self.assertIsInstance(vh_schema.root, etree_element)
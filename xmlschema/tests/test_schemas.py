@@ -19,15 +19,18 @@ import os
 import pickle
 import time
 import warnings
+from multiprocessing.pool import ThreadPool
 
 import xmlschema
 from xmlschema import XMLSchemaBase, XMLSchemaParseError, XMLSchemaModelError, \
     XMLSchemaIncludeWarning, XMLSchemaImportWarning
-from xmlschema.compat import PY3, unicode_type
+from xmlschema.compat import PY3, unicode_type, urlopen
+from xmlschema.exceptions import XMLSchemaValueError
 from xmlschema.etree import lxml_etree, etree_element, py_etree_element
-from xmlschema.qnames import XSD_LIST, XSD_UNION, XSD_ELEMENT, XSI_TYPE
+from xmlschema.qnames import XSD_LIST, XSD_UNION, XSD_ELEMENT, XSD_STRING, XSI_TYPE
 from xmlschema.tests import tests_factory, SchemaObserver, XMLSchemaTestCase
-from xmlschema.validators import XsdValidator, XMLSchema11
+from xmlschema.validators import XsdValidator, XsdGlobals, XMLSchema11, XMLSchemaNotBuiltError, \
+    XsdGroup, XsdElement, XsdType, XsdComplexType, XsdKeyref
 from xmlschema.xpath import ElementPathContext
 
 
@@ -475,6 +478,226 @@ class TestXMLSchema10(XMLSchemaTestCase):
         extended_header_def = schema.types['extendedHeaderDef']
         self.assertTrue(extended_header_def.is_derived(schema.types['blockDef']))
 
+    def test_components_by_class(self):
+        schema = self.schema_class(self.col_xsd_file)
+        for xsd_class in (XsdGroup, XsdElement, XsdComplexType, XsdKeyref):
+            self.assertEqual(set(schema.components_by_class(xsd_class)), set(schema.iter_components(xsd_class)))
+        components_ids = {id(c) for c in schema.components_by_class()}
+        self.assertTrue(all(id(c) in components_ids for c in schema.iter_components() if c is not schema))
+
+        groups = schema.components_by_class((XsdGroup, XsdKeyref))
+        self.assertTrue(groups and all(isinstance(c, (XsdGroup, XsdKeyref)) for c in groups))
+
+        # The index is rebuilt by a new build of the global maps
+        components = schema.components_by_class(XsdElement)
+        schema.maps.clear()
+        schema.build()
+        self.assertEqual(len(schema.components_by_class(XsdElement)), len(components))
+        self.assertFalse(set(schema.components_by_class(XsdElement)) & set(components))
+
+    def test_lazy_build(self):
+        schema = self.schema_class(self.col_xsd_file, lazy_build=True)
+        self.assertTrue(schema.maps.lazy)
+        self.assertFalse(schema.built)
+        self.assertIsInstance(schema.maps.types['{http://example.com/ns/collection}personType'], tuple)
+
+        self.assertIsNone(schema.validate(self.col_xml_file))
+        self.assertEqual(schema.to_dict(self.col_xml_file), self.col_schema.to_dict(self.col_xml_file))
+        self.assertIs(schema.get_element('{http://example.com/ns/collection}collection'),
+                      schema.elements['collection'])
+        self.assertIsNone(schema.get_element('{http://example.com/ns/collection}unknown'))
+        self.assertFalse(isinstance(schema.maps.types['{http://example.com/ns/collection}personType'], tuple))
+
+        schema = self.schema_class(self.col_xsd_file, lazy_build=True)
+        self.assertTrue(all(isinstance(x, XsdType) for x in schema.types.values()))
+        self.assertEqual(dict(schema.elements.items()), {'collection': schema.elements['collection'],
+                                                         'person': schema.elements['person']})
+
+        schema.build()
+        self.assertFalse(schema.maps.lazy)
+        self.assertTrue(schema.built)
+        self.assertEqual(len(schema.all_errors), 0)
+
+    def test_lazy_build_checks(self):
+        source = self.retrieve_schema_source("""
+            <element name="valid" type="string"/>
+            <element name="invalid">
+                <complexType>
+                    <choice>
+                        <element name="a" type="string"/>
+                        <sequence>
+                            <element name="a" type="integer"/>
+                        </sequence>
+                    </choice>
+                </complexType>
+            </element>""")
+        self.assertRaises(XMLSchemaModelError, self.schema_class, source)
+
+        schema = self.schema_class(source, lazy_build=True)
+        self.assertIsNone(schema.validate('<ns:valid xmlns:ns="ns">foo</ns:valid>'))
+        self.assertRaises(XMLSchemaModelError, schema.validate, '<ns:invalid xmlns:ns="ns"/>')
+        self.assertRaises(XMLSchemaModelError, schema.is_valid, '<ns:invalid xmlns:ns="ns"/>')
+        self.assertRaises(XMLSchemaModelError, schema.is_valid, '<ns:invalid xmlns:ns="ns"/>')
+        self.assertRaises(XMLSchemaModelError, schema.build)
+
+        schema = self.schema_class(source, lazy_build=True)
+        self.assertIsInstance(schema.elements['valid'], XsdElement)
+        self.assertRaises(XMLSchemaModelError, schema.elements.__getitem__, 'invalid')
+        self.assertRaises(KeyError, schema.elements.__getitem__, 'unknown')
+
+        schema = self.schema_class(source, validation='lax', lazy_build=True)
+        self.assertEqual(len(schema.all_errors), 0)
+        schema.build()
+        self.assertEqual(len(schema.all_errors), 1)
+
+    def test_layered_global_maps(self):
+        schema = self.schema_class(self.retrieve_schema_source('<element name="root" type="string"/>'))
+        meta_maps = self.schema_class.meta_schema.maps
+        self.assertEqual(schema.maps.bases, 1)
+        self.assertNotIn(XSD_STRING, schema.maps.types.maps[0])
+        self.assertIs(schema.maps.types[XSD_STRING], meta_maps.types[XSD_STRING])
+        self.assertIn('{ns}root', schema.maps.elements.maps[0])
+        self.assertNotIn('{ns}root', meta_maps.elements)
+
+        other = schema.copy()
+        self.assertIsNot(other.maps.types.maps[0], schema.maps.types.maps[0])
+        self.assertIs(other.maps.types.maps[1], schema.maps.types.maps[1])
+
+        # A library of schemas shared by many schemas
+        library = self.schema_class("""
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="lib">
+                <xs:simpleType name="code"><xs:restriction base="xs:string"/></xs:simpleType>
+                <xs:element name="head" type="xs:string"/>
+            </xs:schema>""")
+        source = """
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:lib="lib"
+                    targetNamespace="tns" xmlns="tns">
+                <xs:import namespace="lib"/>
+                <xs:element name="root" type="lib:code"/>
+                <xs:element name="member" type="xs:string" substitutionGroup="lib:head"/>
+            </xs:schema>"""
+        schema1 = self.schema_class(source, global_maps=library.maps.new_child())
+        schema2 = self.schema_class(source, global_maps=library.maps.new_child())
+        self.assertEqual(schema1.maps.bases, 2)
+        self.assertIs(schema1.imports['lib'], library)
+        self.assertIs(schema1.elements['root'].type, library.types['code'])
+        self.assertIs(schema2.elements['root'].type, library.types['code'])
+        self.assertIsNot(schema1.elements['root'], schema2.elements['root'])
+        self.assertEqual(len(schema1.maps.substitution_groups['{lib}head']), 1)
+        self.assertNotIn('{lib}head', library.maps.substitution_groups)
+        self.assertTrue(schema1.is_valid('<root xmlns="tns">foo</root>'))
+
+        schema1.maps.clear(remove_schemas=True)
+        self.assertEqual(schema1.maps.bases, 0)
+        self.assertIn('{lib}code', library.maps.types)
+        self.assertRaises(XMLSchemaValueError, XsdGlobals(self.schema_class).add_base,
+                          self.schema_class(source, global_maps=library.maps.new_child(), build=False).maps)
+
+    def test_compact_global_maps(self):
+        source = self.casepath('examples/vehicles/vehicles.xsd')
+        xml_file = self.casepath('examples/vehicles/vehicles.xml')
+        schema = self.schema_class(source)
+        other = self.schema_class(source)
+        other.maps.compact(discard_sources=True)
+
+        self.assertEqual(len(other.root), 0)
+        self.assertTrue(all(len(c.elem) == 0 for c in other.iter_components() if c is not other))
+        self.assertGreater(len(self.schema_class.meta_schema.root), 0)
+        self.assertEqual(other.to_dict(xml_file), schema.to_dict(xml_file))
+        self.assertTrue(other.is_valid(xml_file))
+
+        schema = self.schema_class(source, lazy_build=True)
+        self.assertRaises(XMLSchemaNotBuiltError, schema.maps.compact)
+        schema.build()
+        self.assertIsNone(schema.maps.compact())
+
+    def test_frozen_schema(self):
+        source = self.casepath('examples/vehicles/vehicles.xsd')
+        xml_files = [self.casepath(path) for path in (
+            'examples/vehicles/vehicles.xml', 'examples/vehicles/vehicles-1_error.xml',
+            'examples/vehicles/vehicles-2_errors.xml', 'examples/vehicles/vehicles-3_errors.xml'
+        )]
+        schema = self.schema_class(source, lazy_build=True)
+        self.assertFalse(schema.frozen)
+        schema.freeze()
+        self.assertTrue(schema.frozen)
+        self.assertTrue(schema.maps.frozen)
+        self.assertFalse(schema.maps.lazy)
+        self.assertTrue(schema.built)
+        self.assertIsNone(schema.freeze())
+
+        self.assertRaises(XMLSchemaValueError, schema.build)
+        self.assertRaises(XMLSchemaValueError, schema.maps.clear)
+        self.assertRaises(XMLSchemaValueError, schema.import_schema,
+                          'http://example.com/ns/collection', self.casepath('examples/collection/collection.xsd'))
+        self.assertFalse(schema.maps.copy().frozen)
+        self.assertFalse(self.schema_class.meta_schema.maps.frozen)
+
+        expected = [len(list(schema.iter_errors(filename))) for filename in xml_files]
+        pool = ThreadPool(4)
+        try:
+            results = pool.map(lambda x: len(list(schema.iter_errors(x))), xml_files * 8)
+        finally:
+            pool.close()
+        self.assertEqual(results, expected * 8)
+        self.assertEqual(expected, [0, 1, 2, 3])
+
+        # Namespaces of wildcards are loaded by freeze() from location hints
+        schema = self.check_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <any namespace="http://example.com/ns/collection" processContents="lax"/>
+                    </sequence>
+                </complexType>
+            </element>""")
+        schema.locations['http://example.com/ns/collection'] = self.casepath('examples/collection/collection.xsd')
+        self.assertNotIn('http://example.com/ns/collection', schema.maps.namespaces)
+        schema.freeze()
+        self.assertIn('http://example.com/ns/collection', schema.maps.namespaces)
+
+    def test_concurrent_loading(self):
+        for path in ('examples/vehicles/vehicles.xsd', 'features/namespaces/include-case6.xsd',
+                     'features/namespaces/import-case1.xsd', 'issues/issue_111/issue_111.xsd'):
+            source = self.casepath(path)
+            schema = self.schema_class(source, validation='lax')
+            other = self.schema_class(source, validation='lax', max_workers=4)
+
+            self.assertEqual([s.url for s in schema.maps.iter_schemas()],
+                             [s.url for s in other.maps.iter_schemas()])
+            for global_map, other_map in zip(schema.maps.global_maps, other.maps.global_maps):
+                self.assertEqual(list(global_map), list(other_map))
+            self.assertEqual(len(schema.all_errors), len(other.all_errors))
+            self.assertEqual(sorted(schema.includes), sorted(other.includes))
+            self.assertEqual(sorted(schema.imports), sorted(other.imports))
+            self.assertEqual(other.maps.prefetched_resources, {})
+
+        # Each prefetched document is fetched once
+        opened_urls = []
+
+        def counting_opener(url, timeout=30):
+            opened_urls.append(url)
+            return urlopen(url, timeout=timeout)
+
+        previous = xmlschema.set_url_opener(counting_opener)
+        try:
+            self.schema_class(self.casepath('examples/vehicles/vehicles.xsd'), max_workers=4)
+        finally:
+            xmlschema.set_url_opener(previous)
+        included_urls = [url for url in opened_urls if not url.endswith('vehicles.xsd')]
+        self.assertEqual(len(included_urls), 3)
+        self.assertEqual(len(set(included_urls)), 3)
+
+        with warnings.catch_warnings(record=True) as context:
+            warnings.simplefilter("always")
+            self.check_schema("""
+                <include schemaLocation="example.xsd" />
+                <import namespace="http://missing.example.test/" schemaLocation="missing.xsd"/>
+                """, max_workers=2)
+            self.assertEqual(len(context), 2, "Wrong number of include/import warnings")
+            self.assertEqual(context[0].category, XMLSchemaIncludeWarning)
+            self.assertEqual(context[1].category, XMLSchemaImportWarning)
+
 
 class TestXMLSchema11(TestXMLSchema10):
 
@@ -562,6 +785,54 @@ class TestXMLSchema11(TestXMLSchema10):
         self.assertFalse(xsd_type.is_valid(etree_element('a', attrib={'min': '25', 'max': '19'})))
         self.assertTrue(xsd_type.is_valid(etree_element('a', attrib={'min': '25', 'max': '100'})))
 
+    def test_complex_type_assertion_evaluation(self):
+        schema = self.check_schema("""
+            <element name="range">
+              <complexType>
+                <sequence>
+                  <element name="item" type="string" minOccurs="0" maxOccurs="unbounded"/>
+                </sequence>
+                <attribute name="min" type="int"/>
+                <attribute name="max" type="int"/>
+                <attribute name="label" type="string"/>
+                <attribute name="size" type="int"/>
+                <assert test="@min le @max"/>
+                <assert test="count(ns:item) le 3"/>
+                <assert test="@label != 'none'"/>
+                <assert test="@size = count(ns:item)"/>
+                <assert test="not(@min) or @min ge 0"/>
+              </complexType>
+            </element>""")
+
+        xsd_type = schema.elements['range'].type
+        self.assertIsNotNone(xsd_type.assertions[0].operands)
+        self.assertIsNotNone(xsd_type.assertions[1].operands)
+        self.assertIsNotNone(xsd_type.assertions[3].operands)
+        self.assertIsNone(xsd_type.assertions[4].operands)
+
+        # The assertions are checked by the element validation
+        self.assertTrue(schema.is_valid('<ns:range xmlns:ns="ns" min="1" max="10" label="a" size="0"/>'))
+        self.assertFalse(schema.is_valid('<ns:range xmlns:ns="ns" min="25" max="19" label="a" size="0"/>'))
+        self.assertFalse(schema.is_valid('<ns:range xmlns:ns="ns" min="-1" max="19" label="a" size="0"/>'))
+        self.assertFalse(schema.is_valid('<ns:range xmlns:ns="ns" min="1" max="10" label="none" size="0"/>'))
+        self.assertFalse(schema.is_valid('<ns:range xmlns:ns="ns" max="10" label="a" size="0"/>'))
+
+        # Counts of child elements
+        self.assertTrue(schema.is_valid(
+            '<ns:range xmlns:ns="ns" min="1" max="10" label="a" size="2"><ns:item/><ns:item/></ns:range>'
+        ))
+        self.assertFalse(schema.is_valid(
+            '<ns:range xmlns:ns="ns" min="1" max="10" label="a" size="1"><ns:item/><ns:item/></ns:range>'
+        ))
+        self.assertFalse(schema.is_valid(
+            '<ns:range xmlns:ns="ns" min="1" max="10" label="a" size="4">'
+            '<ns:item/><ns:item/><ns:item/><ns:item/></ns:range>'
+        ))
+
+        # Fallback to XPath evaluation for attributes with invalid values
+        errors = list(schema.iter_errors('<ns:range xmlns:ns="ns" min="a" max="10" label="a" size="0"/>'))
+        self.assertTrue(any('@min le @max' in str(e) for e in errors))
+
     def test_open_content(self):
         self.check_schema("""
         <element name="Book">
@@ -14,9 +14,15 @@ This module runs tests concerning the validation/decoding/encoding of XML files.
 """
 import unittest
 import pdb
+import gc
+import weakref
 import os
+import io
 import sys
 import pickle
+import types
+import shutil
+import tempfile
 from decimal import Decimal
 import base64
 import warnings
@@ -25,16 +31,17 @@ from elementpath import datatypes
 import xmlschema
 from xmlschema import (
     XMLSchemaEncodeError, XMLSchemaValidationError, ParkerConverter,
-    BadgerFishConverter, AbderaConverter, JsonMLConverter
+    BadgerFishConverter, AbderaConverter, JsonMLConverter, ComponentProfiler, generate_decoder
 )
 from xmlschema.converters import UnorderedConverter
 from xmlschema.compat import unicode_type, ordered_dict_class
 from xmlschema.etree import etree_element, etree_tostring, is_etree_element, ElementTree, \
     etree_elements_assert_equal, lxml_etree, lxml_etree_element
-from xmlschema.exceptions import XMLSchemaValueError
+from xmlschema.exceptions import XMLSchemaValueError, XMLSchemaTypeError
 from xmlschema.validators.exceptions import XMLSchemaChildrenValidationError
 from xmlschema.helpers import local_name
-from xmlschema.qnames import XSI_TYPE
+from xmlschema.namespaces import XSI_NAMESPACE
+from xmlschema.qnames import XSI_TYPE, XSI_SCHEMA_LOCATION
 from xmlschema.resources import fetch_namespaces
 from xmlschema.tests import XMLSchemaTestCase, tests_factory
 from xmlschema.validators import XMLSchema11
@@ -612,6 +619,197 @@ class TestValidation(XMLSchemaTestCase):
         vh_2_xt = ElementTree.parse(vh_2_file)
         self.assertRaises(XMLSchemaValidationError, xmlschema.validate, vh_2_xt, self.vh_xsd_file)
 
+    @unittest.skipIf(not hasattr(ElementTree, 'XMLPullParser'), "XMLPullParser not available.")
+    def test_incremental_validator(self):
+        with open(self.vh_xml_file, 'rb') as fp:
+            data = fp.read()
+
+        validator = self.vh_schema.incremental_validator()
+        errors = []
+        for k in range(0, len(data), 50):
+            errors.extend(validator.feed(data[k:k + 50]))
+        errors.extend(validator.close())
+        self.assertListEqual(errors, [])
+        self.assertEqual(len(validator.root), 2)
+        self.assertTrue(all(len(child) == 0 for child in validator.root))  # children are cleared
+        self.assertRaises(XMLSchemaValueError, validator.feed, data)
+
+        with open(self.casepath('examples/vehicles/vehicles-2_errors.xml'), 'rb') as fp:
+            data = fp.read()
+        validator = self.vh_schema.incremental_validator()
+        errors = validator.feed(data[:len(data) // 2])
+        errors.extend(validator.feed(data[len(data) // 2:]))
+        errors.extend(validator.close())
+        self.assertEqual(len(errors), len(list(self.vh_schema.iter_errors(data.decode('utf-8')))))
+
+        validator = self.vh_schema.incremental_validator(validation='strict')
+        with self.assertRaises(XMLSchemaValidationError):
+            validator.feed(data)
+            validator.close()
+
+        validator = self.col_schema.incremental_validator(decode=True)
+        with open(self.col_xml_file, 'rb') as fp:
+            records = validator.feed(fp.read())
+        records.extend(validator.close())
+        self.assertListEqual(records, self.col_schema.to_dict(self.col_xml_file)['object'])
+
+        validator = self.vh_schema.incremental_validator()
+        self.assertListEqual(validator.feed('<vh:vehicles xmlns:vh="http://example.com/vehicles"><vh:bikes/>'), [])
+        validator.feed('</vh:vehicles>')
+        errors = validator.close()  # the missing cars element is detected checking the root
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], XMLSchemaChildrenValidationError)
+
+    @unittest.skipIf(sys.version_info < (3, 6), "asynchronous generators are available from Python 3.6")
+    def test_asynchronous_api(self):
+        import asyncio
+
+        class AsyncChunks(object):
+            def __init__(self, data, size):
+                self.chunks = [data[k:k + size] for k in range(0, len(data), size)]
+
+            def __aiter__(self):
+                return self
+
+            def __anext__(self):
+                future = loop.create_future()
+                if self.chunks:
+                    future.set_result(self.chunks.pop(0))
+                else:
+                    future.set_exception(StopAsyncIteration())
+                return future
+
+        def collect(async_iterator):
+            results = []
+            while True:
+                try:
+                    results.append(loop.run_until_complete(async_iterator.__anext__()))
+                except StopAsyncIteration:
+                    return results
+
+        loop = asyncio.new_event_loop()
+        try:
+            with open(self.casepath('examples/vehicles/vehicles-2_errors.xml'), 'rb') as fp:
+                data = fp.read()
+            errors = collect(self.vh_schema.aiter_errors(AsyncChunks(data, 40), slice_size=16))
+            self.assertEqual(len(errors), len(list(self.vh_schema.iter_errors(data.decode('utf-8')))))
+
+            with open(self.col_xml_file, 'rb') as fp:
+                data = fp.read()
+            records = collect(self.col_schema.aiter_decode(AsyncChunks(data, 100), offload_threshold=5))
+            self.assertListEqual(records, self.col_schema.to_dict(self.col_xml_file)['object'])
+
+            self.assertRaises(XMLSchemaTypeError, collect, self.col_schema.aiter_errors([data]))
+        finally:
+            loop.close()
+
+    def test_id_idref_validation(self):
+        schema = self.schema_class("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:element name="item" maxOccurs="unbounded">
+                      <xs:complexType>
+                        <xs:attribute name="id" type="xs:ID"/>
+                        <xs:attribute name="ref" type="xs:IDREF"/>
+                        <xs:attribute name="refs" type="xs:IDREFS"/>
+                      </xs:complexType>
+                    </xs:element>
+                  </xs:sequence>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+
+        xml_data = '<root><item ref="b" refs="a b"/><item id="a"/><item id="b" ref="a"/></root>'
+        id_index = xmlschema.IdIndex()
+        self.assertTrue(schema.is_valid(xml_data, id_index=id_index))
+        self.assertEqual(len(id_index), 2)
+        self.assertEqual(id_index.get_element('b').attrib, {'id': 'b', 'ref': 'a'})
+        self.assertRaises(KeyError, id_index.get_element, 'c')
+        self.assertTrue(schema.is_valid(xmlschema.XMLResource(xml_data, lazy=True)))
+
+        xml_data = '<root><item id="a" refs="a c"/><item id="b" ref="d"/></root>'
+        errors = list(schema.iter_errors(xml_data))
+        self.assertEqual(len(errors), 2)
+        self.assertIn("IDREF value 'c'", errors[0].reason)
+        self.assertEqual(errors[0].elem.attrib['refs'], 'a c')
+        self.assertEqual(len(schema.to_dict(xml_data, validation='lax')[1]), 2)
+        self.assertTrue(schema.is_valid(xml_data, path='item[1]'))  # not a whole document
+        self.assertEqual(len(list(schema.iter_errors(xmlschema.XMLResource(xml_data, lazy=True)))), 2)
+
+        if hasattr(ElementTree, 'XMLPullParser'):
+            validator = schema.incremental_validator()
+            errors = validator.feed(xml_data)
+            errors.extend(validator.close())
+            self.assertEqual(len(errors), 2)
+
+        # A spilled index
+        xml_data = '<root>%s%s</root>' % (
+            ''.join('<item ref="i%d"/>' % k for k in range(5, 50)),
+            ''.join('<item id="i%d"/>' % k for k in range(45))
+        )
+        with xmlschema.IdIndex(keep_elements=False, spill_threshold=10) as id_index:
+            errors = list(schema.iter_errors(xml_data, id_index=id_index))
+            self.assertTrue(id_index.spilled)
+            self.assertEqual(len(id_index), 45)
+            self.assertIn('i0', id_index)
+            self.assertIsNone(id_index.get_element('i0'))
+            self.assertEqual(sorted(e.reason[12:16] for e in errors), ["'i45", "'i46", "'i47", "'i48", "'i49"])
+        self.assertFalse(id_index.spilled)
+
+    def test_identity_key_tables(self):
+        from xmlschema.validators import identities
+
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <element name="item" maxOccurs="unbounded">
+                            <complexType>
+                                <attribute name="id" type="int"/>
+                                <attribute name="ref" type="decimal"/>
+                            </complexType>
+                        </element>
+                    </sequence>
+                </complexType>
+                <key name="itemKey">
+                    <selector xpath="item"/>
+                    <field xpath="@id"/>
+                </key>
+                <keyref name="itemRef" refer="ns:itemKey">
+                    <selector xpath="item"/>
+                    <field xpath="@ref"/>
+                </keyref>
+            </element>""")
+        items = ''.join('<item id="%d" ref="%d.0"/>' % (k, (k * 7) % 60) for k in range(50))
+        xml_data = '<ns:root xmlns:ns="ns">%s<item id="3"/><item id="4"/></ns:root>' % items
+        errors = [e.reason for e in schema.iter_errors(xml_data)]
+        self.assertEqual(len(errors), 9)
+
+        threshold = identities.KEY_TABLE_THRESHOLD
+        batch_size = identities.KEY_TABLE_BATCH_SIZE
+        try:
+            identities.KEY_TABLE_THRESHOLD = 10
+            identities.KEY_TABLE_BATCH_SIZE = 4
+            self.assertEqual(sorted(e.reason for e in schema.iter_errors(xml_data)), sorted(errors))
+        finally:
+            identities.KEY_TABLE_THRESHOLD = threshold
+            identities.KEY_TABLE_BATCH_SIZE = batch_size
+
+        table = identities.KeyTable(threshold=2)
+        for key in [(1, 'a'), (Decimal('1.50'), None), ([1, 2],)]:
+            table.add(key)
+        self.assertTrue(table.spilled)
+        table.add((1.5, None))
+        self.assertIn((Decimal('1.0'), 'a'), table)
+        self.assertNotIn((1, 'b'), table)
+        self.assertIn(([Decimal(1), 2.0],), table)
+        self.assertEqual(len(list(table.iter_duplicates())), 1)
+        self.assertListEqual(list(table.iter_missing([(2, 'a'), (1, 'a')])), [(2, 'a')])
+        table.close()
+        self.assertFalse(table.spilled)
+
     def _test_document_validate_api_lazy(self):
         source = xmlschema.XMLResource(self.col_xml_file, lazy=True)
         source.root[0].clear()
@@ -628,6 +826,105 @@ class TestValidation(XMLSchemaTestCase):
 class TestValidation11(TestValidation):
     schema_class = XMLSchema11
 
+    def test_validation_session(self):
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <element name="item" maxOccurs="unbounded">
+                            <complexType>
+                                <sequence>
+                                    <element name="value" type="int"/>
+                                </sequence>
+                                <attribute name="id" type="ID"/>
+                                <attribute name="ref" type="IDREF"/>
+                                <attribute name="code" type="string"/>
+                            </complexType>
+                        </element>
+                    </sequence>
+                </complexType>
+                <unique name="itemCode">
+                    <selector xpath="item"/>
+                    <field xpath="@code"/>
+                </unique>
+            </element>""")
+        items = ''.join('<item id="i%d" code="c%d"><value>%d</value></item>' % (k, k, k) for k in range(20))
+        root = ElementTree.XML('<ns:root xmlns:ns="ns">%s</ns:root>' % items)
+        session = schema.validation_session(root)
+        self.assertTrue(session.is_valid())
+
+        # Only the changed element and its ancestors are validated again
+        value = root[5][0]
+        value.text = 'five'
+        session.mark_changed(value)
+        errors = list(session.iter_errors())
+        self.assertEqual(len(errors), 1)
+        self.assertIs(errors[0].elem, value)
+        value.text = '5'
+        session.mark_changed(value)
+        visited = []
+        enter_child = session.enter_child
+        session.enter_child = lambda *args: enter_child(*args) and not visited.append(args[0])
+        session.validate()
+        self.assertEqual(len(visited), 3)  # the root, the item and its value
+
+        root[3].set('ref', 'x')
+        session.mark_changed(root[3])
+        self.assertIn("IDREF value 'x'", next(session.iter_errors()).reason)
+        root[4].set('id', 'x')
+        session.mark_changed(root[4])
+        self.assertTrue(session.is_valid())
+
+        # Insertions and removals are notified marking the parent
+        root.remove(root[4])
+        session.mark_changed(root)
+        self.assertEqual(len(list(session.iter_errors())), 1)
+        item = ElementTree.SubElement(root, 'item', id='x', code='c1')
+        ElementTree.SubElement(item, 'value').text = '1'
+        session.mark_changed(root)
+        self.assertEqual([e.reason for e in session.iter_errors()], ["duplicated value ('c1',)."])
+        item.set('code', 'c20')
+        session.mark_changed(item)
+        self.assertTrue(session.is_valid())
+        root.append(ElementTree.Element('unknown'))
+        session.mark_changed(root)
+        self.assertRaises(XMLSchemaValidationError, session.validate)
+        self.assertEqual(session.is_valid(), schema.is_valid(root))
+
+        self.assertRaises(XMLSchemaValueError, session.mark_changed, ElementTree.Element('item'))
+        self.assertRaises(XMLSchemaTypeError, schema.validation_session, '<ns:root xmlns:ns="ns"/>')
+
+        # A duplicated ID is taken by another claimant when the element that owns it is changed or removed
+        root = ElementTree.XML('<ns:root xmlns:ns="ns"><item id="a"><value>1</value></item>'
+                               '<item id="b"><value>2</value></item></ns:root>')
+        session = schema.validation_session(root)
+        self.assertTrue(session.is_valid())
+        root[1].set('id', 'a')
+        session.mark_changed(root[1])
+        self.assertIn("Duplicated xsd:ID value 'a'", next(session.iter_errors()).reason)
+        root[0].set('id', 'c')
+        session.mark_changed(root[0])
+        self.assertTrue(schema.is_valid(root))
+        self.assertTrue(session.is_valid())
+
+        root[0].set('id', 'a')
+        session.mark_changed(root[0])
+        self.assertFalse(session.is_valid())
+        self.assertIs(next(session.iter_errors()).elem, root[0])
+        root.remove(root[1])
+        session.mark_changed(root)
+        self.assertTrue(schema.is_valid(root))
+        self.assertTrue(session.is_valid())
+
+        item = ElementTree.SubElement(root, 'item', id='a')
+        ElementTree.SubElement(item, 'value').text = '3'
+        session.mark_changed(root)
+        self.assertIs(next(session.iter_errors()).elem, item)
+        root.remove(root[0])
+        session.mark_changed(root)
+        self.assertTrue(schema.is_valid(root))
+        self.assertTrue(session.is_valid())
+
     def test_default_attributes(self):
         """<?xml version="1.0" encoding="UTF-8"?>
                 <ns:node xmlns:ns="ns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
@@ -809,6 +1106,263 @@ class TestDecoding(XMLSchemaTestCase):
         json_ml_dict = self.col_schema.to_dict(self.col_xml_file, converter=xmlschema.JsonMLConverter)
         self.assertEqual(json_ml_dict, _COLLECTION_JSON_ML)
 
+    def test_data_class_converter(self):
+        data = self.col_schema.to_dict(self.col_xml_file, converter=xmlschema.DataClassConverter)
+        self.assertIsInstance(data, xmlschema.DataElement)
+        self.assertEqual(type(data).__name__, 'Collection')
+        self.assertEqual(type(data).fields(), ('object',))
+        self.assertFalse(hasattr(data, '__dict__'))
+        self.assertEqual(len(data.object), 2)
+
+        obj = data.object[0]
+        self.assertIs(type(obj), type(data.object[1]))
+        self.assertIs(type(obj).xsd_type, self.col_schema.types['objType'])
+        self.assertEqual((obj.id, obj.available, obj.position), ('b0836217462', True, 1))
+        self.assertEqual(obj.author.name, 'Pierre-Auguste Renoir')
+        self.assertEqual(obj.estimation, Decimal('10000.00'))
+        self.assertIsNone(obj.characters)
+        self.assertIn(('estimation', Decimal('10000.00')), list(obj.items()))
+        self.assertNotIn('characters', dict(obj.items()))
+        self.assertIn('title', dict(data.object[1].items()))  # an empty element
+        self.assertIsNone(data.object[1].title)
+        self.assertRaises(AttributeError, getattr, obj, 'unknown')
+        self.assertRaises(XMLSchemaValueError, type(obj), unknown=1)
+
+        elem = self.col_schema.encode(data, converter=xmlschema.DataClassConverter)
+        self.assertTrue(self.col_schema.is_valid(elem))
+        self.assertEqual(self.col_schema.to_dict(elem, converter=xmlschema.DataClassConverter), data)
+
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence maxOccurs="2">
+                        <element name="class" type="ns:priceType"/>
+                        <element name="values" minOccurs="0">
+                            <simpleType><list itemType="int"/></simpleType>
+                        </element>
+                    </sequence>
+                    <attribute name="items" type="string"/>
+                </complexType>
+            </element>
+            <complexType name="priceType">
+                <simpleContent>
+                    <extension base="decimal">
+                        <attribute name="text" type="string"/>
+                    </extension>
+                </simpleContent>
+            </complexType>""")
+        xml_data = '<ns:root xmlns:ns="ns" xmlns:xsi="%s" items="a" xsi:schemaLocation="ns root.xsd">' \
+                   '<class text="t">1.5</class><values>1 2</values><class>2.0</class></ns:root>' % XSI_NAMESPACE
+        data = schema.to_dict(xml_data, converter=xmlschema.DataClassConverter)
+        self.assertEqual(type(data).fields(), ('items_', 'class_', 'values'))
+        self.assertEqual(type(data.class_[0]).fields(), ('text', 'text_'))
+        self.assertEqual(data.items_, 'a')
+        self.assertEqual(data.values, [[1, 2]])
+        self.assertEqual([(x.text, x.text_) for x in data.class_], [('t', Decimal('1.5')), (None, Decimal('2.0'))])
+
+        elem = schema.encode(data, converter=xmlschema.DataClassConverter)
+        self.assertEqual(elem.attrib, {'items': 'a', XSI_SCHEMA_LOCATION: 'ns root.xsd'})
+        self.assertEqual([e.tag for e in elem], ['class', 'values', 'class'])
+        self.assertEqual(schema.to_dict(elem, converter=xmlschema.DataClassConverter), data)
+
+        schema = self.get_schema("""
+            <element name="r">
+                <complexType>
+                    <sequence>
+                        <element name="h" type="string"/>
+                        <sequence maxOccurs="unbounded">
+                            <element name="a" type="int"/>
+                            <element name="b" type="int"/>
+                        </sequence>
+                    </sequence>
+                </complexType>
+            </element>""")
+        xml_data = '<ns:r xmlns:ns="ns"><h>x</h><a>1</a><b>2</b><a>3</a><b>4</b></ns:r>'
+        data = schema.to_dict(xml_data, converter=xmlschema.DataClassConverter)
+        self.assertEqual((data.h, data.a, data.b), ('x', [1, 3], [2, 4]))
+        self.assertEqual(data.a, schema.to_dict(xml_data)['a'])
+        elem = schema.encode(data, converter=xmlschema.DataClassConverter)
+        self.assertEqual([e.tag for e in elem], ['h', 'a', 'b', 'a', 'b'])
+
+        # The data classes are kept by the schema maps, so a dropped schema is collected
+        self.assertIs(schema.maps.data_classes[schema.elements['r'].type], type(data))
+        schema_ref = weakref.ref(schema)
+        del schema, data, elem
+        gc.collect()
+        self.assertIsNone(schema_ref())
+
+    def test_projection(self):
+        projection = ['object/title', 'object/@id', 'object/author/name']
+        data = self.col_schema.to_dict(self.col_xml_file, projection=projection)
+        self.assertEqual(data['object'], [
+            {'@id': 'b0836217462', 'title': 'The Umbrellas', 'author': {'name': 'Pierre-Auguste Renoir'}},
+            {'@id': 'b0836217463', 'title': None, 'author': {'name': 'Joan Miró'}}
+        ])
+        data = self.col_schema.to_dict(self.col_xml_file, projection=['object/author', '@*'])
+        self.assertEqual(data['object'][0], {'author': _COLLECTION_DICT['object'][0]['author']})
+        self.assertIn('@xsi:schemaLocation', data)
+
+        projection = xmlschema.Projection(['col:object/year', 'object/{http://example.com/ns/collection}x'],
+                                          namespaces={'col': 'http://example.com/ns/collection'})
+        self.assertEqual(list(projection.children), ['{http://example.com/ns/collection}object', 'object'])
+        self.assertIsNone(projection['object']['{http://example.com/ns/collection}x'])
+        self.assertRaises(KeyError, projection.__getitem__, 'unknown')
+        self.assertRaises(XMLSchemaValueError, xmlschema.Projection, ['object//year'])
+        self.assertRaises(XMLSchemaValueError, xmlschema.Projection, ['@id/object'])
+        self.assertRaises(XMLSchemaValueError, xmlschema.Projection, ['x:object'])
+        self.assertRaises(XMLSchemaTypeError, xmlschema.Projection, 'object')
+
+        # Subtrees outside the projection are validated only on demand
+        with open(self.col_xml_file) as fp:
+            xml_data = fp.read().replace('<year>1925</year>', '<year>1925a</year>')
+        self.assertEqual(self.col_schema.to_dict(xml_data, projection=['*/title'])['object'],
+                         [{'title': 'The Umbrellas'}, {'title': None}])
+        self.assertRaises(XMLSchemaValidationError, self.col_schema.to_dict, xml_data,
+                          projection=['*/title'], validate_unprojected=True)
+        data, errors = self.col_schema.to_dict(xml_data, validation='lax', projection=['object/title'],
+                                               validate_unprojected=True)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(data['object'], [{'title': 'The Umbrellas'}, {'title': None}])
+
+    def test_result_cache(self):
+        cache = xmlschema.ResultCache(maxsize=2)
+        with io.open(self.col_xml_file, encoding='utf-8') as fp:
+            xml_data = fp.read()
+
+        data = self.col_schema.to_dict(xml_data, cache=cache)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 1, 1))
+        data['object'].pop()  # The cached data is not affected
+        self.assertEqual(self.col_schema.to_dict(self.col_xml_file, cache=cache), _COLLECTION_DICT)
+        self.assertEqual(self.col_schema.to_dict(xml_data, cache=cache), _COLLECTION_DICT)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 2, 2))
+
+        # Different options make different keys, the least recently used result is discarded
+        self.assertEqual(self.col_schema.to_dict(xml_data, cache=cache, decimal_type=str),
+                         self.col_schema.to_dict(xml_data, decimal_type=str))
+        self.assertEqual(len(cache), 2)
+        self.col_schema.to_dict(self.col_xml_file, cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+        # Errors are stored and returned for repeated invalid documents
+        invalid_data = xml_data.replace('<year>1925</year>', '<year>1925a</year>')
+        self.assertFalse(self.col_schema.is_valid(invalid_data, cache=cache))
+        errors = list(self.col_schema.iter_errors(invalid_data, cache=cache))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(cache.hits, 2)
+        self.assertTrue(self.col_schema.is_valid(xml_data, cache=cache))
+
+        # Element sources and unstable options bypass the cache
+        cache.clear()
+        self.col_schema.to_dict(ElementTree.parse(self.col_xml_file), cache=cache)
+        self.col_schema.to_dict(xml_data, cache=cache, filler=lambda x: 0)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 0))
+
+        # The disk tier is shared between caches
+        directory = tempfile.mkdtemp()
+        try:
+            self.col_schema.to_dict(xml_data, cache=xmlschema.ResultCache(directory=directory))
+            self.col_schema.is_valid(invalid_data, cache=xmlschema.ResultCache(directory=directory))
+            self.assertEqual(len(os.listdir(directory)), 1)
+            cache = xmlschema.ResultCache(directory=directory)
+            self.assertEqual(self.col_schema.to_dict(xml_data, cache=cache), _COLLECTION_DICT)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertRaises(XMLSchemaValueError, xmlschema.ResultCache, maxsize=0)
+        self.assertRaises(XMLSchemaValueError, xmlschema.ResultCache, directory=self.col_xml_file)
+
+    def test_interning(self):
+        def get_key(obj, key):
+            return [k for k in obj if k == key][0]
+
+        schema = self.schema_class("""<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+            <xs:element name="records">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="record" maxOccurs="unbounded">
+                    <xs:complexType>
+                      <xs:sequence>
+                        <xs:element name="color">
+                          <xs:simpleType>
+                            <xs:restriction base="xs:string">
+                              <xs:enumeration value="red"/>
+                              <xs:enumeration value="green"/>
+                            </xs:restriction>
+                          </xs:simpleType>
+                        </xs:element>
+                        <xs:element name="label" type="xs:string"/>
+                        <xs:element name="size" type="xs:integer"/>
+                      </xs:sequence>
+                      <xs:attribute name="kind" type="xs:string"/>
+                    </xs:complexType>
+                  </xs:element>
+                </xs:sequence>
+              </xs:complexType>
+            </xs:element>
+        </xs:schema>""")
+        xml_data = '<records>%s</records>' % ''.join(
+            '<record kind="k1"><color>red</color><label>item</label><size>100000</size></record>'
+            for _ in range(3)
+        )
+        self.assertEqual(len(schema.intern_table), 0)
+        data = schema.to_dict(xml_data)
+        record1, record2 = data['record'][:2]
+        self.assertIsNot(get_key(record1, '@kind'), get_key(record2, '@kind'))
+        self.assertIsNot(record1['color'], record2['color'])
+
+        data = schema.to_dict(xml_data, intern_strings=True)
+        self.assertEqual(data, schema.to_dict(xml_data))
+        record1, record2 = data['record'][:2]
+        self.assertIs(get_key(record1, '@kind'), get_key(record2, '@kind'))
+        self.assertIs(record1['color'], record2['color'])
+        self.assertIsNot(record1['label'], record2['label'])
+        self.assertIsNot(record1['@kind'], record2['@kind'])
+
+        table_size = len(schema.intern_table)
+        data = schema.to_dict(xml_data, share_values=True)
+        self.assertEqual(data, schema.to_dict(xml_data))
+        record1, record2 = data['record'][:2]
+        self.assertIs(record1['label'], record2['label'])
+        self.assertIs(record1['@kind'], record2['@kind'])
+        self.assertIs(record1['size'], record2['size'])
+        self.assertEqual(len(schema.intern_table), table_size)  # values aren't kept by the schema
+        data = schema.to_dict(xml_data.replace('item', 'other'), share_values=True)
+        self.assertIsNot(data['record'][0]['size'], record1['size'])
+        self.assertEqual(len(schema.intern_table), table_size)
+
+        # Keys that depend on the document aren't kept by the table of the schema
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <element name="item" type="string" maxOccurs="unbounded"/>
+                    </sequence>
+                    <attribute name="kind" type="string"/>
+                    <anyAttribute processContents="lax"/>
+                </complexType>
+            </element>""")
+        for prefix in ('a', 'b', 'c'):
+            xml_data = '<{0}:root xmlns:{0}="ns" xmlns:x{0}="other" kind="k" x{0}:extra="e">' \
+                       '<{0}:item>1</{0}:item><{0}:item>2</{0}:item></{0}:root>'.format(prefix)
+            data = schema.to_dict(xml_data, intern_strings=True)
+            self.assertEqual(data, schema.to_dict(xml_data))
+            self.assertIs(get_key(data, '@xmlns:%s' % prefix), get_key(data, '@xmlns:%s' % prefix))
+            if prefix == 'a':
+                table_size = len(schema.intern_table)
+            self.assertEqual(len(schema.intern_table), table_size)
+
+        # The shared values are limited, the keys are always interned
+        table = xmlschema.InternTable(max_values=1)
+        self.assertEqual(table.share('a'), 'a')
+        self.assertIsNot(table.share(''.join(['b', 'c'])), table.share(''.join(['b', 'c'])))
+        self.assertIs(table.intern(''.join(['b', 'c'])), table.intern(''.join(['b', 'c'])))
+        self.assertEqual(table.share([1, 'a', 2.5]), [1, 'a', 2.5])
+        self.assertIsInstance(table.share(True), bool)
+        table.clear()
+        self.assertEqual(len(table), 0)
+        self.assertRaises(XMLSchemaValueError, xmlschema.InternTable, max_values=-1)
+
     def test_dict_granularity(self):
         """Based on Issue #22, test to make sure an xsd indicating list with
         dictionaries, returns just that even when it has a single dict. """
@@ -1028,6 +1582,33 @@ class TestDecoding(XMLSchemaTestCase):
         self.assertEqual(message_lines[-4].strip(), rotation_data)
         self.assertEqual(message_lines[-2], 'Path: /tns:rotation')
 
+    def test_attribute_group_decoding(self):
+        schema = self.schema_class("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:attribute name="a" type="xs:int" use="required"/>
+                  <xs:attribute name="b" type="xs:string" fixed="foo"/>
+                  <xs:attribute name="c" type="xs:int" default="5"/>
+                  <xs:anyAttribute namespace="##other" processContents="lax"/>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        attribute_group = schema.elements['root'].type.attributes
+
+        self.assertEqual(schema.to_dict('<root a="1"/>'), {'@a': 1, '@b': 'foo', '@c': 5})
+        self.assertEqual(schema.to_dict('<root a="1"/>', use_defaults=False), {'@a': 1, '@b': 'foo'})
+        self.assertEqual(schema.to_dict('<root a="1" b="foo" c="2"/>'), {'@a': 1, '@b': 'foo', '@c': 2})
+        self.assertTrue(schema.is_valid('<root a="1" xmlns:x="x" x:d="y"/>'))
+        self.assertEqual(len(schema.to_dict('<root c="2" b="bar"/>', validation='lax')[1]), 2)
+        self.assertIn("missing required attributes: {'a'}", str(schema.to_dict('<root/>', validation='lax')[1][0]))
+        self.assertFalse(schema.is_valid('<root a="1" d="x"/>'))
+
+        del attribute_group['a']
+        del attribute_group['b']
+        self.assertEqual(schema.to_dict('<root/>'), {'@c': 5})
+        self.assertEqual(schema.to_dict('<root/>', use_defaults=False), None)
+
 
 class TestDecoding11(TestDecoding):
     schema_class = XMLSchema11
@@ -1074,6 +1655,49 @@ class TestDecoding11(TestDecoding):
         self.assertTrue(xs.is_valid('<ns:value xmlns:ns="ns" choice="bool">0</ns:value>'))
         self.assertTrue(xs.is_valid('<ns:value xmlns:ns="ns" choice="bool">true</ns:value>'))
 
+        # Attribute equality tests are compiled into a single dispatch on attribute values
+        xsd_element = xs.elements['value']
+        self.assertEqual(len(xsd_element._type_selectors), 1)
+        name, types_map = xsd_element._type_selectors[0]
+        self.assertEqual(name, 'choice')
+        self.assertIs(types_map['float'], xs.types['float-node'])
+        self.assertIs(xsd_element.get_type(etree_element('{ns}value', choice='bool')), xs.types['bool-node'])
+        self.assertIs(xsd_element.get_type(etree_element('{ns}value', choice='char')), xs.types['node-type'])
+
+    def test_type_alternatives_fallback(self):
+        xs = self.get_schema("""
+            <element name="value" type="ns:nodeType">
+                <alternative test="@choice='int'" type="ns:intNode"/>
+                <alternative test="@choice='number' and @decimals='0'" type="ns:intNode"/>
+                <alternative test="@choice='number'" type="ns:numberNode"/>
+            </element>
+            <complexType name="nodeType">
+                <simpleContent>
+                    <extension base="string">
+                        <attribute name="choice" type="string"/>
+                        <attribute name="decimals" type="int"/>
+                    </extension>
+                </simpleContent>
+            </complexType>
+            <complexType name="intNode">
+                <simpleContent><restriction base="ns:nodeType"><pattern value="\\d+"/></restriction></simpleContent>
+            </complexType>
+            <complexType name="numberNode">
+                <simpleContent><restriction base="ns:nodeType"><pattern value="[\\d.]+"/></restriction></simpleContent>
+            </complexType>""")
+
+        xsd_element = xs.elements['value']
+        self.assertEqual([name for name, _ in xsd_element._type_selectors], ['choice', None, 'choice'])
+        self.assertTrue(xs.is_valid('<ns:value xmlns:ns="ns" choice="int">10</ns:value>'))
+        self.assertFalse(xs.is_valid('<ns:value xmlns:ns="ns" choice="number" decimals="0">1.5</ns:value>'))
+        self.assertTrue(xs.is_valid('<ns:value xmlns:ns="ns" choice="number" decimals="1">1.5</ns:value>'))
+        self.assertTrue(xs.is_valid('<ns:value xmlns:ns="ns">alpha</ns:value>'))
+
+        # Encoding selects the type on the attributes of the decoded data
+        data = xs.decode('<ns:value xmlns:ns="ns" choice="number" decimals="2">1.25</ns:value>')
+        self.assertEqual(etree_tostring(xs.encode(data, path='ns:value', namespaces={'ns': 'ns'})),
+                         '<ns:value xmlns:ns="ns" choice="number" decimals="2">1.25</ns:value>')
+
 
 class TestEncoding(XMLSchemaTestCase):
 
@@ -1397,6 +2021,60 @@ class TestEncoding(XMLSchemaTestCase):
             expected=XMLSchemaChildrenValidationError,
         )
 
+    def test_encode_to_stream(self):
+        filename = self.casepath('examples/collection/collection.xml')
+        data = self.col_schema.to_dict(filename, dict_class=ordered_dict_class)
+        elem = self.col_schema.encode(data, namespaces=self.col_namespaces)
+
+        stream = io.StringIO()
+        self.assertEqual(self.col_schema.encode_to_stream(data, stream, namespaces=self.col_namespaces), [])
+        text = stream.getvalue()
+        self.assertTrue(text.startswith('<col:collection xmlns:'))
+        self.assertTrue(text.endswith('</col:collection>\n'))
+        self.assertEqual(etree_tostring(ElementTree.fromstring(text)), etree_tostring(elem))
+
+        stream = io.BytesIO()
+        self.col_schema.encode_to_stream(data, stream, namespaces=self.col_namespaces,
+                                         xml_declaration=True, indent=2)
+        self.assertTrue(stream.getvalue().startswith(b'<?xml version="1.0" encoding="utf-8"?>\n<col:'))
+        self.assertIn(b'\n  <object ', stream.getvalue())
+        self.assertTrue(self.col_schema.is_valid(stream.getvalue().decode('utf-8')))
+
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType mixed="true">
+                    <sequence>
+                        <element name="a" type="string" maxOccurs="unbounded"/>
+                        <element name="b" minOccurs="0">
+                            <complexType><sequence><element name="c" type="integer"/></sequence></complexType>
+                        </element>
+                    </sequence>
+                    <attribute name="x" type="string"/>
+                </complexType>
+            </element>
+            <element name="simple" type="string"/>
+        """)
+        data = {'@x': '"&"', 'a': ['1 & 2', '3'], 'b': {'c': 4}}
+        stream = io.StringIO()
+        schema.encode_to_stream(data, stream, path='ns:root', namespaces={'ns': 'ns'})
+        text = stream.getvalue()
+        self.assertIn(' x="&quot;&amp;&quot;"', text)
+        self.assertTrue(text.startswith('<ns:root xmlns:ns="ns" x="&quot;&amp;&quot;">\n    <a>1 &amp; 2</a>'))
+        self.assertEqual(etree_tostring(ElementTree.fromstring(text)),
+                         etree_tostring(schema.encode(data, path='ns:root', namespaces={'ns': 'ns'})))
+
+        stream = io.StringIO()
+        schema.encode_to_stream('a > b', stream, path='ns:simple', namespaces={'ns': 'ns'})
+        self.assertEqual(stream.getvalue(), '<ns:simple xmlns:ns="ns">a &gt; b</ns:simple>\n')
+
+        data = {'a': ['1'], 'b': {'c': 'foo'}}
+        kwargs = {'path': 'ns:root', 'namespaces': {'ns': 'ns'}}
+        self.assertRaises(XMLSchemaEncodeError, schema.encode_to_stream, data, io.StringIO(), **kwargs)
+        stream = io.StringIO()
+        errors = schema.encode_to_stream(data, stream, validation='lax', **kwargs)
+        self.assertEqual(len(errors), len(schema.encode(data, validation='lax', **kwargs)[1]))
+        self.assertIn('<b>\n        <c />', stream.getvalue())
+
 
 class TestEncoding11(TestEncoding):
     schema_class = XMLSchema11
@@ -1437,6 +2115,241 @@ class TestEncodingUnorderedConverter11(TestEncoding):
     schema_class = XMLSchema11UnorderedConverter
 
 
+class TestComponentProfiler(XMLSchemaTestCase):
+
+    def test_profile_validation(self):
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <element name="item" maxOccurs="unbounded">
+                            <complexType>
+                                <attribute name="id" type="ns:idType"/>
+                            </complexType>
+                        </element>
+                    </sequence>
+                </complexType>
+                <unique name="itemId">
+                    <selector xpath="item"/>
+                    <field xpath="@id"/>
+                </unique>
+            </element>
+            <simpleType name="idType">
+                <restriction base="string">
+                    <pattern value="[a-z]+"/>
+                    <maxLength value="8"/>
+                </restriction>
+            </simpleType>""")
+        xml_data = '<ns:root xmlns:ns="ns"><item id="a"/><item id="b"/><item id="c"/></ns:root>'
+        iter_decode = schema.elements['root'].__class__.__dict__['iter_decode']
+
+        with ComponentProfiler() as profiler:
+            self.assertTrue(profiler.enabled)
+            self.assertIsNone(schema.validate(xml_data))
+        self.assertFalse(profiler.enabled)
+        self.assertIs(schema.elements['root'].__class__.__dict__['iter_decode'], iter_decode)
+
+        categories = {r.category for r in profiler.report()}
+        self.assertEqual(categories, {'component', 'facet', 'pattern', 'model', 'identity'})
+
+        records = profiler.report(category='pattern')
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].calls, 3)
+        self.assertEqual(records[0].component.regexps, ['[a-z]+'])
+
+        records = profiler.report(category='identity')
+        self.assertEqual(records[0].calls, 1)
+        self.assertIs(records[0].component, schema.elements['root'].constraints['{ns}itemId'])
+
+        records = [r for r in profiler.report(sort_by='calls') if r.component is schema.elements['root']]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].calls, 1)
+        self.assertEqual(records[0].method, 'iter_decode')
+        self.assertGreaterEqual(records[0].total_time, records[0].own_time)
+
+        self.assertEqual(len(profiler.report(limit=2)), 2)
+        self.assertIn("pattern", profiler.format_report())
+        profiler.reset()
+        self.assertEqual(profiler.report(), [])
+
+    def test_profile_encoding(self):
+        with ComponentProfiler(categories=['component']) as profiler:
+            self.col_schema.encode(self.col_schema.to_dict(self.col_xml_file))
+
+        methods = {r.method for r in profiler.report()}
+        self.assertEqual(methods, {'iter_decode', 'iter_encode'})
+        self.assertEqual({r.category for r in profiler.report()}, {'component'})
+
+    def test_profiler_errors(self):
+        self.assertRaises(XMLSchemaValueError, ComponentProfiler, categories=['unknown'])
+        with ComponentProfiler() as profiler:
+            self.assertRaises(XMLSchemaValueError, ComponentProfiler().enable)
+            self.assertRaises(XMLSchemaValueError, profiler.report, sort_by='name')
+
+
+class TestDecoderGeneration(XMLSchemaTestCase):
+
+    def load_decoder(self, schema):
+        module = types.ModuleType('decoder')
+        code = compile(generate_decoder(schema).encode('utf-8'), '<decoder>', 'exec')
+        exec(code, module.__dict__)
+        return module
+
+    def test_collection_decoder(self):
+        decoder = self.load_decoder(self.col_schema)
+        self.assertEqual(decoder.SCHEMA_URL, self.col_schema.url)
+        self.assertEqual(decoder.to_dict(self.col_xml_file), self.col_schema.to_dict(self.col_xml_file))
+        self.assertIsNone(decoder._schema)  # Valid data are decoded without the schema
+        self.assertTrue(decoder.is_valid(self.col_xml_file))
+        self.assertEqual(decoder.to_dict(self.col_xml_file, validation='lax')[1], [])
+
+        with open(self.col_xml_file) as fp:
+            xml_data = fp.read()
+        self.assertEqual(decoder.to_dict(xml_data), self.col_schema.to_dict(xml_data))
+        self.assertEqual(decoder.to_dict(xml_data, namespaces={'': 'http://example.com/ns/collection'}),
+                         self.col_schema.to_dict(xml_data, namespaces={'': 'http://example.com/ns/collection'}))
+        self.assertIsNone(decoder._schema)
+
+        invalid_data = xml_data.replace('<year>1925</year>', '<year>1925a</year>')
+        self.assertFalse(decoder.is_valid(invalid_data))
+        self.assertIsNone(decoder._schema)
+        self.assertIsInstance(decoder.get_schema(), type(self.col_schema))
+        self.assertEqual([e.reason for e in decoder.iter_errors(invalid_data)],
+                         [e.reason for e in self.col_schema.iter_errors(invalid_data)])
+        self.assertRaises(XMLSchemaValidationError, decoder.validate, invalid_data)
+        self.assertEqual(decoder.to_dict(invalid_data, validation='lax')[0],
+                         self.col_schema.to_dict(invalid_data, validation='lax')[0])
+        self.assertRaises(decoder.ElementTree.ParseError, decoder.to_dict,
+                          '<!DOCTYPE foo [<!ENTITY e "x">]><foo>&e;</foo>')
+
+        # Comments and processing instructions of element trees are skipped
+        root = ElementTree.XML(xml_data)
+        root.insert(1, ElementTree.Comment(' a comment '))
+        root[0].append(ElementTree.ProcessingInstruction('target', 'value'))
+        namespaces = {'': 'http://example.com/ns/collection'}
+        decoder._schema = None
+        self.assertEqual(decoder.to_dict(root, namespaces=namespaces),
+                         self.col_schema.to_dict(root, namespaces=namespaces))
+        self.assertIsNone(decoder._schema)
+
+    def test_generated_components(self):
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <element name="code" maxOccurs="3">
+                            <simpleType>
+                                <restriction base="string">
+                                    <pattern value="[A-Z]{2}\\d+"/>
+                                    <maxLength value="5"/>
+                                </restriction>
+                            </simpleType>
+                        </element>
+                        <choice minOccurs="0">
+                            <element name="price" type="ns:priceType"/>
+                            <element name="values">
+                                <simpleType>
+                                    <list itemType="unsignedByte"/>
+                                </simpleType>
+                            </element>
+                        </choice>
+                        <element name="flag" type="boolean" default="true" minOccurs="0"/>
+                    </sequence>
+                    <attribute name="id" type="ID" use="required"/>
+                    <attribute name="version" type="decimal" fixed="1.0"/>
+                </complexType>
+            </element>
+            <complexType name="priceType">
+                <simpleContent>
+                    <extension base="ns:amountType">
+                        <attribute name="currency" type="string" default="EUR"/>
+                    </extension>
+                </simpleContent>
+            </complexType>
+            <simpleType name="amountType">
+                <restriction base="decimal">
+                    <minExclusive value="0"/>
+                    <fractionDigits value="2"/>
+                </restriction>
+            </simpleType>""")
+        decoder = self.load_decoder(schema)
+        decoder._schema = schema
+
+        for xml_data in ['<ns:root xmlns:ns="ns" id="r1"><code>AB1</code><price>10.25</price><flag>1</flag></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>AB1</code><code>CD22</code>'
+                         '<values>1 2 255</values></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>AB1</code><price currency="USD">0.5</price>'
+                         '<flag>0</flag></ns:root>']:
+            self.assertEqual(decoder.to_dict(xml_data), schema.to_dict(xml_data))
+            self.assertEqual(decoder.to_dict(xml_data, use_defaults=False),
+                             schema.to_dict(xml_data, use_defaults=False))
+            decoder._decode(*decoder._parse(xml_data, None), use_defaults=True)  # no fallback
+
+        for xml_data in ['<ns:root xmlns:ns="ns"><code>AB1</code></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>AB123</code><code>ab1</code></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1" version="2.0"><code>AB1</code></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>AB1</code><price>10.255</price></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>AB1</code><values>1 256</values></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>AB1</code><flag/><price>1</price></ns:root>',
+                         '<ns:root xmlns:ns="ns" id="r1"><code>A1</code><code>A1</code><code>A1</code>'
+                         '<code>A1</code></ns:root>']:
+            self.assertRaises(decoder._Invalid, decoder._decode, *decoder._parse(xml_data, None), use_defaults=True)
+            self.assertFalse(decoder.is_valid(xml_data))
+            self.assertEqual(len(list(decoder.iter_errors(xml_data))), len(list(schema.iter_errors(xml_data))))
+
+    def test_decoder_without_schema_url(self):
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <element name="code" type="ns:codeType" maxOccurs="unbounded"/>
+                        <element name="extra" minOccurs="0">
+                            <complexType>
+                                <sequence>
+                                    <any processContents="lax"/>
+                                </sequence>
+                            </complexType>
+                        </element>
+                    </sequence>
+                </complexType>
+            </element>
+            <simpleType name="codeType">
+                <restriction base="string">
+                    <pattern value="[A-Z]{2}\\d+"/>
+                </restriction>
+            </simpleType>""")
+        self.assertIsNone(schema.url)
+        decoder = self.load_decoder(schema)
+        self.assertIsNone(decoder.SCHEMA_URL)
+        self.assertIsNone(decoder._schema)
+
+        xml_data = '<ns:root xmlns:ns="ns"><code>AB1</code><code>ab1</code></ns:root>'
+        self.assertFalse(decoder.is_valid(xml_data))
+        self.assertIsInstance(decoder.get_schema(), type(schema))
+        self.assertEqual([e.reason for e in decoder.iter_errors(xml_data)],
+                         [e.reason for e in schema.iter_errors(xml_data)])
+
+        xml_data = '<ns:root xmlns:ns="ns"><code>AB1</code><extra><a>1</a></extra></ns:root>'
+        self.assertEqual(decoder.to_dict(xml_data), schema.to_dict(xml_data))
+
+    def test_unsupported_components(self):
+        schema = self.get_schema("""
+            <element name="root">
+                <complexType>
+                    <sequence>
+                        <any processContents="lax" maxOccurs="unbounded"/>
+                    </sequence>
+                </complexType>
+            </element>""")
+        decoder = self.load_decoder(schema)
+        decoder._schema = schema
+        self.assertEqual(decoder.ELEMENTS, {})
+
+        xml_data = '<ns:root xmlns:ns="ns"><a>1</a><b/></ns:root>'
+        self.assertEqual(decoder.to_dict(xml_data), schema.to_dict(xml_data))
+        self.assertTrue(decoder.is_valid(xml_data))
+
+
 # Creates decoding/encoding tests classes from XML files
 globals().update(tests_factory(make_validator_test_class, 'xml'))
 
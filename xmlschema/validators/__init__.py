@@ -31,4 +31,12 @@ from .groups import XsdGroup, Xsd11Group
 from .elements import XsdElement, Xsd11Element
 
 from .globals_ import XsdGlobals
+from .ids import IdIndex
+from .projection import Projection
+from .cache import ResultCache
+from .interning import InternTable
+from .incremental import IncrementalValidator
+from .sessions import ValidationSession
+from .streaming import XMLStreamWriter
 from .schema import XMLSchemaMeta, XMLSchemaBase, XMLSchema, XMLSchema10, XMLSchema11
+from .profiling import ComponentProfiler, ProfileRecord
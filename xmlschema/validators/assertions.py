@@ -9,14 +9,36 @@
 # @author Davide Brunato <brunato@sissa.it>
 #
 from __future__ import unicode_literals
-from elementpath import XPath2Parser, XPathContext, XMLSchemaProxy, ElementPathSyntaxError
+import operator
+from decimal import Decimal
+from elementpath import XPath2Parser, XPathContext, XMLSchemaProxy, ElementPathSyntaxError, ElementPathError
 
-from ..qnames import XSD_ASSERT
+from ..compat import string_base_type, long_type
+from ..qnames import XSD_ASSERT, XSD_DECIMAL, XSD_FLOAT, XSD_DOUBLE, XSD_STRING, XSD_ANY_URI
+from ..helpers import get_qname
 from ..xpath import ElementPathMixin
 
 from .exceptions import XMLSchemaValidationError
 from .xsdbase import XsdComponent
 
+COMPARISON_OPERATORS = {
+    '=': operator.eq, '!=': operator.ne, '<': operator.lt,
+    '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    'eq': operator.eq, 'ne': operator.ne, 'lt': operator.lt,
+    'le': operator.le, 'gt': operator.gt, 'ge': operator.ge,
+}
+
+# Python types of the decoded values admitted for compiled attribute operands, for
+# each primitive type. Other values (eg. decoded with a different decimal_type)
+# are left to XPath evaluation.
+TYPED_VALUE_TYPES = {
+    XSD_DECIMAL: (int, long_type, Decimal),
+    XSD_FLOAT: float,
+    XSD_DOUBLE: float,
+    XSD_STRING: string_base_type,
+    XSD_ANY_URI: string_base_type,
+}
+
 
 class XsdAssert(XsdComponent, ElementPathMixin):
     """
@@ -32,6 +54,7 @@ class XsdAssert(XsdComponent, ElementPathMixin):
     """
     _admitted_tags = {XSD_ASSERT}
     token = None
+    operands = None  # The compiled operands of a simple comparison test
 
     def __init__(self, elem, schema, parent, base_type):
         self.base_type = base_type
@@ -65,9 +88,121 @@ class XsdAssert(XsdComponent, ElementPathMixin):
         except ElementPathSyntaxError as err:
             self.parse_error(err, elem=self.elem)
             self.token = self.parser.parse('true()')
+        else:
+            self.operands = self._compile_comparison()
+
+    def _compile_comparison(self):
+        """
+        Compiles a test that compares two operands, each one an attribute of the
+        element, a literal or a count of child elements (eg. "@min le @max" or
+        "count(item) gt 0"), returning a couple of operands or `None` if the test
+        is not a simple comparison. An operand is a couple (kind, argument), where
+        the kind of an attribute operand is the Python type of its typed values.
+        """
+        if self.token.symbol not in COMPARISON_OPERATORS or len(self.token) != 2:
+            return None
+
+        operands = []
+        for token in self.token:
+            if token.symbol in ('(integer)', '(decimal)', '(float)', '(string)'):
+                operands.append(('literal', token.value))
+            elif token.symbol == '@' and len(token) == 1:
+                name = self._get_name(token[0], attribute=True)
+                if name is None:
+                    return None
+                try:
+                    primitive_type = self.parent.attributes[name].type.primitive_type.name
+                except (KeyError, AttributeError):
+                    return None  # Not a declared attribute or without a primitive type
+                if primitive_type not in TYPED_VALUE_TYPES:
+                    return None
+                operands.append((TYPED_VALUE_TYPES[primitive_type], name))
+            elif token.symbol == 'count' and len(token) == 1:
+                if token[0].symbol == '*' and not len(token[0]):
+                    operands.append(('count', None))
+                else:
+                    name = self._get_name(token[0])
+                    if name is None:
+                        return None
+                    operands.append(('count', name))
+            else:
+                return None
+        return tuple(operands)
+
+    def _get_name(self, token, attribute=False):
+        if token.symbol == '(name)':
+            if attribute and self.xpath_default_namespace:
+                return None  # Left to XPath evaluation, that resolves unprefixed names
+            return get_qname(self.xpath_default_namespace, token.value)
+        elif token.symbol == ':' and len(token) == 2 and all(t.symbol == '(name)' for t in token):
+            try:
+                return get_qname(self.namespaces[token[0].value], token[1].value)
+            except KeyError:
+                return None
+
+    def evaluate_operands(self, elem, attributes):
+        """
+        Evaluates a compiled comparison test on the typed values of the decoded
+        attributes. Returns `None` if the test has to be evaluated with XPath.
+
+        :param elem: the Element instance.
+        :param attributes: a dictionary with the decoded attributes of the element.
+        """
+        values = []
+        for kind, arg in self.operands:
+            if kind == 'literal':
+                value = arg
+            elif kind == 'count':
+                if arg is None:
+                    value = sum(1 for child in elem if not callable(child.tag))
+                else:
+                    value = sum(1 for child in elem if child.tag == arg)
+            elif arg not in elem.attrib:
+                return False  # Comparison with an empty sequence
+            else:
+                try:
+                    value = attributes[arg]
+                except KeyError:
+                    return None  # Not decoded, maybe an invalid value
+                if not isinstance(value, kind) or isinstance(value, bool):
+                    return None
+            values.append(value)
+
+        value1, value2 = values
+        if isinstance(value1, string_base_type) is not isinstance(value2, string_base_type):
+            return None  # A cast is required, left to XPath evaluation
+        elif isinstance(value1, float) is not isinstance(value2, float) and \
+                (isinstance(value1, Decimal) or isinstance(value2, Decimal)):
+            return None  # Numeric type promotion, left to XPath evaluation
+        return COMPARISON_OPERATORS[self.token.symbol](value1, value2)
+
+    def __call__(self, elem, attributes=None, context=None):
+        """
+        Checks the assertion on an element, yielding a validation error if the test is false.
+
+        :param elem: the Element instance.
+        :param attributes: an optional dictionary with the decoded attributes of the \
+        element, used for evaluating simple comparison tests without XPath.
+        :param context: an optional XPath context of the element, that is reused by \
+        the assertions of the same element.
+        """
+        result = None
+        if self.operands is not None and attributes is not None:
+            result = self.evaluate_operands(elem, attributes)
+
+        if result is None:
+            if context is None:
+                context = XPathContext(root=elem)
+            else:
+                context.item, context.position, context.size, context.axis = elem, 0, 1, None
+            try:
+                result = self.token.evaluate(context)
+            except ElementPathError as err:
+                msg = "cannot evaluate test path %r: %s"
+                yield XMLSchemaValidationError(self, obj=elem, reason=msg % (self.path, err))
+                return
 
-    def __call__(self, elem):
-        if not self.token.evaluate(XPathContext(root=elem)):
+        if not result:
             msg = "expression is not true with test path %r."
             yield XMLSchemaValidationError(self, obj=elem, reason=msg % self.path)
 
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains the asyncio API for validating and decoding asynchronous streams
+of XML data. Requires Python 3.6+ (asynchronous generators).
+"""
+import asyncio
+
+from ..exceptions import XMLSchemaTypeError, XMLSchemaValueError
+
+DEFAULT_SLICE_SIZE = 65536
+
+try:
+    get_running_loop = asyncio.get_running_loop
+except AttributeError:
+    get_running_loop = asyncio.get_event_loop  # Python 3.6: called only from coroutines
+
+
+def count_elements(elem, limit):
+    """Counts the elements of a subtree, stopping the count at *limit*."""
+    count = 0
+    for _ in elem.iter():
+        count += 1
+        if count >= limit:
+            break
+    return count
+
+
+async def iter_incremental_results(validator, chunks, slice_size=DEFAULT_SLICE_SIZE,
+                                   executor=None, offload_threshold=None):
+    """
+    Drives an :class:`IncrementalValidator` with the chunks of an asynchronous stream,
+    yielding its results. The data are parsed in slices of bounded size and the control
+    is returned to the event loop after each slice and after each validated subtree.
+
+    :param validator: an :class:`IncrementalValidator` instance.
+    :param chunks: an asynchronous iterable of bytes or string chunks of XML data.
+    :param slice_size: the maximum size of the data parsed in a single step.
+    :param executor: the executor used for offloading the validation of big subtrees, \
+    for default the event loop's default executor is used.
+    :param offload_threshold: if provided the children of the root element that have at \
+    least this number of elements are validated in the executor. For default all the \
+    validation is done in the event loop's thread.
+    """
+    if not hasattr(chunks, '__aiter__'):
+        raise XMLSchemaTypeError("%r is not an asynchronous iterable." % chunks)
+    elif slice_size < 1:
+        raise XMLSchemaValueError("slice_size must be a positive integer: %r" % slice_size)
+    elif offload_threshold is not None and offload_threshold < 1:
+        raise XMLSchemaValueError("offload_threshold must be a positive integer: %r" % offload_threshold)
+
+    loop = get_running_loop()
+
+    async for chunk in chunks:
+        for k in range(0, len(chunk), slice_size):
+            validator.parse(chunk[k:k + slice_size])
+            for child in validator.iter_completed():
+                if offload_threshold is not None and \
+                        count_elements(child, offload_threshold) >= offload_threshold:
+                    results = await loop.run_in_executor(
+                        executor, list, validator.iter_child_results(child)
+                    )
+                else:
+                    results = validator.iter_child_results(child)
+
+                for result in results:
+                    yield result
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+    for result in validator.close():
+        yield result
+
+
+async def async_iter_errors(schema, chunks, use_defaults=True, namespaces=None, **kwargs):
+    """
+    Asynchronous counterpart of :meth:`XMLSchemaBase.iter_errors` for an asynchronous
+    stream of XML data. Takes also the options of :func:`iter_incremental_results`.
+    """
+    validator = schema.incremental_validator(namespaces=namespaces, use_defaults=use_defaults)
+    async for error in iter_incremental_results(validator, chunks, **kwargs):
+        yield error
+
+
+async def async_iter_decode(schema, chunks, validation='lax', namespaces=None, use_defaults=True,
+                            slice_size=DEFAULT_SLICE_SIZE, executor=None, offload_threshold=None, **kwargs):
+    """
+    Asynchronous counterpart of :meth:`XMLSchemaBase.iter_decode` for an asynchronous
+    stream of XML data. Decoded data are yielded for each child of the root element.
+    Takes also the options of :func:`iter_incremental_results`.
+    """
+    validator = schema.incremental_validator(True, validation, namespaces, use_defaults, **kwargs)
+    async for result in iter_incremental_results(validator, chunks, slice_size, executor, offload_threshold):
+        yield result
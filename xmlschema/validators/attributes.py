@@ -249,6 +249,9 @@ class XsdAttribute(XsdComponent, ValidationMixin):
                     yield result if kwargs['datetime_types'] is True else text
                 except KeyError:
                     yield text
+            elif 'share_values' in kwargs:
+                yield kwargs['value_table'].share(result)
+                break
             else:
                 yield result
                 break
@@ -315,6 +318,7 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
     def __init__(self, elem, schema, parent, name=None, derivation=None, base_attributes=None):
         self.derivation = derivation
         self._attribute_group = ordered_dict_class()
+        self._update_tables()
         self.base_attributes = base_attributes
         XsdComponent.__init__(self, elem, schema, parent, name)
 
@@ -349,9 +353,11 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                 raise XMLSchemaValueError("%r name and key %r mismatch." % (value.name, key))
 
             self._attribute_group[key] = value
+        self._update_tables()
 
     def __delitem__(self, key):
         del self._attribute_group[key]
+        self._update_tables()
 
     def __iter__(self):
         if None in self._attribute_group:
@@ -374,6 +380,25 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                 else:
                     assert isinstance(value, XsdAttribute), 'An XsdAttribute instance is required.'
 
+    def _update_tables(self):
+        """
+        Updates the lookup tables used by decoding and encoding, that are computed from
+        the attributes of the group: the required names, the values of fixed attributes,
+        the values of attributes with a fixed or a default value and the wildcard.
+        """
+        self._required = frozenset(k for k, v in self._attribute_group.items()
+                                   if k is not None and v.use == 'required')
+        self._fixed_values = {}
+        self._predefined_values = {}
+        for k, v in self._attribute_group.items():
+            if k is None:
+                continue
+            elif v.fixed is not None:
+                self._fixed_values[k] = self._predefined_values[k] = v.fixed
+            elif v.default is not None:
+                self._predefined_values[k] = v.default
+        self._any_attribute = self._attribute_group.get(None)
+
     def _parse(self):
         super(XsdAttributeGroup, self)._parse()
         elem = self.elem
@@ -526,6 +551,8 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
         elif self.parent is None and self.schema.default_attributes == self.name:
             self.schema.default_attributes = self
 
+        self._update_tables()
+
     @property
     def built(self):
         return all([attr.built for attr in self.values()])
@@ -571,26 +598,38 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                     for obj in attr.iter_components(xsd_classes):
                         yield obj
 
+    def _get_missing_attributes(self, attrs):
+        missing_attrs = self._required.difference(attrs)
+        if missing_attrs:
+            return "missing required attributes: %r" % set(missing_attrs)
+
+    def _add_predefined_values(self, attrs, use_defaults):
+        predefined = self._predefined_values if use_defaults else self._fixed_values
+        for name in predefined:
+            if name not in attrs:
+                attrs = {k: v for k, v in attrs.items()}
+                attrs.update((k, v) for k, v in predefined.items() if k not in attrs)
+                break
+        return attrs
+
     def iter_decode(self, attrs, validation='lax', **kwargs):
-        if not attrs and not self:
+        attributes = self._attribute_group
+        if not attrs and not attributes:
             return
 
-        if validation != 'skip' and any(k not in attrs for k in self.iter_required()):
-            missing_attrs = {k for k in self.iter_required() if k not in attrs}
-            reason = "missing required attributes: %r" % missing_attrs
-            yield self.validation_error(validation, reason, attrs, **kwargs)
+        if validation != 'skip' and self._required:
+            reason = self._get_missing_attributes(attrs)
+            if reason is not None:
+                yield self.validation_error(validation, reason, attrs, **kwargs)
 
-        use_defaults = kwargs.get('use_defaults', True)
         filler = kwargs.get('filler')
-        additional_attrs = {k: v for k, v in self.iter_predefined(use_defaults) if k not in attrs}
-        if additional_attrs:
-            attrs = {k: v for k, v in attrs.items()}
-            attrs.update(additional_attrs)
+        if self._predefined_values:
+            attrs = self._add_predefined_values(attrs, kwargs.get('use_defaults', True))
 
         result_list = []
         for name, value in attrs.items():
             try:
-                xsd_attribute = self[name]
+                xsd_attribute = attributes[name]
             except KeyError:
                 if get_namespace(name) == XSI_NAMESPACE:
                     try:
@@ -600,15 +639,14 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                             reason = "%r is not an attribute of the XSI namespace." % name
                             yield self.validation_error(validation, reason, attrs, **kwargs)
                         continue
+                elif self._any_attribute is not None:
+                    xsd_attribute = self._any_attribute
+                    value = (name, value)
                 else:
-                    try:
-                        xsd_attribute = self[None]  # None key ==> anyAttribute
-                        value = (name, value)
-                    except KeyError:
-                        if validation != 'skip':
-                            reason = "%r attribute not allowed for element." % name
-                            yield self.validation_error(validation, reason, attrs, **kwargs)
-                        continue
+                    if validation != 'skip':
+                        reason = "%r attribute not allowed for element." % name
+                        yield self.validation_error(validation, reason, attrs, **kwargs)
+                    continue
 
             for result in xsd_attribute.iter_decode(value, validation, **kwargs):
                 if isinstance(result, XMLSchemaValidationError):
@@ -622,30 +660,27 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
 
         if kwargs.get('fill_missing') is True:
             if filler is None:
-                result_list.extend((k, None) for k in self._attribute_group
-                                   if k is not None and k not in attrs)
+                result_list.extend((k, None) for k in attributes if k is not None and k not in attrs)
             else:
-                result_list.extend((k, filler(v)) for k, v in self._attribute_group.items()
+                result_list.extend((k, filler(v)) for k, v in attributes.items()
                                    if k is not None and k not in attrs)
 
         yield result_list
 
     def iter_encode(self, attrs, validation='lax', **kwargs):
-        if validation != 'skip' and any(k not in attrs for k in self.iter_required()):
-            missing_attrs = {k for k in self.iter_required() if k not in attrs}
-            reason = "missing required attributes: %r" % missing_attrs
-            yield self.validation_error(validation, reason, attrs, **kwargs)
+        if validation != 'skip' and self._required:
+            reason = self._get_missing_attributes(attrs)
+            if reason is not None:
+                yield self.validation_error(validation, reason, attrs, **kwargs)
 
-        use_defaults = kwargs.get('use_defaults', True)
-        additional_attrs = {k: v for k, v in self.iter_predefined(use_defaults) if k not in attrs}
-        if additional_attrs:
-            attrs = {k: v for k, v in attrs.items()}
-            attrs.update(additional_attrs)
+        if self._predefined_values:
+            attrs = self._add_predefined_values(attrs, kwargs.get('use_defaults', True))
 
+        attributes = self._attribute_group
         result_list = []
         for name, value in attrs.items():
             try:
-                xsd_attribute = self[name]
+                xsd_attribute = attributes[name]
             except KeyError:
                 namespace = get_namespace(name) or self.target_namespace
                 if namespace == XSI_NAMESPACE:
@@ -656,15 +691,14 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                             reason = "%r is not an attribute of the XSI namespace." % name
                             yield self.validation_error(validation, reason, attrs, **kwargs)
                         continue
+                elif self._any_attribute is not None:
+                    xsd_attribute = self._any_attribute
+                    value = (name, value)
                 else:
-                    try:
-                        xsd_attribute = self[None]  # None key ==> anyAttribute
-                        value = (name, value)
-                    except KeyError:
-                        if validation != 'skip':
-                            reason = "%r attribute not allowed for element." % name
-                            yield self.validation_error(validation, reason, attrs, **kwargs)
-                        continue
+                    if validation != 'skip':
+                        reason = "%r attribute not allowed for element." % name
+                        yield self.validation_error(validation, reason, attrs, **kwargs)
+                    continue
 
             for result in xsd_attribute.iter_encode(value, validation, **kwargs):
                 if isinstance(result, XMLSchemaValidationError):
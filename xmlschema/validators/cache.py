@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a content-addressed cache of the results of validation and decoding.
+"""
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from decimal import Decimal
+
+from ..compat import string_base_type, unicode_type, long_type, Mapping
+from ..exceptions import XMLSchemaValueError
+from ..etree import etree_tostring
+from ..converters import XMLSchemaConverter
+from .exceptions import XMLSchemaValidationError
+
+try:
+    _hash_function = hashlib.blake2b
+except AttributeError:
+    _hash_function = hashlib.sha256  # Python 2.7 and PyPy2
+
+_replace_file = getattr(os, 'replace', os.rename)
+
+_SCALAR_TYPES = (type(None), bool, int, long_type, float, Decimal, string_base_type, unicode_type, bytes)
+
+
+def _stable_repr(obj):
+    """
+    Returns a representation of an option value that is stable between processes.
+
+    :raises: `TypeError` if the value has no stable representation (eg. callback \
+    instances or objects represented by their memory address).
+    """
+    if isinstance(obj, _SCALAR_TYPES):
+        return repr(obj)
+    elif isinstance(obj, type) or callable(obj) and hasattr(obj, '__module__') and hasattr(obj, '__name__'):
+        name = '%s.%s' % (obj.__module__, getattr(obj, '__qualname__', obj.__name__))
+        if '<' in name:
+            raise TypeError("%r has no stable name" % obj)
+        return name
+    elif isinstance(obj, XMLSchemaConverter):
+        return '%s(%s)' % (_stable_repr(type(obj)), _stable_repr(vars(obj)))
+    elif isinstance(obj, Mapping):
+        return '{%s}' % ', '.join(sorted('%s: %s' % (_stable_repr(k), _stable_repr(v)) for k, v in obj.items()))
+    elif isinstance(obj, (list, tuple)):
+        return '[%s]' % ', '.join(_stable_repr(item) for item in obj)
+    elif isinstance(obj, (set, frozenset)):
+        return '{%s}' % ', '.join(sorted(_stable_repr(item) for item in obj))
+    raise TypeError("%r has no stable representation" % obj)
+
+
+class ResultCache(object):
+    """
+    A content-addressed cache of the results of validation and decoding, for avoiding
+    the full processing of documents that are byte-identical to documents already
+    processed. The results are stored with a key computed from the hash of the document
+    bytes, a fingerprint of the schema and the options of the call. Provide the instance
+    with the argument *cache* of the validation and decoding methods of the schema:
+
+    >>> cache = ResultCache(maxsize=1000)
+    >>> schema.is_valid(xml_document, cache=cache)
+    True
+    >>> schema.to_dict(xml_document, cache=cache)  # Processed once, then served from cache
+    {...}
+
+    Only the sources given as bytes, as XML strings or as local file paths are cached,
+    other sources (Element trees, XML resources, file objects and URLs) and calls with
+    options that have no stable representation (eg. a *filler* callback or an *id_index*
+    instance) are processed without using the cache. Decoded data is copied when stored
+    and when returned, so the cached results are not affected by changes of the caller.
+    Validation errors are returned as stored, keeping the references to elements and
+    XSD components.
+
+    The in-memory tier keeps the most recently used results. An optional disk tier stores
+    the pickled results of the documents that have no errors, the directory has to be
+    trusted because the stored files are loaded with `pickle`. Decoded data that cannot
+    be pickled (eg. data classes of a :class:`DataClassConverter`) is kept only in memory.
+
+    :param maxsize: the maximum number of results kept in memory.
+    :param directory: an optional directory for storing the results on disk.
+    """
+    def __init__(self, maxsize=128, directory=None):
+        if maxsize < 1:
+            raise XMLSchemaValueError("maxsize must be a positive integer: %r" % maxsize)
+        if directory is not None and not os.path.isdir(directory):
+            raise XMLSchemaValueError("%r is not a directory." % directory)
+
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._fingerprints = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s(maxsize=%r, directory=%r)' % (self.__class__.__name__, self.maxsize, self.directory)
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        """Clears the in-memory tier and the statistics, the files of the disk tier are kept."""
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = 0
+
+    def get_key(self, schema, source, *options):
+        """
+        Returns the key of the results for a source processed with a schema and a set
+        of options, `None` if the source or the options cannot be cached.
+        """
+        data = self._get_bytes(source)
+        if data is None:
+            return None
+
+        try:
+            options_repr = _stable_repr(options + (schema.converter,))
+        except TypeError:
+            return None
+
+        h = _hash_function()
+        h.update(self.get_fingerprint(schema))
+        h.update(options_repr.encode('utf-8'))
+        h.update(data)
+        return h.hexdigest()
+
+    def get_fingerprint(self, schema):
+        """Returns a digest of the schema and of all the other schemas of its global maps."""
+        try:
+            return self._fingerprints[schema]
+        except KeyError:
+            h = _hash_function()
+            h.update(schema.__class__.__name__.encode('utf-8'))
+            for s in sorted(schema.maps.iter_schemas(), key=lambda x: (x.url or '', x.target_namespace)):
+                h.update((s.url or '').encode('utf-8'))
+                h.update(etree_tostring(s.root).encode('utf-8'))
+            fingerprint = self._fingerprints[schema] = h.digest()
+            return fingerprint
+
+    def get(self, key):
+        """Returns a list with the results stored with a key, `None` if the key is missing."""
+        with self._lock:
+            try:
+                results = self._results.pop(key)
+            except KeyError:
+                results = None
+            else:
+                self._results[key] = results
+
+        if results is None and self.directory is not None:
+            results = self._load(key)
+            if results is not None:
+                self._store(key, results)
+
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._copy_results(results)
+
+    def put(self, key, results):
+        """Stores the results of a document, a list of validation errors and decoded data."""
+        results = self._copy_results(results)
+        self._store(key, results)
+        if self.directory is not None and not any(isinstance(r, XMLSchemaValidationError) for r in results):
+            self._dump(key, results)
+
+    def _store(self, key, results):
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = results
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    @staticmethod
+    def _copy_results(results):
+        return [r if isinstance(r, XMLSchemaValidationError) else copy.deepcopy(r) for r in results]
+
+    @staticmethod
+    def _get_bytes(source):
+        if isinstance(source, bytes):
+            return source if source.lstrip().startswith(b'<') else None
+        elif not isinstance(source, (string_base_type, unicode_type)):
+            return None
+        elif source.lstrip().startswith('<'):
+            return source.encode('utf-8')
+        elif '://' in source and not source.startswith('file://'):
+            return None
+
+        path = source[7:] if source.startswith('file://') else source
+        try:
+            with open(path, 'rb') as fp:
+                return fp.read()
+        except (IOError, OSError):
+            return None
+
+    def _load(self, key):
+        try:
+            with open(os.path.join(self.directory, key + '.pickle'), 'rb') as fp:
+                return pickle.load(fp)
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+
+    def _dump(self, key, results):
+        try:
+            content = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix='xmlschema-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(content)
+            _replace_file(tmp_path, os.path.join(self.directory, key + '.pickle'))
+        except (IOError, OSError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -9,6 +9,7 @@
 # @author Davide Brunato <brunato@sissa.it>
 #
 from __future__ import unicode_literals
+from elementpath import XPathContext
 
 from ..exceptions import XMLSchemaValueError
 from ..qnames import XSD_GROUP, XSD_ATTRIBUTE_GROUP, XSD_SEQUENCE, XSD_ALL, XSD_CHOICE, \
@@ -521,6 +522,29 @@ class XsdComplexType(XsdType, ValidationMixin):
     def has_extension(self):
         return self._derivation is True
 
+    def iter_assertion_errors(self, elem, attributes=None):
+        """
+        Checks the XSD 1.1 assertions of the type on an element, yielding a validation
+        error for each assertion that is not true. The assertions are evaluated in a
+        batch that shares an XPath context and the typed values of the attributes.
+
+        :param elem: the Element instance.
+        :param attributes: an optional list of couples with the decoded attributes \
+        of the element, used for evaluating the simple comparison tests without XPath.
+        """
+        if not self.assertions:
+            return
+
+        typed_values = dict(attributes) if attributes is not None else None
+        context = None
+        for assertion in self.assertions:
+            if assertion.token is None:
+                continue  # Not parsed (eg. the assertions of the meta-schema)
+            elif context is None and (assertion.operands is None or typed_values is None):
+                context = XPathContext(root=elem)
+            for error in assertion(elem, typed_values, context):
+                yield error
+
     def decode(self, data, *args, **kwargs):
         if hasattr(data, 'attrib') or self.is_simple():
             return super(XsdComplexType, self).decode(data, *args, **kwargs)
@@ -539,11 +563,6 @@ class XsdComplexType(XsdType, ValidationMixin):
         :return: yields a 3-tuple (simple content, complex content, attributes) containing \
         the decoded parts, eventually preceded by a sequence of validation or decoding errors.
         """
-        # XSD 1.1 assertions
-        for assertion in self.assertions:
-            for error in assertion(elem):
-                yield self.validation_error(validation, error, **kwargs)
-
         for result in self.attributes.iter_decode(elem.attrib, validation, **kwargs):
             if isinstance(result, XMLSchemaValidationError):
                 yield result
@@ -553,6 +572,10 @@ class XsdComplexType(XsdType, ValidationMixin):
         else:
             attributes = None
 
+        # XSD 1.1 assertions
+        for error in self.iter_assertion_errors(elem, attributes):
+            yield self.validation_error(validation, error, **kwargs)
+
         if self.has_simple_content():
             if len(elem) and validation != 'skip':
                 reason = "a simple content element can't has child elements."
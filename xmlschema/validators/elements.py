@@ -325,9 +325,7 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
             self.type = self.maps.elements[substitution_group_qname].type
 
         try:
-            self.maps.substitution_groups[substitution_group_qname].add(self)
-        except KeyError:
-            self.maps.substitution_groups[substitution_group_qname] = {self}
+            self.maps.add_substitute(substitution_group_qname, self)
         finally:
             self._substitution_group = substitution_group_qname
 
@@ -451,6 +449,10 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
         use_defaults = kwargs.get('use_defaults', False)
         value = content = attributes = None
 
+        id_index = kwargs.get('id_index')
+        if id_index is not None:
+            id_index.current = elem
+
         # Get the instance type: xsi:type or the schema's declaration
         if XSI_TYPE not in elem.attrib:
             xsd_type = self.get_type(elem)
@@ -470,6 +472,15 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
             else:
                 attributes = result
 
+        # XSD 1.1 assertions of the complex type
+        if validation != 'skip' and getattr(xsd_type, 'assertions', None):
+            for error in xsd_type.iter_assertion_errors(elem, attributes):
+                yield self.validation_error(validation, error, elem, **kwargs)
+
+        projection = kwargs.get('projection')
+        if projection is not None and attributes:
+            attributes = projection.filter_attributes(attributes)
+
         # Checks the xsi:nil attribute of the instance
         if validation != 'skip' and XSI_NIL in elem.attrib:
             if not self.nillable:
@@ -537,6 +548,8 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
                     value = elem.text
             except KeyError:
                 value = elem.text
+        elif 'share_values' in kwargs:
+            value = kwargs['value_table'].share(value)
 
         element_data = ElementData(elem.tag, value, content, attributes)
         yield converter.element_decode(element_data, self, level)
@@ -564,6 +577,7 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
         if not isinstance(converter, XMLSchemaConverter):
             converter = self.schema.get_converter(converter, **kwargs)
         level = kwargs.pop('level', 0)
+        writer = kwargs.get('_writer')  # an XMLStreamWriter for encoding to a stream
         element_data = converter.element_encode(obj, self, level)
 
         errors = []
@@ -625,6 +639,9 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
                     else:
                         text = result
         else:
+            if writer is not None and element_data.content:
+                # Streamed encoding: the children are written during the encoding of the content
+                writer.start_element(tag, attributes, converter, level)
             for result in xsd_type.content_type.iter_encode(
                     element_data, validation, level=level + 1, **kwargs):
                 if isinstance(result, XMLSchemaValidationError):
@@ -633,6 +650,8 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
                     text, children = result
 
         elem = converter.etree_element(tag, text, children, attributes, level)
+        if writer is not None and writer.depth > level:
+            writer.end_element(elem)
 
         if validation != 'skip' and errors:
             for e in errors:
@@ -766,6 +785,19 @@ class Xsd11Element(XsdElement):
                     index += 1
                 else:
                     break
+
+        # Compiles the type selection: consecutive alternatives that compare the same
+        # attribute with string literals are merged into a dispatch on attribute values.
+        self._type_selectors = []
+        for alt in self.alternatives:
+            if alt.type is None:
+                continue
+            elif alt.attribute_test is None:
+                self._type_selectors.append((None, alt))
+            elif self._type_selectors and self._type_selectors[-1][0] == alt.attribute_test[0]:
+                self._type_selectors[-1][1].setdefault(alt.attribute_test[1], alt.type)
+            else:
+                self._type_selectors.append((alt.attribute_test[0], {alt.attribute_test[1]: alt.type}))
         return index
 
     @property
@@ -776,19 +808,29 @@ class Xsd11Element(XsdElement):
             return self.schema.target_namespace
 
     def get_type(self, elem):
-        if not self.alternatives:
+        if not self._type_selectors:
             return self.type
 
         if isinstance(elem, ElementData):
-            if elem.attributes:
-                attrib = {k: raw_xml_encode(v) for k, v in elem.attributes.items()}
-                elem = etree_element(elem.tag, attrib=attrib)
-            else:
-                elem = etree_element(elem.tag)
+            attrib = {k: raw_xml_encode(v) for k, v in elem.attributes.items()} if elem.attributes else {}
+            context_elem = None  # Created only for evaluating XPath tests
+        else:
+            attrib = elem.attrib
+            context_elem = elem
 
-        for alt in self.alternatives:
-            if alt.type is not None and boolean_value(list(alt.token.select(context=XPathContext(root=elem)))):
-                return alt.type
+        for name, selector in self._type_selectors:
+            if name is not None:
+                try:
+                    return selector[attrib[name]]
+                except KeyError:
+                    continue
+            elif selector.token.symbol == 'true':
+                return selector.type
+
+            if context_elem is None:
+                context_elem = etree_element(elem.tag, attrib=attrib)
+            if boolean_value(list(selector.token.select(context=XPathContext(root=context_elem)))):
+                return selector.type
         return self.type
 
     def overlap(self, other):
@@ -813,6 +855,7 @@ class XsdAlternative(XsdComponent):
     """
     _admitted_tags = {XSD_ALTERNATIVE}
     type = None
+    attribute_test = None
 
     def __repr__(self):
         return '%s(type=%r, test=%r)' % (self.__class__.__name__, self.elem.get('type'), self.elem.get('test'))
@@ -838,6 +881,8 @@ class XsdAlternative(XsdComponent):
             self.parse_error(err)
             self.token = parser.parse('true()')
             self.path = 'true()'
+        else:
+            self.attribute_test = self._get_attribute_test()
 
         try:
             type_qname = self.schema.resolve_qname(attrib['type'])
@@ -854,6 +899,35 @@ class XsdAlternative(XsdComponent):
                 if not self.type.is_derived(self.parent.type):
                     self.parse_error("type %r ir not derived from %r" % (attrib['type'], self.parent.type))
 
+    def _get_attribute_test(self):
+        """
+        Returns a couple with the name of an attribute and a string if the test is
+        an equality comparison between the attribute and the string (eg. "@kind = 'car'"),
+        `None` otherwise.
+        """
+        token = self.token
+        if token.symbol not in ('=', 'eq') or len(token) != 2:
+            return None
+        elif token[0].symbol == '(string)':
+            literal, attribute = token[0], token[1]
+        else:
+            attribute, literal = token[0], token[1]
+
+        if attribute.symbol != '@' or literal.symbol != '(string)' or len(attribute) != 1:
+            return None
+
+        name_token = attribute[0]
+        if name_token.symbol == '(name)':
+            if self.xpath_default_namespace:
+                return None  # Left to XPath evaluation, that resolves unprefixed names
+            return name_token.value, literal.value
+        elif name_token.symbol == ':' and len(name_token) == 2 and all(t.symbol == '(name)' for t in name_token):
+            try:
+                namespace = self.namespaces[name_token[0].value]
+            except KeyError:
+                return None
+            return get_qname(namespace, name_token[1].value), literal.value
+
     @property
     def built(self):
         raise NotImplementedError
@@ -13,7 +13,7 @@ This module contains declarations and classes for XML Schema constraint facets.
 """
 from __future__ import unicode_literals
 import re
-from elementpath import XPath2Parser, ElementPathError, datatypes
+from elementpath import XPath2Parser, XPathContext, ElementPathError, datatypes
 
 from ..compat import unicode_type, MutableSequence
 from ..qnames import XSD_LENGTH, XSD_MIN_LENGTH, XSD_MAX_LENGTH, XSD_ENUMERATION, XSD_WHITE_SPACE, \
@@ -669,9 +669,11 @@ class XsdAssertionFacet(XsdFacet):
             self.parse_error(err, elem=self.elem)
             self.token = self.parser.parse('true()')
 
+        # The value is provided with the dynamic context, so the calls don't change the parser
+        del self.parser.variables['value']
+
     def __call__(self, value):
-        self.parser.variables['value'] = value
-        if not self.token.evaluate():
+        if not self.token.evaluate(XPathContext(self.elem, variables={'value': value})):
             msg = "value is not true with test path %r."
             yield XMLSchemaValidationError(self, value, reason=msg % self.path)
 
@@ -16,16 +16,18 @@ import re
 import warnings
 from collections import Counter
 
+from ..compat import string_base_type, ChainMap
 from ..exceptions import XMLSchemaKeyError, XMLSchemaTypeError, XMLSchemaValueError, XMLSchemaWarning
 from ..namespaces import XSD_NAMESPACE
 from ..qnames import XSD_INCLUDE, XSD_IMPORT, XSD_REDEFINE, XSD_OVERRIDE, XSD_NOTATION, XSD_ANY_TYPE, \
-    XSD_SIMPLE_TYPE, XSD_COMPLEX_TYPE, XSD_GROUP, XSD_ATTRIBUTE, XSD_ATTRIBUTE_GROUP, XSD_ELEMENT
+    XSD_SIMPLE_TYPE, XSD_COMPLEX_TYPE, XSD_GROUP, XSD_ATTRIBUTE, XSD_ATTRIBUTE_GROUP, XSD_ELEMENT, \
+    XSD_ANNOTATION
 from ..helpers import get_qname, local_name
 from ..namespaces import NamespaceResourcesMap
 
 from . import XMLSchemaNotBuiltError, XMLSchemaModelError, XMLSchemaModelDepthError, XsdValidator, \
     XsdKeyref, XsdComponent, XsdAttribute, XsdSimpleType, XsdComplexType, XsdElement, XsdAttributeGroup, \
-    XsdGroup, XsdNotation, XsdAssert
+    XsdGroup, XsdNotation, XsdAssert, XMLSchemaValidatorError
 from .builtins import xsd_builtin_types_factory
 
 
@@ -201,16 +203,40 @@ lookup_group = create_lookup_function(XsdGroup)
 lookup_element = create_lookup_function(XsdElement)
 
 
+class GlobalMapLookup(object):
+    """
+    A picklable lookup function for the namespace views of a global map.
+
+    :param maps: the :class:`XsdGlobals` instance.
+    :param name: the name of the global map (e.g. 'types' or 'elements').
+    """
+    def __init__(self, maps, name):
+        self.maps = maps
+        self.name = name
+
+    def __call__(self, qname):
+        if self.maps.lazy:
+            return getattr(self.maps, 'lookup_%s' % self.name[:-1])(qname)
+        return getattr(self.maps, self.name)[qname]
+
+
 class XsdGlobals(XsdValidator):
     """
     Mediator class for related XML schema instances. It stores the global
     declarations defined in the registered schemas. Register a schema to
     add it's declarations to the global maps.
 
+    The global maps are layered: the first layer contains the globals of the schemas
+    registered in the instance, the other layers are the read-only maps of built base
+    instances (e.g. the meta-schema maps or the maps of a common library of schemas).
+    Lookups are chained through the layers, so the components of a base instance are
+    shared and not copied.
+
     :param validator: the origin schema class/instance used for creating the global maps.
     :param validation: the XSD validation mode to use, can be 'strict', 'lax' or 'skip'.
+    :param parent: an optional built :class:`XsdGlobals` instance to use as base layer.
     """
-    def __init__(self, validator, validation='strict'):
+    def __init__(self, validator, validation='strict', parent=None):
         super(XsdGlobals, self).__init__(validation)
         if not all(hasattr(validator, a) for a in ('meta_schema', 'BUILDERS_MAP')):
             raise XMLSchemaValueError("The argument {!r} is not an XSD schema validator".format(validator))
@@ -218,55 +244,232 @@ class XsdGlobals(XsdValidator):
         self.validator = validator
         self.namespaces = NamespaceResourcesMap()  # Registered schemas by namespace URI
 
-        self.types = {}                 # Global types (both complex and simple)
-        self.attributes = {}            # Global attributes
-        self.attribute_groups = {}      # Attribute groups
-        self.groups = {}                # Model groups
-        self.notations = {}             # Notations
-        self.elements = {}              # Global elements
-        self.substitution_groups = {}   # Substitution groups
-        self.constraints = {}           # Constraints (uniqueness, keys, keyref)
+        self.types = ChainMap()                 # Global types (both complex and simple)
+        self.attributes = ChainMap()            # Global attributes
+        self.attribute_groups = ChainMap()      # Attribute groups
+        self.groups = ChainMap()                # Model groups
+        self.notations = ChainMap()             # Notations
+        self.elements = ChainMap()              # Global elements
+        self.substitution_groups = ChainMap()   # Substitution groups
+        self.constraints = ChainMap()           # Constraints (uniqueness, keys, keyref)
+        self.prefetched_resources = {}          # Schema resources loaded in advance, by URL
+        self.restrictions = {}                  # Results of restriction checks of model groups
+        self.data_classes = {}                  # Data classes of DataClassConverter, by complex type
+        self._declared_names = None             # Names of element and attribute declarations
 
         self.global_maps = (self.notations, self.types, self.attributes,
                             self.attribute_groups, self.groups, self.elements)
 
+        # On demand build state
+        self.lazy = False               # Globals are built when reached by a lookup
+        self._lazy_schemas = []         # Loaded schemas with globals built on demand
+        self._substitutes = {}          # Substitution group members of not built heads
+        self._built_components = []     # Globals built and not yet completed
+        self._failed_components = {}    # Globals that failed the build checks, with the error
+        self._building = False
+        self.frozen = False             # Set by XMLSchemaBase.freeze(), the maps can't be changed
+
+        if parent is not None:
+            self.add_base(parent)
+
     def __repr__(self):
         return '%s(validator=%r, validation=%r)' % (self.__class__.__name__, self.validator, self.validation)
 
+    def _iter_layered_maps(self):
+        yield self.types
+        yield self.attributes
+        yield self.attribute_groups
+        yield self.groups
+        yield self.notations
+        yield self.elements
+        yield self.substitution_groups
+        yield self.constraints
+
+    @property
+    def bases(self):
+        """The number of base layers of the global maps."""
+        return len(self.types.maps) - 1
+
+    def add_base(self, maps):
+        """
+        Adds the globals of a built instance as read-only base layers. The schemas of
+        the base instance are registered, its components are shared through chained
+        lookups instead of being copied into the maps.
+
+        :param maps: a built :class:`XsdGlobals` instance.
+        """
+        if maps.lazy or not maps.built:
+            raise XMLSchemaValueError("{!r} is not fully built and cannot be a base for global maps".format(maps))
+        self._check_not_frozen()
+
+        for schema in maps.iter_schemas():
+            self.register(schema)
+        for local_map, base_map in zip(self._iter_layered_maps(), maps._iter_layered_maps()):
+            local_map.maps.extend(m for m in base_map.maps if all(m is not x for x in local_map.maps))
+
+    def new_child(self, validator=None, validation=None):
+        """
+        Creates new global maps that use this built instance as base layer.
+
+        :param validator: the origin schema class/instance of the new maps, for default \
+        is the validator of this instance.
+        :param validation: the validation mode of the new maps, for default is the \
+        validation mode of this instance.
+        """
+        return XsdGlobals(self.validator if validator is None else validator,
+                          validation or self.validation, parent=self)
+
     def copy(self, validator=None, validation=None):
-        """Makes a copy of the object."""
+        """Makes a copy of the object. The base layers are shared with the copy."""
         obj = XsdGlobals(self.validator if validator is None else validator, validation or self.validation)
         obj.namespaces.update(self.namespaces)
-        obj.types.update(self.types)
-        obj.attributes.update(self.attributes)
-        obj.attribute_groups.update(self.attribute_groups)
-        obj.groups.update(self.groups)
-        obj.notations.update(self.notations)
-        obj.elements.update(self.elements)
-        obj.substitution_groups.update(self.substitution_groups)
-        obj.constraints.update(self.constraints)
+        for obj_map, global_map in zip(obj._iter_layered_maps(), self._iter_layered_maps()):
+            obj_map.maps[0].update(global_map.maps[0])
+            obj_map.maps.extend(global_map.maps[1:])
+        obj.lazy = self.lazy
+        obj._lazy_schemas.extend(self._lazy_schemas)
+        obj._substitutes.update(self._substitutes)
+        obj._failed_components.update(self._failed_components)
         return obj
 
     __copy__ = copy
 
+    def add_substitute(self, head_name, xsd_element):
+        """
+        Adds an element to the substitution group of a head element. A substitution
+        group of a base layer is copied before adding the element, keeping the base
+        maps unchanged.
+        """
+        self._check_not_frozen()
+        local_map = self.substitution_groups.maps[0]
+        try:
+            local_map[head_name].add(xsd_element)
+        except KeyError:
+            local_map[head_name] = set(self.substitution_groups.get(head_name, ()))
+            local_map[head_name].add(xsd_element)
+
+    def _check_not_frozen(self):
+        if self.frozen:
+            raise XMLSchemaValueError("global maps %r are frozen and cannot be changed" % self)
+
     def lookup_notation(self, qname):
+        if self.lazy:
+            return self._lazy_lookup(lookup_notation, self.notations, qname)
         return lookup_notation(self.notations, qname, self.validator.BUILDERS_MAP)
 
     def lookup_type(self, qname):
+        if self.lazy:
+            return self._lazy_lookup(lookup_type, self.types, qname)
         return lookup_type(self.types, qname, self.validator.BUILDERS_MAP)
 
     def lookup_attribute(self, qname):
+        if self.lazy:
+            return self._lazy_lookup(lookup_attribute, self.attributes, qname)
         return lookup_attribute(self.attributes, qname, self.validator.BUILDERS_MAP)
 
     def lookup_attribute_group(self, qname):
+        if self.lazy:
+            return self._lazy_lookup(lookup_attribute_group, self.attribute_groups, qname)
         return lookup_attribute_group(self.attribute_groups, qname, self.validator.BUILDERS_MAP)
 
     def lookup_group(self, qname):
+        if self.lazy:
+            return self._lazy_lookup(lookup_group, self.groups, qname)
         return lookup_group(self.groups, qname, self.validator.BUILDERS_MAP)
 
     def lookup_element(self, qname):
+        if self.lazy:
+            return self._lazy_lookup(lookup_element, self.elements, qname)
         return lookup_element(self.elements, qname, self.validator.BUILDERS_MAP)
 
+    def view_lookup(self, name):
+        """
+        Returns a lookup function for the namespace views of a global map, that in
+        on demand build mode gets the global components through the lookup methods.
+
+        :param name: the name of the global map (e.g. 'types' or 'elements').
+        """
+        return GlobalMapLookup(self, name)
+
+    def _lazy_lookup(self, lookup_function, global_map, qname):
+        """
+        Lookup for a global component in on demand build mode. A top level lookup that
+        builds a global component also completes the build of all the globals reached
+        from it, running the checks that are done by a full build.
+        """
+        obj = global_map.get(qname)
+        if isinstance(obj, XsdComponent):
+            if id(obj) in self._failed_components:
+                raise self._failed_components[id(obj)][1]
+            return obj
+
+        if self._building:
+            component = lookup_function(global_map, qname, self.validator.BUILDERS_MAP)
+            if isinstance(component, XsdComponent):
+                self._built_components.append(component)
+            return component
+
+        self._building = True
+        try:
+            component = lookup_function(global_map, qname, self.validator.BUILDERS_MAP)
+            if isinstance(component, XsdComponent):
+                self._built_components.append(component)
+            self._complete_build()
+        except XMLSchemaValidatorError as err:
+            # Components that fail the checks aren't usable, the error is raised again at each lookup
+            for obj in self._built_components:
+                self._failed_components[id(obj)] = obj, err
+            raise
+        finally:
+            self._building = False
+            del self._built_components[:]
+        return component
+
+    def _complete_build(self):
+        """
+        Completes the build of the globals built on demand. Builds substitution group
+        members and model groups elements, then parses key references and assertions
+        and checks the new components.
+        """
+        completed = []
+        all_elements = False
+        while True:
+            while len(completed) < len(self._built_components):
+                component = self._built_components[len(completed)]
+                completed.append(component)
+                if isinstance(component, XsdElement):
+                    for qname in self._substitutes.pop(component.name, ()):
+                        self.lookup_element(qname)
+
+                for group in component.iter_components(XsdGroup):
+                    group.build()
+
+            if all_elements or not any(
+                    isinstance(k.refer, string_base_type) and k.refer not in self.constraints
+                    for c in completed for k in c.iter_components(XsdKeyref)):
+                break
+
+            # A key reference to an identity constraint of a not built element
+            all_elements = True
+            for qname in list(self.elements):
+                self.lookup_element(qname)
+
+        components = {}
+        for component in completed:
+            if component.schema.meta_schema is not None:
+                try:
+                    components[component.schema].append(component)
+                except KeyError:
+                    components[component.schema] = [component]
+
+        for schema, schema_components in components.items():
+            for component in schema_components:
+                for constraint in component.iter_components(XsdKeyref):
+                    constraint.parse_refer()
+                for assertion in component.iter_components(XsdAssert):
+                    assertion.parse()
+            self._check_schema(schema, schema_components)
+
     def lookup(self, tag, qname):
         if tag in (XSD_SIMPLE_TYPE, XSD_COMPLEX_TYPE):
             return self.lookup_type(qname)
@@ -325,9 +528,26 @@ class XsdGlobals(XsdValidator):
         if xsd_classes is None or isinstance(self, xsd_classes):
             yield self
         for xsd_global in self.iter_globals():
+            if not isinstance(xsd_global, XsdComponent):
+                continue  # Not built global of an on demand build
             for obj in xsd_global.iter_components(xsd_classes):
                 yield obj
 
+    @property
+    def declared_names(self):
+        """
+        A frozenset with the names of the element and attribute declarations of the
+        maps. In on demand build mode the set is empty, because the declarations are
+        not all built.
+        """
+        if self.lazy:
+            return frozenset()
+        elif self._declared_names is None:
+            self._declared_names = frozenset(
+                c.name for c in self.iter_components((XsdElement, XsdAttribute)) if c.name is not None
+            )
+        return self._declared_names
+
     def iter_schemas(self):
         """Creates an iterator for the schemas registered in the instance."""
         for ns_schemas in self.namespaces.values():
@@ -346,6 +566,7 @@ class XsdGlobals(XsdValidator):
         """
         Registers an XMLSchema instance.
         """
+        self._check_not_frozen()
         try:
             ns_schemas = self.namespaces[schema.target_namespace]
         except KeyError:
@@ -363,20 +584,24 @@ class XsdGlobals(XsdValidator):
         :param remove_schemas: removes also the schema instances.
         :param only_unbuilt: removes only not built objects/schemas.
         """
+        self._check_not_frozen()
+        self.restrictions.clear()
+        self.data_classes.clear()
+        self._declared_names = None
+        self._failed_components.clear()
         if only_unbuilt:
             not_built_schemas = {schema for schema in self.iter_schemas() if not schema.built}
             if not not_built_schemas:
                 return
 
             for global_map in self.global_maps:
-                for k in list(global_map.keys()):
-                    obj = global_map[k]
+                local_map = global_map.maps[0]  # base layers contain only built objects
+                for k in list(local_map.keys()):
+                    obj = local_map[k]
                     if not isinstance(obj, XsdComponent) or obj.schema in not_built_schemas:
-                        del global_map[k]
-                        if k in self.substitution_groups:
-                            del self.substitution_groups[k]
-                        if k in self.constraints:
-                            del self.constraints[k]
+                        del local_map[k]
+                        self.substitution_groups.maps[0].pop(k, None)
+                        self.constraints.maps[0].pop(k, None)
 
             if remove_schemas:
                 namespaces = NamespaceResourcesMap()
@@ -387,19 +612,60 @@ class XsdGlobals(XsdValidator):
                 self.namespaces = namespaces
 
         else:
-            for global_map in self.global_maps:
+            for global_map in self._iter_layered_maps():
                 global_map.clear()
-            self.substitution_groups.clear()
-            self.constraints.clear()
+                if remove_schemas:
+                    del global_map.maps[1:]  # detach base layers
 
             if remove_schemas:
                 self.namespaces.clear()
 
-    def build(self):
+    def compact(self, discard_sources=False):
+        """
+        Compacts the maps after a full build, releasing the state that is used only for
+        loading and building the globals. Only the schemas that use the instance as their
+        global maps are compacted, the base layers are left unchanged.
+
+        :param discard_sources: if `True` the XSD source trees of the schemas are discarded. \
+        The links between the source elements are removed, so each component keeps only \
+        its own element, without child nodes, and the other nodes are released. Annotations \
+        are left untouched. After this the globals of the schemas can't be rebuilt.
+        """
+        if self.lazy or not self.built:
+            raise XMLSchemaNotBuiltError(self, "global map %r not built!" % self)
+
+        self.prefetched_resources.clear()
+        self._substitutes.clear()
+        del self._lazy_schemas[:]
+
+        if discard_sources:
+            for schema in self.iter_schemas():
+                if schema.maps is not self:
+                    continue  # a schema of a base layer
+
+                elements = [schema.root]
+                while elements:
+                    elem = elements.pop()
+                    if elem.tag == XSD_ANNOTATION:
+                        continue
+                    elements.extend(elem)
+                    del elem[:]
+                    elem.tail = None
+                    if elem.text is not None and not elem.text.strip():
+                        elem.text = None
+
+    def build(self, lazy=False):
         """
         Build the maps of XSD global definitions/declarations. The global maps are
         updated adding and building the globals of not built registered schemas.
+
+        :param lazy: if `True` the globals of the not built schemas are only loaded \
+        and each global is built on demand, with all the globals reached from it, \
+        at the first lookup. Otherwise all the globals are built, including the ones \
+        left unbuilt by a previous on demand build.
         """
+        self._check_not_frozen()
+        self._declared_names = None
         try:
             meta_schema = self.namespaces[XSD_NAMESPACE][0]
         except KeyError:
@@ -416,72 +682,134 @@ class XsdGlobals(XsdValidator):
                     if schema.meta_schema is not None:
                         schema.meta_schema = meta_schema
             else:
-                for schema in meta_schema.maps.iter_schemas():
-                    self.register(schema)
-
-                self.types.update(meta_schema.maps.types)
-                self.attributes.update(meta_schema.maps.attributes)
-                self.attribute_groups.update(meta_schema.maps.attribute_groups)
-                self.groups.update(meta_schema.maps.groups)
-                self.notations.update(meta_schema.maps.notations)
-                self.elements.update(meta_schema.maps.elements)
-                self.substitution_groups.update(meta_schema.maps.substitution_groups)
-                self.constraints.update(meta_schema.maps.constraints)
+                self.add_base(meta_schema.maps)
 
         not_built_schemas = [schema for schema in self.iter_schemas() if not schema.built]
         for schema in not_built_schemas:
             schema._root_elements = None
 
-        # Load and build global declarations
-        load_xsd_notations(self.notations, not_built_schemas)
-        load_xsd_simple_types(self.types, not_built_schemas)
-        load_xsd_attributes(self.attributes, not_built_schemas)
-        load_xsd_attribute_groups(self.attribute_groups, not_built_schemas)
-        load_xsd_complex_types(self.types, not_built_schemas)
-        load_xsd_elements(self.elements, not_built_schemas)
-        load_xsd_groups(self.groups, not_built_schemas)
+        # Load and build global declarations (schemas loaded for an on demand build are skipped)
+        load_schemas = [schema for schema in not_built_schemas if schema not in self._lazy_schemas]
+        for schema in load_schemas:
+            schema._components.clear()
+        load_xsd_notations(self.notations, load_schemas)
+        load_xsd_simple_types(self.types, load_schemas)
+        load_xsd_attributes(self.attributes, load_schemas)
+        load_xsd_attribute_groups(self.attribute_groups, load_schemas)
+        load_xsd_complex_types(self.types, load_schemas)
+        load_xsd_elements(self.elements, load_schemas)
+        load_xsd_groups(self.groups, load_schemas)
 
         if not meta_schema.built:
             xsd_builtin_types_factory(meta_schema, self.types)
 
-        for qname in self.notations:
+        if lazy or self.lazy:
+            self._lazy_build(load_schemas)
+            if lazy:
+                return
+
+            # Builds all the globals not reached yet, then exits from on demand build mode
+            for global_map, lookup_function in zip(self.global_maps, (
+                    self.lookup_notation, self.lookup_type, self.lookup_attribute,
+                    self.lookup_attribute_group, self.lookup_group, self.lookup_element)):
+                for qname in list(global_map.maps[0]):
+                    lookup_function(qname)
+
+            self.lazy = False
+            self._substitutes.clear()
+            del self._lazy_schemas[:]
+            if self.validation == 'strict' and not self.built:
+                raise XMLSchemaNotBuiltError(self, "global map %r not built!" % self)
+            return
+
+        # Only the first layer of the maps has to be built, the base layers are already built
+        for qname in self.notations.maps[0]:
             self.lookup_notation(qname)
-        for qname in self.attributes:
+        for qname in self.attributes.maps[0]:
             self.lookup_attribute(qname)
-        for qname in self.attribute_groups:
+        for qname in self.attribute_groups.maps[0]:
             self.lookup_attribute_group(qname)
-        for qname in self.types:
+        for qname in self.types.maps[0]:
             self.lookup_type(qname)
-        for qname in self.elements:
+        for qname in self.elements.maps[0]:
             self.lookup_element(qname)
-        for qname in self.groups:
+        for qname in self.groups.maps[0]:
             self.lookup_group(qname)
 
-        # Builds element declarations inside model groups.
+        # Builds element declarations inside model groups. The components are taken from
+        # the indexes of the schemas, that include also the components created by builds.
         for schema in not_built_schemas:
-            for group in schema.iter_components(XsdGroup):
+            for group in schema._iter_indexed_components(XsdGroup):
                 group.build()
 
         for schema in filter(lambda x: x.meta_schema is not None, not_built_schemas):
             # Build key references and assertions (XSD meta-schema doesn't have any of them)
-            for constraint in schema.iter_components(XsdKeyref):
+            for constraint in schema._iter_indexed_components(XsdKeyref):
                 constraint.parse_refer()
-            for assertion in schema.iter_components(XsdAssert):
+            for assertion in schema._iter_indexed_components(XsdAssert):
                 assertion.parse()
             self._check_schema(schema)
 
         if self.validation == 'strict' and not self.built:
             raise XMLSchemaNotBuiltError(self, "global map %r not built!" % self)
 
-    def _check_schema(self, schema):
+    def _lazy_build(self, schemas):
+        """Prepares the loaded schemas for an on demand build of their globals."""
+        self.lazy = True
+        self._lazy_schemas.extend(schemas)
+
+        for qname, obj in self.elements.items():
+            if isinstance(obj, list):
+                elem, schema = obj[-1]
+            elif isinstance(obj, tuple) and len(obj) == 2:
+                elem, schema = obj
+            else:
+                continue
+            if 'substitutionGroup' in elem.attrib and schema in schemas:
+                try:
+                    head_qname = schema.resolve_qname(elem.attrib['substitutionGroup'])
+                except XMLSchemaValueError:
+                    continue  # The error is reported when the element is built
+                try:
+                    self._substitutes[head_qname].append(qname)
+                except KeyError:
+                    self._substitutes[head_qname] = [qname]
+
+        # The default attributes are needed before building complex types
+        for schema in schemas:
+            if schema.XSD_VERSION > '1.0' and isinstance(schema.default_attributes, string_base_type):
+                try:
+                    self.lookup_attribute_group(schema.default_attributes)
+                except KeyError:
+                    pass
+                if not isinstance(schema.default_attributes, XsdAttributeGroup):
+                    schema.default_attributes = None
+                    schema.parse_error("defaultAttributes={!r} doesn't match an attribute group of {!r}"
+                                       .format(schema.root.get('defaultAttributes'), schema), schema.root)
+
+    def _check_schema(self, schema, components=None):
+        """
+        Checks the built globals of a schema.
+
+        :param schema: the schema instance.
+        :param components: an optional list of globals of the schema, built on demand, \
+        to restrict the checks to.
+        """
+        if components is None:
+            substitution_heads = self.substitution_groups
+        else:
+            substitution_heads = [x.name for x in components if x.name in self.substitution_groups]
+
         # Checks substitution groups circularities
-        for qname in self.substitution_groups:
+        for qname in substitution_heads:
             xsd_element = self.elements[qname]
+            if not isinstance(xsd_element, XsdElement):
+                continue
             for e in xsd_element.iter_substitutes():
                 if e is xsd_element:
                     schema.parse_error("circularity found for substitution group with head element %r" % xsd_element)
 
-        if schema.XSD_VERSION > '1.0' and schema.default_attributes is not None:
+        if components is None and schema.XSD_VERSION > '1.0' and schema.default_attributes is not None:
             if not isinstance(schema.default_attributes, XsdAttributeGroup):
                 schema.default_attributes = None
                 schema.parse_error("defaultAttributes={!r} doesn't match an attribute group of {!r}"
@@ -490,14 +818,25 @@ class XsdGlobals(XsdValidator):
         if schema.validation == 'skip':
             return
 
+        if components is None:
+            groups = self.groups.values()
+            complex_types = schema._iter_indexed_components(XsdComplexType)
+        else:
+            groups = components
+            complex_types = (t for c in components for t in c.iter_components(XsdComplexType))
+
         # Check redefined global groups
-        for group in filter(lambda x: x.schema is schema and x.redefine is not None, self.groups.values()):
-            if not any(isinstance(e, XsdGroup) and e.name == group.name for e in group) \
+        for group in groups:
+            if not isinstance(group, XsdGroup) or group.schema is not schema or group.redefine is None:
+                continue
+            elif not any(isinstance(e, XsdGroup) and e.name == group.name for e in group) \
                     and not group.is_restriction(group.redefine):
                 group.parse_error("The redefined group is an illegal restriction of the original group.")
 
-        # Check complex content types models
-        for xsd_type in schema.iter_components(XsdComplexType):
+        # Check complex content types models, the content models shared by
+        # more types (eg. extensions with empty content) are checked once.
+        checked_models = set()
+        for xsd_type in complex_types:
             if not isinstance(xsd_type.content_type, XsdGroup):
                 continue
 
@@ -507,6 +846,9 @@ class XsdGlobals(XsdValidator):
                     if not xsd_type.content_type.is_restriction(base_type.content_type):
                         xsd_type.parse_error("The derived group is an illegal restriction of the base type group.")
 
+            if xsd_type.content_type in checked_models:
+                continue
+
             try:
                 xsd_type.content_type.check_model()
             except XMLSchemaModelDepthError:
@@ -517,3 +859,5 @@ class XsdGlobals(XsdValidator):
                 if self.validation == 'strict':
                     raise
                 xsd_type.errors.append(err)
+            else:
+                checked_models.add(xsd_type.content_type)
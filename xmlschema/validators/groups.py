@@ -12,6 +12,7 @@
 This module contains classes for XML Schema model groups.
 """
 from __future__ import unicode_literals
+import heapq
 
 from ..compat import unicode_type
 from ..exceptions import XMLSchemaValueError
@@ -37,6 +38,51 @@ ANY_ELEMENT = etree_element(
     })
 
 
+class RestrictionItems(object):
+    """
+    The items of a model group checked as a restriction of another model group. The items
+    that are elements without a substitution group are indexed by name, because they can
+    restrict only an element with the same name, so the candidates for a particle of the
+    base group are found without checking all the items of the restriction.
+
+    :param group: the restriction model group.
+    """
+    def __init__(self, group):
+        self._items = list(group)
+        self._removed = set()
+        self._names = {}  # Indexes of the elements without substitution group, by name
+        self._others = []  # Indexes of the other items
+        self._indexes = {}  # Indexes of the items, by id
+        for k, item in enumerate(self._items):
+            self._indexes.setdefault(id(item), []).append(k)
+            if isinstance(item, XsdElement) and item.substitution_group is None:
+                self._names.setdefault(item.name, []).append(k)
+            else:
+                self._others.append(k)
+
+    def __len__(self):
+        return len(self._items) - len(self._removed)
+
+    def iter_candidates(self, other_item):
+        """Iterates the not removed items that can restrict a particle, in model order."""
+        if isinstance(other_item, XsdElement):
+            indexes = heapq.merge(self._names.get(other_item.name, ()), self._others)
+        else:
+            indexes = range(len(self._items))
+
+        for k in indexes:
+            if k not in self._removed:
+                yield self._items[k]
+
+    def remove(self, item):
+        """Removes the first not removed occurrence of an item."""
+        for k in self._indexes.get(id(item), ()):
+            if k not in self._removed:
+                self._removed.add(k)
+                return
+        raise XMLSchemaValueError("%r is not an item of the restriction." % item)
+
+
 class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
     """
     A class for XSD 1.0 model group definitions.
@@ -101,9 +147,7 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
             )
 
     def copy(self):
-        group = object.__new__(self.__class__)
-        group.__dict__.update(self.__dict__)
-        group.errors = self.errors[:]
+        group = super(XsdGroup, self).copy()
         group._group = self._group[:]
         return group
 
@@ -337,6 +381,16 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
         return not self.mixed and not self
 
     def is_restriction(self, other, check_occurs=True):
+        # The results are cached in the global maps, so the checks involving global
+        # groups shared by many content models are evaluated only once.
+        key = self, other, check_occurs
+        try:
+            return self.maps.restrictions[key]
+        except KeyError:
+            result = self.maps.restrictions[key] = self._is_restriction(other, check_occurs)
+            return result
+
+    def _is_restriction(self, other, check_occurs=True):
         if not self:
             return True
         elif self.ref is not None:
@@ -436,10 +490,10 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
             return False
 
         check_occurs = other.max_occurs != 0
-        restriction_items = list(self)
+        restriction_items = RestrictionItems(self)
 
         for other_item in other.iter_model():
-            for item in restriction_items:
+            for item in restriction_items.iter_candidates(other_item):
                 if other_item is item or item.is_restriction(other_item, check_occurs):
                     break
             else:
@@ -455,12 +509,12 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
             return False
 
         check_occurs = other.max_occurs != 0
-        restriction_items = list(self)
+        restriction_items = RestrictionItems(self)
         max_occurs = 0
         other_max_occurs = 0
 
         for other_item in other.iter_model():
-            for item in restriction_items:
+            for item in restriction_items.iter_candidates(other_item):
 
                 if other_item is item or item.is_restriction(other_item, check_occurs):
                     if max_occurs is not None:
@@ -558,6 +612,8 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
 
         model = ModelVisitor(self)
         errors = []
+        projection = kwargs.get('projection')
+        session = kwargs.get('_session')  # a ValidationSession that skips unchanged subtrees
 
         try:
             default_namespace = kwargs['converter'].get('')
@@ -611,6 +667,21 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                 # TODO: use a default decoder str-->str??
                 continue
 
+            if projection is not None:
+                try:
+                    kwargs['projection'] = projection[tag]
+                except KeyError:
+                    # A subtree outside the projection: skipped or only validated
+                    if kwargs.get('validate_unprojected') and validation != 'skip':
+                        kwargs['projection'] = None
+                        for result in xsd_element.iter_decode(child, validation, **kwargs):
+                            if isinstance(result, XMLSchemaValidationError):
+                                yield result
+                    continue
+
+            if session is not None and not session.enter_child(child, elem, xsd_element):
+                continue
+
             if '_no_deep' not in kwargs:  # TODO: Complete lazy validation
                 for result in xsd_element.iter_decode(child, validation, **kwargs):
                     if isinstance(result, XMLSchemaValidationError):
@@ -713,6 +784,7 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
         if not isinstance(converter, XMLSchemaConverter):
             converter = kwargs['converter'] = self.schema.get_converter(converter, **kwargs)
 
+        writer = kwargs.get('_writer')  # an XMLStreamWriter for encoding to a stream
         errors = []
         text = None
         children = []
@@ -761,9 +833,13 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
 
                 if isinstance(xsd_element, XsdAnyElement):
                     value = get_qname(default_namespace, name), value
+                if writer is not None:
+                    writer.start_child(text)
                 for result in xsd_element.iter_encode(value, validation, **kwargs):
                     if isinstance(result, XMLSchemaValidationError):
                         yield result
+                    elif writer is not None:
+                        children = [writer.write_child(result)]
                     else:
                         children.append(result)
 
@@ -779,9 +855,13 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                             and xsd_element.is_matching(name, default_namespace):
                         if isinstance(xsd_element, XsdAnyElement):
                             value = get_qname(default_namespace, name), value
+                        if writer is not None:
+                            writer.start_child(text)
                         for result in xsd_element.iter_encode(value, validation, **kwargs):
                             if isinstance(result, XMLSchemaValidationError):
                                 yield result
+                            elif writer is not None:
+                                children = [writer.write_child(result)]
                             else:
                                 children.append(result)
                         break
@@ -796,7 +876,7 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                 errors.append((index, particle, occurs, expected))
 
         # If the validation is not strict tries to solve model errors with a reorder of the children
-        if errors and validation != 'strict':
+        if errors and validation != 'strict' and writer is None:
             children = self.sort_children(children, default_namespace)
 
         if children:
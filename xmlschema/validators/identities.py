@@ -12,10 +12,14 @@
 This module contains classes for other XML Schema identity constraints.
 """
 from __future__ import unicode_literals
+import os
 import re
+import tempfile
 from collections import Counter
+from decimal import Decimal
 from elementpath import Selector, XPath1Parser, ElementPathError
 
+from ..compat import string_base_type, long_type
 from ..exceptions import XMLSchemaValueError
 from ..qnames import XSD_UNIQUE, XSD_KEY, XSD_KEYREF, XSD_SELECTOR, XSD_FIELD
 from ..helpers import get_qname, qname_to_prefixed
@@ -25,6 +29,170 @@ from ..regex import get_python_regex
 from .exceptions import XMLSchemaValidationError
 from .xsdbase import XsdComponent
 
+KEY_TABLE_THRESHOLD = 1000000
+"""The number of keys over which the key tables of identity constraints are moved to disk."""
+
+KEY_TABLE_BATCH_SIZE = 10000
+"""The number of keys written or looked up with a single query on a disk-backed key table."""
+
+
+def get_key_text(value):
+    """
+    Returns a canonical text for a tuple of field values, used for comparing the keys
+    stored on disk. Numbers are compared by value and lists item by item.
+    """
+    parts = []
+    for item in value:
+        if item is None:
+            parts.append('N')
+        elif isinstance(item, string_base_type):
+            parts.append('s' + item)
+        elif isinstance(item, bool):
+            parts.append('b%d' % item)
+        elif isinstance(item, (int, long_type, float, Decimal)):
+            text = format(Decimal(str(item)), 'f')
+            if '.' in text:
+                text = text.rstrip('0').rstrip('.')
+            parts.append('n0' if text == '-0' else 'n' + text)
+        elif isinstance(item, (list, tuple)):
+            parts.append('l' + '\x1e'.join(get_key_text((x,)) for x in item))
+        else:
+            parts.append('%s:%s' % (item.__class__.__name__, item))
+    return '\x1f'.join(parts)  # a control character that can't be included in XML data
+
+
+class KeyTable(object):
+    """
+    The table of the key values of an identity constraint. The keys are counted in memory
+    until their number exceeds a threshold, then the table is moved to a temporary SQLite
+    database where keys are written and looked up in batches. On disk the keys are compared
+    by their canonical text (see :func:`get_key_text`).
+
+    :param threshold: the maximum number of keys kept in memory, for default is the \
+    value of `KEY_TABLE_THRESHOLD`. If both are `None` the table is never moved to disk.
+    :param directory: the directory of the temporary database, for default the system's \
+    temporary directory is used.
+    """
+    def __init__(self, threshold=None, directory=None):
+        self.threshold = KEY_TABLE_THRESHOLD if threshold is None else threshold
+        self.directory = directory
+        self.counter = Counter()
+        self.unhashable = []  # list of couples with an unhashable key and its count
+        self._batch = []
+        self._db = None
+        self._db_path = None
+
+    def __repr__(self):
+        return '%s(threshold=%r, spilled=%r)' % (self.__class__.__name__, self.threshold, self.spilled)
+
+    def __contains__(self, key):
+        if self._db is not None:
+            return next(self.iter_missing((key,)), None) is None
+        try:
+            return key in self.counter
+        except TypeError:
+            return any(key == k for k, _ in self.unhashable)
+
+    @property
+    def spilled(self):
+        return self._db is not None
+
+    def add(self, key):
+        """Adds a key to the table."""
+        if self._db is not None:
+            self._batch.append((get_key_text(key), repr(key)))
+            if len(self._batch) >= KEY_TABLE_BATCH_SIZE:
+                self._flush()
+            return
+
+        try:
+            self.counter[key] += 1
+        except TypeError:
+            for item in self.unhashable:
+                if item[0] == key:
+                    item[1] += 1
+                    break
+            else:
+                self.unhashable.append([key, 1])
+
+        if self.threshold is not None and len(self.counter) + len(self.unhashable) > self.threshold:
+            self._spill()
+
+    def iter_duplicates(self):
+        """Yields the representations of the keys that are added more than once."""
+        if self._db is not None:
+            self._flush()
+            query = "SELECT MIN(label) FROM keys GROUP BY value HAVING COUNT(*) > 1"
+            for row in self._db.execute(query):
+                yield row[0]
+            return
+
+        for key, count in self.counter.items():
+            if key and count > 1:
+                yield repr(key)
+        for key, count in self.unhashable:
+            if count > 1:
+                yield repr(key)
+
+    def iter_missing(self, keys):
+        """Yields the keys of a sequence that are not in the table."""
+        if self._db is None:
+            for key in keys:
+                if key not in self:
+                    yield key
+            return
+
+        self._flush()
+        for k in range(0, len(keys), KEY_TABLE_BATCH_SIZE):
+            batch = [(get_key_text(key), key) for key in keys[k:k + KEY_TABLE_BATCH_SIZE]]
+            self._db.execute("DELETE FROM lookup")
+            self._db.executemany("INSERT OR IGNORE INTO lookup VALUES (?)", ((x[0],) for x in batch))
+            query = "SELECT value FROM lookup WHERE value IN (SELECT value FROM keys)"
+            found = set(row[0] for row in self._db.execute(query))
+            for text, key in batch:
+                if text not in found:
+                    yield key
+
+    def close(self):
+        """Closes and removes the temporary database, if the table is spilled to disk."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            try:
+                os.remove(self._db_path)
+            except OSError:
+                pass
+            self._db_path = None
+
+    def _spill(self):
+        import sqlite3
+
+        fd, self._db_path = tempfile.mkstemp(suffix='.sqlite', prefix='xmlschema-keys-', dir=self.directory)
+        os.close(fd)
+        self._db = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE keys (value TEXT, label TEXT)")
+        self._db.execute("CREATE TABLE lookup (value TEXT PRIMARY KEY)")
+
+        for key, count in self.counter.items():
+            self._batch.extend([(get_key_text(key), repr(key))] * count)
+            if len(self._batch) >= KEY_TABLE_BATCH_SIZE:
+                self._flush()
+        for key, count in self.unhashable:
+            self._batch.extend([(get_key_text(key), repr(key))] * count)
+        self._flush()
+        self.counter.clear()
+        del self.unhashable[:]
+        self._db.execute("CREATE INDEX keys_value ON keys (value)")
+        self._db.commit()
+
+    def _flush(self):
+        if self._batch:
+            self._db.executemany("INSERT INTO keys VALUES (?, ?)", self._batch)
+            del self._batch[:]
+
+
 XSD_IDENTITY_XPATH_SYMBOLS = {
     'processing-instruction', 'following-sibling', 'preceding-sibling',
     'ancestor-or-self', 'attribute', 'following', 'namespace', 'preceding',
@@ -95,6 +263,13 @@ class XsdFieldSelector(XsdSelector):
 
 
 class XsdIdentity(XsdComponent):
+    """
+    Base class for identity constraints. The key values are collected in tables created
+    with the class attribute *key_table_class*, that can be replaced with a class that
+    provides the same interface of :class:`KeyTable` for plugging another store.
+    """
+    key_table_class = KeyTable
+
     def __init__(self, elem, schema, parent):
         super(XsdIdentity, self).__init__(elem, schema, parent)
 
@@ -196,29 +371,17 @@ class XsdIdentity(XsdComponent):
             yield error
 
     def validator(self, elem):
-        values = Counter()
-        visited_mutable = []
-        duplicate_mutable = []
-        for v in self.iter_values(elem):
-            if isinstance(v, XMLSchemaValidationError):
-                yield v
-            else:
-                try:
-                    values[v] += 1
-                except TypeError as e:
-                    if str(e).startswith('unhashable type'):
-                        if v not in duplicate_mutable:
-                            if v not in visited_mutable:
-                                visited_mutable.append(v)
-                            else:
-                                duplicate_mutable.append(v)
-                    else:
-                        raise TypeError(e)
-        for value, count in values.items():
-            if value and count > 1:
-                yield XMLSchemaValidationError(self, elem, reason="duplicated value {!r}.".format(value))
-        for value in duplicate_mutable:
-            yield XMLSchemaValidationError(self, elem, reason="duplicated value {!r}.".format(value))
+        values = self.key_table_class()
+        try:
+            for v in self.iter_values(elem):
+                if isinstance(v, XMLSchemaValidationError):
+                    yield v
+                else:
+                    values.add(v)
+            for value in values.iter_duplicates():
+                yield XMLSchemaValidationError(self, elem, reason="duplicated value %s." % value)
+        finally:
+            values.close()
 
 
 class XsdUnique(XsdIdentity):
@@ -288,11 +451,16 @@ class XsdKeyref(XsdIdentity):
             self.refer_path = refer_path
 
     def get_refer_values(self, elem):
-        values = set()
-        for e in elem.iterfind(self.refer_path):
-            for v in self.refer.iter_values(e):
-                if not isinstance(v, XMLSchemaValidationError):
-                    values.add(v)
+        """Returns a key table with the values of the referenced key/unique constraint."""
+        values = self.key_table_class()
+        try:
+            for e in elem.iterfind(self.refer_path):
+                for v in self.refer.iter_values(e):
+                    if not isinstance(v, XMLSchemaValidationError):
+                        values.add(v)
+        except Exception:
+            values.close()
+            raise
         return values
 
     def validator(self, elem):
@@ -300,19 +468,38 @@ class XsdKeyref(XsdIdentity):
             return
 
         refer_values = None
-        for v in self.iter_values(elem):
-            if isinstance(v, XMLSchemaValidationError):
-                yield v
-                continue
-
-            if refer_values is None:
-                try:
-                    refer_values = self.get_refer_values(elem)
-                except XMLSchemaValueError as err:
-                    yield XMLSchemaValidationError(self, elem, str(err))
+        batch = []
+        try:
+            for v in self.iter_values(elem):
+                if isinstance(v, XMLSchemaValidationError):
+                    yield v
                     continue
 
-            if v not in refer_values:
-                reason = "Key {!r} with value {!r} not found for identity constraint of element {!r}." \
-                    .format(self.prefixed_name, v, qname_to_prefixed(elem.tag, self.namespaces))
-                yield XMLSchemaValidationError(validator=self, obj=elem, reason=reason)
+                if refer_values is None:
+                    try:
+                        refer_values = self.get_refer_values(elem)
+                    except XMLSchemaValueError as err:
+                        yield XMLSchemaValidationError(self, elem, str(err))
+                        continue
+
+                if not refer_values.spilled:
+                    if v not in refer_values:
+                        yield self.missing_key_error(elem, v)
+                else:
+                    batch.append(v)
+                    if len(batch) >= KEY_TABLE_BATCH_SIZE:
+                        for value in refer_values.iter_missing(batch):
+                            yield self.missing_key_error(elem, value)
+                        del batch[:]
+
+            if batch:
+                for value in refer_values.iter_missing(batch):
+                    yield self.missing_key_error(elem, value)
+        finally:
+            if refer_values is not None:
+                refer_values.close()
+
+    def missing_key_error(self, elem, value):
+        reason = "Key {!r} with value {!r} not found for identity constraint of element {!r}." \
+            .format(self.prefixed_name, value, qname_to_prefixed(elem.tag, self.namespaces))
+        return XMLSchemaValidationError(validator=self, obj=elem, reason=reason)
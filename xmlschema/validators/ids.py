@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains the index of the ID values of an XML document, used for checking
+the uniqueness of IDs and the resolution of IDREF and IDREFS values.
+"""
+import os
+import tempfile
+
+from ..exceptions import XMLSchemaValueError
+
+
+class IdIndex(object):
+    """
+    Index of the xs:ID values of an XML document. The index is filled during the
+    validation or the decoding of the document, recording the IDs with the elements
+    that contain them and collecting the IDREF values that refer to IDs not yet found.
+    At the end of the document the references that are still pending are unresolved.
+
+    >>> id_index = IdIndex()
+    >>> schema.is_valid(xml_document, id_index=id_index)
+    True
+    >>> id_index.get_element('item1')
+    <Element 'item' at ...>
+
+    For documents with a very large number of IDs the index can be spilled to a
+    temporary SQLite database, setting a threshold on the number of entries kept
+    in memory. Element references of spilled IDs are not kept.
+
+    :param keep_elements: if `True` the index keeps a reference to the element of \
+    each ID, otherwise only the ID values are recorded. Has to be `False` for lazy \
+    and streaming processing, where the elements are cleared after their validation.
+    :param spill_threshold: the maximum number of IDs and pending references kept \
+    in memory. For default there is no limit and the index is never spilled to disk.
+    :param directory: the directory where the temporary database is created, for \
+    default the system's temporary directory is used.
+    """
+    def __init__(self, keep_elements=True, spill_threshold=None, directory=None):
+        if spill_threshold is not None and spill_threshold < 1:
+            raise XMLSchemaValueError("spill_threshold must be a positive integer: %r" % spill_threshold)
+
+        self.keep_elements = keep_elements
+        self.spill_threshold = spill_threshold
+        self.directory = directory
+        self.current = None  # The element that is currently decoded
+        self._ids = {}
+        self._refs = {}
+        self._count = 0
+        self._db = None
+        self._db_path = None
+
+    def __repr__(self):
+        return '%s(keep_elements=%r, spill_threshold=%r)' % (
+            self.__class__.__name__, self.keep_elements, self.spill_threshold
+        )
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, value):
+        return value in self._ids or self._db is not None and self._db_contains('ids', value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def spilled(self):
+        """`True` if the index has been spilled to disk."""
+        return self._db is not None
+
+    def add_id(self, value):
+        """
+        Records an ID value for the current element.
+
+        :return: `False` if the ID is duplicated, `True` otherwise.
+        """
+        if value in self:
+            return False
+
+        self._ids[value] = self.current if self.keep_elements else None
+        self._count += 1
+        if self._refs:
+            self._refs.pop(value, None)
+        if self.spill_threshold is not None and len(self._ids) >= self.spill_threshold:
+            self._spill()
+        return True
+
+    def add_idref(self, value):
+        """Records an IDREF value, keeping it as pending if the referred ID is not found yet."""
+        if value not in self._refs and value not in self:
+            self._refs[value] = self.current if self.keep_elements else None
+            if self.spill_threshold is not None and len(self._refs) >= self.spill_threshold:
+                self._spill()
+
+    def get_element(self, value):
+        """
+        Returns the element that contains an ID, `None` if the element reference
+        is not kept by the index.
+
+        :raises: `KeyError` if the ID is not in the index.
+        """
+        try:
+            return self._ids[value]
+        except KeyError:
+            if self._db is None or not self._db_contains('ids', value):
+                raise
+            return None
+
+    def iter_unresolved(self):
+        """
+        Yields the couples with IDREF value and referring element of the references
+        that are not resolved by an ID of the index. The referring element is `None`
+        if it's not kept. Call it at the end of the document.
+        """
+        if self._db is not None:
+            self._spill()
+            cursor = self._db.execute(
+                "SELECT value FROM refs WHERE NOT EXISTS (SELECT 1 FROM ids WHERE ids.value = refs.value)"
+            )
+            for row in cursor:
+                yield row[0], None
+
+        for value, elem in self._refs.items():
+            yield value, elem
+
+    def clear(self):
+        """Clears the index, removing the temporary database if it's spilled."""
+        self.close()
+        self._ids.clear()
+        self._refs.clear()
+        self._count = 0
+        self.current = None
+
+    def close(self):
+        """
+        Closes and removes the temporary database, if it's spilled. After this the IDs and
+        the references that have been spilled to disk are no more available.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            try:
+                os.remove(self._db_path)
+            except OSError:
+                pass
+            self._db_path = None
+
+    def _db_contains(self, table, value):
+        query = "SELECT 1 FROM %s WHERE value = ?" % table
+        return self._db.execute(query, (value,)).fetchone() is not None
+
+    def _spill(self):
+        if self._db is None:
+            import sqlite3
+
+            fd, self._db_path = tempfile.mkstemp(suffix='.sqlite', prefix='xmlschema-ids-', dir=self.directory)
+            os.close(fd)
+            self._db = sqlite3.connect(self._db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = OFF")
+            self._db.execute("PRAGMA synchronous = OFF")
+            self._db.execute("CREATE TABLE ids (value TEXT PRIMARY KEY) WITHOUT ROWID")
+            self._db.execute("CREATE TABLE refs (value TEXT PRIMARY KEY) WITHOUT ROWID")
+
+        if self._ids:
+            self._db.executemany("INSERT INTO ids VALUES (?)", ((k,) for k in self._ids))
+            self._ids.clear()
+        if self._refs:
+            self._db.executemany("INSERT OR IGNORE INTO refs VALUES (?)", ((k,) for k in self._refs))
+            self._refs.clear()
+        self._db.commit()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a push-style validator for XML data that arrives in chunks.
+"""
+from ..exceptions import XMLSchemaValueError
+from ..qnames import XSI_TYPE
+from ..etree import ElementTree, PyElementTree, SafeXMLParser
+from ..resources import XMLResource
+
+from .exceptions import XMLSchemaValidationError
+from .xsdbase import XSD_VALIDATION_MODES
+from .identities import XsdKeyref
+from .ids import IdIndex
+
+
+class IncrementalValidator(object):
+    """
+    Push-style validator that consumes XML data in chunks. The data are parsed with an
+    incremental parser and each child of the root element is validated, and eventually
+    decoded, as soon as it's completed. The root element is checked at the end, calling
+    :meth:`close`. Use :meth:`XMLSchemaBase.incremental_validator` for creating instances.
+
+    >>> validator = schema.incremental_validator()
+    >>> for chunk in chunks:
+    ...     errors = validator.feed(chunk)
+    >>> errors = validator.close()
+
+    The completed children of the root are cleared after their validation, so the whole
+    document is never kept in memory. The subtrees are kept only if the root element has
+    identity constraints, that are checked on the full tree when the validator is closed.
+
+    :param schema: the schema instance used for validation.
+    :param decode: if `True` the decoded data of each child of the root are included in \
+    the results, otherwise only validation errors are returned.
+    :param validation: the XSD validation mode, can be 'strict', 'lax' or 'skip'. \
+    With 'strict' mode the first validation error is raised.
+    :param namespaces: is an optional mapping from namespace prefix to URI.
+    :param use_defaults: indicates whether to use default values for filling missing data.
+    :param kwargs: other options for the decoder and the converter.
+    """
+    def __init__(self, schema, decode=False, validation='lax', namespaces=None, use_defaults=True, **kwargs):
+        if validation not in XSD_VALIDATION_MODES:
+            raise XMLSchemaValueError("validation argument can be 'strict', 'lax' or 'skip': %r" % validation)
+        elif not hasattr(ElementTree, 'XMLPullParser'):
+            raise XMLSchemaValueError("incremental validation requires an XMLPullParser (Python 3.4+)")
+
+        self.schema = schema
+        self.decode = decode
+        self.validation = validation
+        self.namespaces = {} if namespaces is None else dict(namespaces)
+        self.root = None
+        self.xsd_element = None
+        self.closed = False
+
+        self._converter = kwargs.pop('converter', None)
+        self._kwargs = kwargs
+        self._kwargs['use_defaults'] = use_defaults
+        self._level = 0
+        self._keep_subtrees = False
+        self._xsd_type = None
+
+        events = ('start-ns', 'start', 'end')
+        if schema.defuse == 'never':
+            self._parser = ElementTree.XMLPullParser(events)
+        else:
+            # Streamed data have not a known origin, so they are processed as remote data
+            parser = SafeXMLParser(target=PyElementTree.TreeBuilder())
+            self._parser = PyElementTree.XMLPullParser(events, _parser=parser)
+
+    def __repr__(self):
+        return '%s(schema=%r, decode=%r, validation=%r)' % (
+            self.__class__.__name__, self.schema, self.decode, self.validation
+        )
+
+    def feed(self, data):
+        """
+        Feeds a chunk of XML data to the validator.
+
+        :param data: a bytes or a string chunk of XML data.
+        :return: a list with the validation errors and, if decoding is enabled, the \
+        decoded data of the children of the root completed by this chunk.
+        """
+        return list(self.iter_feed(data))
+
+    def iter_feed(self, data):
+        """Like :meth:`feed` but returns an iterator. The chunk is parsed at first call."""
+        self.parse(data)
+        for child in self.iter_completed():
+            for result in self.iter_child_results(child):
+                yield result
+
+    def parse(self, data):
+        """
+        Feeds a chunk of XML data to the parser, without validating the completed elements.
+        Used with :meth:`iter_completed` for implementing custom feeding loops.
+        """
+        if self.closed:
+            raise XMLSchemaValueError("%r is closed." % self)
+        self._parser.feed(data)
+
+    def close(self):
+        """
+        Closes the validator, completing the validation with the checks of the root element.
+
+        :return: a list with the remaining validation errors and decoded data.
+        """
+        if self.closed:
+            raise XMLSchemaValueError("%r is already closed." % self)
+        self.closed = True
+
+        results = []
+        self._parser.close()
+        for child in self.iter_completed():
+            results.extend(self.iter_child_results(child))
+        results.extend(self.iter_root_results())
+        return results
+
+    def iter_completed(self):
+        """
+        Processes the pending parser events, yielding the children of the root that are
+        completed. Each yielded child has to be processed with :meth:`iter_child_results`.
+        """
+        for event, node in self._parser.read_events():
+            if event == 'start-ns':
+                if node[0] not in self.namespaces:
+                    self.namespaces[node[0]] = node[1]
+            elif event == 'start':
+                if self._level == 0:
+                    self._start_root(node)
+                self._level += 1
+            else:
+                self._level -= 1
+                if self._level == 1:
+                    yield node
+
+    def _start_root(self, root):
+        self.root = root
+        kwargs = self._kwargs
+        kwargs['converter'] = converter = self.schema.get_converter(self._converter, self.namespaces, **kwargs)
+        kwargs['source'] = XMLResource(root)
+        kwargs['namespaces'] = self.namespaces
+        if kwargs.get('id_index') is None:
+            kwargs['id_index'] = IdIndex(keep_elements=False)
+
+        self.xsd_element = self.schema.get_element(root.tag, namespaces=self.namespaces)
+        if self.xsd_element is not None:
+            self._keep_subtrees = bool(self.xsd_element.constraints)
+            self._xsd_type = self.xsd_element.type
+            if XSI_TYPE in root.attrib:
+                try:
+                    self._xsd_type = self.schema.maps.lookup_type(converter.unmap_qname(root.attrib[XSI_TYPE]))
+                except KeyError:
+                    pass  # The error is reported with the checks of the root
+
+    def get_child_element(self, child):
+        """Returns the XSD element or wildcard that matches a child of the root, `None` if not found."""
+        try:
+            xsd_elements = self._xsd_type.content_type.iter_elements()
+        except AttributeError:
+            return  # a simple content root
+
+        for xsd_element in xsd_elements:
+            if child.tag in xsd_element.names or \
+                    xsd_element.name is None and xsd_element.is_matching(child.tag, self.namespaces.get('')):
+                return xsd_element
+            for substitute in xsd_element.iter_substitutes():
+                if child.tag in substitute.names:
+                    return substitute
+
+    def iter_child_results(self, child):
+        """
+        Validates a completed child of the root, yielding errors and decoded data. For
+        default the child is cleared after its validation, keeping only the tag and the
+        tail, that are needed for checking the content of the root at the end.
+        """
+        if self.xsd_element is None:
+            return  # The error is reported with the checks of the root
+
+        xsd_element = self.get_child_element(child)
+        if xsd_element is None:
+            return  # The error is reported with the content model check of the root
+
+        if self.validation == 'skip' and not self.decode:
+            pass
+        elif self.decode:
+            for result in xsd_element.iter_decode(child, self.validation, **self._kwargs):
+                yield result
+        else:
+            for result in xsd_element.iter_decode(child, self.validation, **self._kwargs):
+                if isinstance(result, XMLSchemaValidationError):
+                    yield result
+                else:
+                    del result
+
+        if not self._keep_subtrees:
+            tail = child.tail
+            child.clear()
+            child.tail = tail
+
+    def iter_root_results(self):
+        """Yields the errors of the root element checks, to be called after the end of data."""
+        if self.root is None:
+            return
+        elif self.xsd_element is None:
+            if self.validation != 'skip':
+                yield self.schema.validation_error(
+                    self.validation, "%r is not an element of the schema" % self.root, self.root
+                )
+            return
+        elif self.validation == 'skip':
+            return
+
+        for result in self.xsd_element.iter_decode(self.root, self.validation, _no_deep=None, **self._kwargs):
+            if isinstance(result, XMLSchemaValidationError):
+                yield result
+
+        for error in self.schema.iter_idref_errors(self._kwargs['id_index'], self._kwargs['source'], self.validation):
+            yield error
+
+        if self._keep_subtrees:
+            for constraint in self.xsd_element.constraints.values():
+                if isinstance(constraint, XsdKeyref):
+                    for error in constraint(self.root):
+                        yield self.xsd_element.validation_error(
+                            self.validation, error, self.root, **self._kwargs
+                        )
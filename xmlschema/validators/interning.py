@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains the table of the shared strings and values of decoded data.
+"""
+from ..compat import string_base_type, long_type
+from ..exceptions import XMLSchemaValueError
+
+
+class InternTable(object):
+    """
+    A table of the strings and the immutable values that are shared between the data
+    structures decoded with a schema. Each schema has its own table, that is used when
+    decoding with the option *intern_strings* or *share_values*:
+
+    >>> data = schema.to_dict(xml_document, intern_strings=True)
+
+    With *intern_strings* the keys of the decoded data (mapped tags and attribute names,
+    namespace declarations) and the string values of the types restricted by an enumeration
+    are replaced by shared instances, so a string is stored only once for all the decoded
+    data. The table of the schema keeps only the strings limited by the schema, that are the
+    enumeration values and the keys of the declared elements and attributes without a
+    namespace prefix. The other keys depend on the document and are shared through a new
+    table created for each decoding call, that is released with the decoded data. With
+    *share_values* also the other string and integer values are shared through this table.
+    Other numeric types are not shared, because equal values can have different
+    representations (eg. `1.0` and `1.00`).
+
+    :param max_values: the maximum number of values shared with the option *share_values*. \
+    When the limit is reached, only the values already in the table are shared. The keys \
+    and the enumeration values are always added, because their number is limited by the \
+    schema. For default there is no limit.
+    """
+    def __init__(self, max_values=None):
+        if max_values is not None and max_values < 0:
+            raise XMLSchemaValueError("max_values must be a non negative integer: %r" % max_values)
+
+        self.max_values = max_values
+        self._strings = {}
+        self._values = {}
+
+    def __repr__(self):
+        return '%s(max_values=%r)' % (self.__class__.__name__, self.max_values)
+
+    def __len__(self):
+        return len(self._strings) + len(self._values)
+
+    def intern(self, s):
+        """Returns the instance of the table of a string, adding the string if it's not in the table."""
+        value = self._strings.setdefault(s, s)
+        return value if type(value) is type(s) else s
+
+    def share(self, value):
+        """
+        Returns the instance of the table of a string or an integer value. The items
+        of a list are replaced by the instances of the table. Other values are returned
+        unchanged.
+        """
+        if isinstance(value, list):
+            value[:] = [self.share(v) for v in value]
+            return value
+        elif isinstance(value, string_base_type):
+            shared = self._strings.get(value)
+            if shared is None:
+                shared = self._values.get(value)
+        elif type(value) in (int, long_type):
+            shared = self._values.get(value)
+        else:
+            return value
+
+        if shared is None:
+            if self.max_values is None or len(self._values) < self.max_values:
+                self._values[value] = value
+            return value
+        return shared if type(shared) is type(value) else value
+
+    def clear(self):
+        """Clears the table."""
+        self._strings.clear()
+        self._values.clear()
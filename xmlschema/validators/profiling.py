@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains an opt-in profiler for XSD validation, decoding and encoding.
+"""
+import threading
+from collections import namedtuple
+from functools import wraps
+from timeit import default_timer
+
+from ..exceptions import XMLSchemaValueError
+from .xsdbase import XsdComponent
+from .facets import XsdFacet, XsdPatternFacets
+from .identities import XsdIdentity
+from .models import ModelVisitor
+
+
+PROFILE_CATEGORIES = ('component', 'facet', 'pattern', 'model', 'identity')
+
+ProfileRecord = namedtuple('ProfileRecord', 'category component method calls total_time own_time')
+"""
+A profile record. The *total_time* includes the time spent in nested profiled calls,
+the *own_time* excludes it.
+"""
+
+
+def iter_subclasses(cls):
+    """Iterates a class and all its subclasses, each class only once."""
+    visited = set()
+    classes = [cls]
+    while classes:
+        cls = classes.pop()
+        if cls not in visited:
+            visited.add(cls)
+            yield cls
+            classes.extend(cls.__subclasses__())
+
+
+class ComponentProfiler(object):
+    """
+    Opt-in profiler that records call counts and cumulative times of XSD components
+    during validation, decoding and encoding. The instrumentation is installed on the
+    validator classes only when the profiler is enabled and is removed when it's
+    disabled, so there is no overhead when profiling is not active. Only one
+    profiler can be enabled at a time. Can be used also as a context manager:
+
+    >>> with ComponentProfiler() as profiler:
+    ...     schema.validate(xml_document)
+    >>> report = profiler.report(limit=10)
+
+    Profiled calls are grouped into the following categories:
+
+      * 'component': `iter_decode` and `iter_encode` calls of XSD components
+      * 'facet': facet validators, excluding patterns
+      * 'pattern': pattern facets matching
+      * 'model': content model visitor advances, keyed by the root model group
+      * 'identity': identity constraints checks
+
+    :param categories: the categories to profile, for default all categories are profiled.
+    """
+    _active = None
+
+    def __init__(self, categories=None):
+        if categories is None:
+            self.categories = PROFILE_CATEGORIES
+        else:
+            self.categories = tuple(categories)
+            for category in self.categories:
+                if category not in PROFILE_CATEGORIES:
+                    raise XMLSchemaValueError("unknown profile category %r." % category)
+
+        self.stats = {}
+        self._patches = []
+        self._local = threading.local()
+
+    def __repr__(self):
+        return '%s(categories=%r)' % (self.__class__.__name__, self.categories)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    @property
+    def enabled(self):
+        return ComponentProfiler._active is self
+
+    def enable(self):
+        """Installs the instrumentation on validator classes."""
+        if ComponentProfiler._active is self:
+            return
+        elif ComponentProfiler._active is not None:
+            raise XMLSchemaValueError("another profiler is already enabled.")
+
+        ComponentProfiler._active = self
+        if 'component' in self.categories:
+            for cls in iter_subclasses(XsdComponent):
+                for name in ('iter_decode', 'iter_encode'):
+                    self._patch(cls, name, 'component')
+
+        if 'facet' in self.categories or 'pattern' in self.categories:
+            for cls in iter_subclasses(XsdFacet):
+                category = 'pattern' if issubclass(cls, XsdPatternFacets) else 'facet'
+                if category in self.categories:
+                    self._patch(cls, '__call__', category)
+
+        if 'model' in self.categories:
+            for cls in iter_subclasses(ModelVisitor):
+                self._patch(cls, 'advance', 'model', lambda visitor: visitor.root)
+
+        if 'identity' in self.categories:
+            for cls in iter_subclasses(XsdIdentity):
+                self._patch(cls, '__call__', 'identity')
+
+    def disable(self):
+        """Removes the instrumentation from validator classes, keeping collected stats."""
+        if ComponentProfiler._active is not self:
+            return
+        while self._patches:
+            cls, name, method = self._patches.pop()
+            setattr(cls, name, method)
+        ComponentProfiler._active = None
+
+    def reset(self):
+        """Clears collected stats."""
+        self.stats.clear()
+
+    def _patch(self, cls, name, category, get_component=None):
+        try:
+            method = cls.__dict__[name]
+        except KeyError:
+            return  # Inherited method, instrumented on the base class
+        self._patches.append((cls, name, method))
+        setattr(cls, name, self._profiled(method, category, get_component))
+
+    def _profiled(self, method, category, get_component):
+        stats = self.stats
+        local = self._local
+
+        @wraps(method)
+        def profiled_method(obj, *args, **kwargs):
+            component = obj if get_component is None else get_component(obj)
+            key = (category, id(component), method.__name__)  # some components are unhashable
+            try:
+                stack = local.stack
+            except AttributeError:
+                stack = local.stack = []
+
+            if stack and stack[-1][0] == key:
+                # A super() call of an already profiled method of the same component
+                for item in method(obj, *args, **kwargs):
+                    yield item
+                return
+
+            generator = method(obj, *args, **kwargs)
+            total_time = own_time = 0.0
+            try:
+                while True:
+                    frame = [key, 0.0]
+                    stack.append(frame)
+                    start = default_timer()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        break
+                    finally:
+                        elapsed = default_timer() - start
+                        stack.pop()
+                        if stack:
+                            stack[-1][1] += elapsed
+                        total_time += elapsed
+                        own_time += elapsed - frame[1]
+                    yield item
+            finally:
+                try:
+                    record = stats[key]
+                except KeyError:
+                    stats[key] = [component, 1, total_time, own_time]
+                else:
+                    record[1] += 1
+                    record[2] += total_time
+                    record[3] += own_time
+
+        return profiled_method
+
+    def iter_records(self):
+        """Iterates the collected stats as :class:`ProfileRecord` instances."""
+        for (category, _, method), (component, calls, total_time, own_time) in self.stats.items():
+            yield ProfileRecord(category, component, method, calls, total_time, own_time)
+
+    def report(self, category=None, sort_by='own_time', limit=None):
+        """
+        Returns a list with the hottest profiled components.
+
+        :param category: if provided restricts the report to a single category.
+        :param sort_by: the record field for ranking, can be 'own_time', 'total_time' or 'calls'.
+        :param limit: the maximum number of records to return, for default returns all records.
+        :return: a list of :class:`ProfileRecord` instances sorted in descending order.
+        """
+        if sort_by not in ('own_time', 'total_time', 'calls'):
+            raise XMLSchemaValueError("invalid sort field %r." % sort_by)
+        elif category is not None and category not in PROFILE_CATEGORIES:
+            raise XMLSchemaValueError("unknown profile category %r." % category)
+
+        records = [r for r in self.iter_records() if category is None or r.category == category]
+        records.sort(key=lambda x: getattr(x, sort_by), reverse=True)
+        return records if limit is None else records[:limit]
+
+    def format_report(self, category=None, sort_by='own_time', limit=None):
+        """Returns the report as a text table. Takes the same arguments of :meth:`report`."""
+        lines = ['%-10s %10s %12s %12s  %s' % ('category', 'calls', 'total_time', 'own_time', 'component')]
+        for record in self.report(category, sort_by, limit):
+            lines.append('%-10s %10d %12.6f %12.6f  %s.%s' % (
+                record.category, record.calls, record.total_time, record.own_time,
+                _component_label(record.component), record.method
+            ))
+        return '\n'.join(lines)
+
+
+def _component_label(component):
+    name = getattr(component, 'name', None)
+    if name is None:
+        return repr(component)
+    return '%s(name=%r)' % (component.__class__.__name__, getattr(component, 'prefixed_name', name))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains the projection of the decoding on a set of paths.
+"""
+from __future__ import unicode_literals
+import re
+
+from ..compat import string_base_type
+from ..exceptions import XMLSchemaValueError, XMLSchemaTypeError
+
+_SLASHES_OUTSIDE_BRACES = re.compile(r'/(?![^{]*\})')
+
+
+class Projection(object):
+    """
+    A node of a tree of projected paths, that limits the decoding to the elements and the
+    attributes selected by the paths. The paths are relative to the decoded element and
+    are composed by element names separated by slashes, with an optional last step that
+    selects an attribute (eg. 'object/author/name' or 'object/@id'). A step can be also
+    a '*' wildcard, that selects the child elements not matched by other names, or all
+    the attributes with '@*'. An element selected by the last step of a path is decoded
+    with all its content, the ancestors are decoded keeping only the selected children
+    and attributes.
+
+    :param paths: an iterable of paths.
+    :param namespaces: an optional map from prefixes to namespace URIs, used for mapping \
+    prefixed names. The default namespace is applied to names without a prefix.
+    """
+    __slots__ = ('children', 'attributes')
+
+    def __init__(self, paths=(), namespaces=None):
+        self.children = {}  # Child projections, `None` for a whole subtree
+        self.attributes = set()
+
+        if isinstance(paths, string_base_type):
+            raise XMLSchemaTypeError("paths must be an iterable of strings, not a string: %r" % paths)
+        for path in paths:
+            self.add_path(path, namespaces or {})
+
+    def __repr__(self):
+        return '%s(children=%r, attributes=%r)' % (
+            self.__class__.__name__, sorted(self.children), sorted(self.attributes)
+        )
+
+    def __getitem__(self, tag):
+        """
+        Returns the projection of a child element, `None` if the whole subtree is
+        selected. Raises `KeyError` if the element is outside the projection.
+        """
+        try:
+            return self.children[tag]
+        except KeyError:
+            return self.children['*']
+
+    def add_path(self, path, namespaces):
+        steps = _SLASHES_OUTSIDE_BRACES.split(path.strip('/'))
+        if not path or not all(steps):
+            raise XMLSchemaValueError("wrong projection path %r." % path)
+
+        node = self
+        for k, step in enumerate(steps):
+            step = step.strip()
+            if step.startswith('@'):
+                if k < len(steps) - 1:
+                    raise XMLSchemaValueError("an attribute must be the last step of a path: %r." % path)
+                name = step[1:]
+                node.attributes.add(name if name == '*' else self._get_qname(name, namespaces, ''))
+                break
+
+            tag = step if step == '*' else self._get_qname(step, namespaces)
+            if k == len(steps) - 1:
+                node.children[tag] = None
+            else:
+                try:
+                    child = node.children[tag]
+                except KeyError:
+                    child = node.children[tag] = Projection()
+                else:
+                    if child is None:
+                        break  # the whole subtree is already selected
+                node = child
+
+    @staticmethod
+    def _get_qname(name, namespaces, default_namespace=None):
+        if name[0] == '{':
+            return name
+        elif ':' in name:
+            prefix, local_name = name.split(':', 1)
+            try:
+                uri = namespaces[prefix]
+            except KeyError:
+                raise XMLSchemaValueError("prefix %r not found in namespaces map." % prefix)
+        else:
+            local_name = name
+            uri = namespaces.get('', '') if default_namespace is None else default_namespace
+        return '{%s}%s' % (uri, local_name) if uri else local_name
+
+    def filter_attributes(self, attributes):
+        """Returns the decoded attributes selected by the projection."""
+        if '*' in self.attributes:
+            return attributes
+        return [(name, value) for name, value in attributes if name in self.attributes]
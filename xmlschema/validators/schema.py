@@ -28,20 +28,25 @@ Those are the differences between XSD 1.0 and XSD 1.1 and their current developm
   * schema overrides
 """
 import os
-from collections import namedtuple, Counter
+import sys
+from collections import namedtuple
 from abc import ABCMeta
+from multiprocessing.pool import ThreadPool
 import warnings
 
 from ..compat import add_metaclass
 from ..exceptions import XMLSchemaTypeError, XMLSchemaURLError, XMLSchemaValueError, XMLSchemaOSError
 from ..qnames import XSD_SCHEMA, XSD_ANNOTATION, XSD_NOTATION, XSD_ATTRIBUTE, XSD_ATTRIBUTE_GROUP, \
     XSD_GROUP, XSD_SIMPLE_TYPE, XSD_COMPLEX_TYPE, XSD_ELEMENT, XSD_SEQUENCE, XSD_ANY, \
-    XSD_ANY_ATTRIBUTE, XSD_REDEFINE, XSD_OVERRIDE
-from ..helpers import has_xsd_components, get_xsd_derivation_attribute, get_xsd_form_attribute
+    XSD_ANY_ATTRIBUTE, XSD_INCLUDE, XSD_IMPORT, XSD_REDEFINE, XSD_OVERRIDE
+from ..helpers import has_xsd_components, get_xsd_derivation_attribute, get_xsd_form_attribute, \
+    get_namespace, get_qname
 from ..namespaces import XSD_NAMESPACE, XML_NAMESPACE, XSI_NAMESPACE, XHTML_NAMESPACE, \
     XLINK_NAMESPACE, NamespaceResourcesMap, NamespaceView
 from ..etree import etree_element, etree_tostring, ParseError
-from ..resources import is_remote_url, url_path_is_file, fetch_resource, XMLResource
+from ..resources import is_remote_url, url_path_is_file, resolve_location, resolve_namespace, \
+    fetch_resource, open_url, XMLResource
+from ..openers import UrlResponse
 from ..converters import XMLSchemaConverter
 from ..xpath import ElementPathMixin
 
@@ -56,6 +61,16 @@ from .complex_types import XsdComplexType, Xsd11ComplexType
 from .groups import XsdGroup, Xsd11Group
 from .elements import XsdElement, Xsd11Element
 from .wildcards import XsdAnyElement, XsdAnyAttribute, Xsd11AnyElement, Xsd11AnyAttribute
+from .ids import IdIndex
+from .projection import Projection
+from .interning import InternTable
+from .incremental import IncrementalValidator
+from .sessions import ValidationSession
+from .streaming import XMLStreamWriter
+if sys.version_info >= (3, 6):
+    from .asynchronous import async_iter_errors, async_iter_decode
+else:
+    async_iter_errors = async_iter_decode = None
 from .globals_ import iterchildren_xsd_import, iterchildren_xsd_include, \
     iterchildren_xsd_redefine, iterchildren_xsd_override, XsdGlobals
 
@@ -142,8 +157,9 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     Base class for an XML Schema instance.
 
     :param source: an URI that reference to a resource or a file path or a file-like \
-    object or a string containing the schema or an Element or an ElementTree document.
-    :type source: Element or ElementTree or str or file-like object
+    object or a string containing the schema or an Element or an ElementTree document \
+    or a not lazy :class:`XMLResource` instance.
+    :type source: Element or ElementTree or str or file-like object or XMLResource
     :param namespace: is an optional argument that contains the URI of the namespace. \
     When specified it must be equal to the *targetNamespace* declared in the schema.
     :type namespace: str or None
@@ -152,7 +168,8 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     :type validation: str
     :param global_maps: is an optional argument containing an :class:`XsdGlobals` \
     instance, a mediator object for sharing declaration data between dependents \
-    schema instances.
+    schema instances. Provide the result of :meth:`XsdGlobals.new_child` called on \
+    the maps of a built schema for sharing its components with the new schema.
     :type global_maps: XsdGlobals or None
     :param converter: is an optional argument that can be an :class:`XMLSchemaConverter` \
     subclass or instance, used for defining the default XML data converter for XML Schema instance.
@@ -174,6 +191,14 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     meta-schema is added at the end. In the latter case the meta-schema is rebuilt if any base \
     namespace has been overridden by an import. Ignored if the argument *global_maps* is provided.
     :type use_meta: bool
+    :param max_workers: if provided the included and imported schema documents are fetched \
+    and parsed in parallel, using a pool with this number of threads, before building their \
+    schema instances. For default the documents are loaded one after another.
+    :type max_workers: int or None
+    :param lazy_build: if `True` the schema maps are built on demand, building each global \
+    component, with all the components reached from it, only when it's used for the first \
+    time. A full build can be forced later calling :meth:`build`. Ignored if *build* is `False`.
+    :type lazy_build: bool
 
     :cvar XSD_VERSION: store the XSD version (1.0 or 1.1).
     :vartype XSD_VERSION: str
@@ -222,6 +247,9 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     :vartype warnings: dict
     :ivar warnings: warning messages about failure of import and include elements.
     :vartype warnings: list
+    :ivar intern_table: the table of the keys of declared names and of the enumeration \
+    values shared by the data decoded with the options *intern_strings* and *share_values*.
+    :vartype intern_table: InternTable
 
     :ivar notations: `xsd:notation` declarations.
     :vartype notations: NamespaceView
@@ -251,13 +279,19 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     default_attributes = None  # for XSD 1.1
 
     def __init__(self, source, namespace=None, validation='strict', global_maps=None, converter=None,
-                 locations=None, base_url=None, defuse='remote', timeout=300, build=True, use_meta=True):
+                 locations=None, base_url=None, defuse='remote', timeout=300, build=True, use_meta=True,
+                 max_workers=None, lazy_build=False):
         super(XMLSchemaBase, self).__init__(validation)
-        self.source = XMLResource(source, base_url, defuse, timeout, lazy=False)
+        if isinstance(source, XMLResource) and not source.is_lazy():
+            self.source = source
+        else:
+            self.source = XMLResource(source, base_url, defuse, timeout, lazy=False)
         self.imports = {}
         self.includes = {}
         self.warnings = []
         self._root_elements = None
+        self._components = {}  # Index of the components of the schema by class
+        self.intern_table = InternTable()
         root = self.source.root
 
         # Parse namespaces and targetNamespace
@@ -335,7 +369,7 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                 self.maps = XsdGlobals(self, validation)
                 self.locations.update(self.BASE_SCHEMAS)
             elif self.target_namespace not in self.BASE_SCHEMAS:
-                self.maps = self.meta_schema.maps.copy(self, validation=validation)
+                self.maps = self.meta_schema.maps.new_child(self, validation=validation)
             else:
                 base_schemas = {k: v for k, v in self.BASE_SCHEMAS.items() if k != self.target_namespace}
                 meta_schema = self.create_meta_schema(base_schemas=base_schemas)
@@ -354,14 +388,22 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             self.errors.extend([e for e in self.meta_schema.iter_errors(root, namespaces=self.namespaces)])
 
         # Includes and imports schemas (errors are treated as warnings)
-        self._include_schemas()
-        self._import_namespaces()
+        if max_workers is None:
+            self._include_schemas()
+            self._import_namespaces()
+        else:
+            self._prefetch_resources(max_workers)
+            try:
+                self._include_schemas()
+                self._import_namespaces()
+            finally:
+                self.maps.prefetched_resources.clear()
 
         if '' not in self.namespaces:
             self.namespaces[''] = ''  # For default local names are mapped to no namespace
 
         if build:
-            self.maps.build()
+            self.maps.build(lazy=lazy_build)
 
     def __repr__(self):
         if self.url:
@@ -377,12 +419,13 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             if self.meta_schema is None and hasattr(self, 'maps'):
                 raise XMLSchemaValueError("cannot change the global maps instance of a meta-schema")
             super(XMLSchemaBase, self).__setattr__(name, value)
-            self.notations = NamespaceView(value.notations, self.target_namespace)
-            self.types = NamespaceView(value.types, self.target_namespace)
-            self.attributes = NamespaceView(value.attributes, self.target_namespace)
-            self.attribute_groups = NamespaceView(value.attribute_groups, self.target_namespace)
-            self.groups = NamespaceView(value.groups, self.target_namespace)
-            self.elements = NamespaceView(value.elements, self.target_namespace)
+            self.notations = NamespaceView(value.notations, self.target_namespace, value.view_lookup('notations'))
+            self.types = NamespaceView(value.types, self.target_namespace, value.view_lookup('types'))
+            self.attributes = NamespaceView(value.attributes, self.target_namespace, value.view_lookup('attributes'))
+            self.attribute_groups = NamespaceView(value.attribute_groups, self.target_namespace,
+                                                  value.view_lookup('attribute_groups'))
+            self.groups = NamespaceView(value.groups, self.target_namespace, value.view_lookup('groups'))
+            self.elements = NamespaceView(value.elements, self.target_namespace, value.view_lookup('elements'))
             self.substitution_groups = NamespaceView(value.substitution_groups, self.target_namespace)
             self.constraints = NamespaceView(value.constraints, self.target_namespace)
             self.global_maps = (self.notations, self.types, self.attributes,
@@ -394,10 +437,14 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             super(XMLSchemaBase, self).__setattr__(name, value)
 
     def __iter__(self):
+        if self.maps.lazy:
+            self._build_elements()
         for xsd_element in sorted(self.elements.values(), key=lambda x: x.name):
             yield xsd_element
 
     def __reversed__(self):
+        if self.maps.lazy:
+            self._build_elements()
         for xsd_element in sorted(self.elements.values(), key=lambda x: x.name, reverse=True):
             yield xsd_element
 
@@ -510,7 +557,10 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         """
         if not self.elements:
             return []
-        elif len(self.elements) == 1:
+        elif self.maps.lazy:
+            self._build_elements()
+
+        if len(self.elements) == 1:
             return list(self.elements.values())
         elif self._root_elements is None:
             names = set(e.name for e in self.elements.values())
@@ -614,9 +664,56 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             raise error
 
     def build(self):
-        """Builds the schema XSD global maps."""
+        """Builds the schema XSD global maps. Completes also an on demand build."""
         self.maps.build()
 
+    def freeze(self):
+        """
+        Completes all the deferred work of the schema and makes its global maps immutable,
+        so the schema can be shared by concurrent threads for validation, decoding and
+        encoding without locks. Completes an on demand build, imports the namespaces of
+        the wildcards that have a location hint and computes the root elements. After
+        this the global maps can't be extended, so the wildcards don't import schemas
+        during validation. Converters are created for each call, a converter instance
+        passed as argument is copied, so it's never shared between calls.
+
+        :raises: :exc:`XMLSchemaNotBuiltError` if the schema is not built.
+        """
+        if self.maps.frozen:
+            return
+        elif self.maps.lazy:
+            self.maps.build()
+
+        if not self.built:
+            raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
+
+        loaded_schemas = set()
+        while True:
+            schemas = [x for x in self.maps.iter_schemas() if x.maps is self.maps and x not in loaded_schemas]
+            if not schemas:
+                break
+            for schema in schemas:
+                loaded_schemas.add(schema)
+                for wildcard in schema.iter_components((XsdAnyElement, XsdAnyAttribute)):
+                    for namespace in list(wildcard.schema.locations):
+                        if wildcard.is_namespace_allowed(namespace):
+                            wildcard._load_namespace(namespace)
+
+        for schema in self.maps.iter_schemas():
+            if schema.maps is self.maps:
+                schema.root_elements
+        self.maps.frozen = True
+
+    @property
+    def frozen(self):
+        """`True` if the schema is frozen, see :meth:`freeze`."""
+        return self.maps.frozen
+
+    def _build_elements(self):
+        """Builds the global elements of the schema namespace in on demand build mode."""
+        for name in self.elements:
+            self.maps.lookup_element(get_qname(self.target_namespace, name))
+
     @property
     def built(self):
         xsd_global = None
@@ -667,14 +764,17 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         """
         if schema is None:
             for global_map in self.global_maps:
-                for obj in global_map.values():
+                for obj in global_map.as_dict().values():
                     yield obj
         else:
             for global_map in self.global_maps:
-                for obj in global_map.values():
+                for obj in global_map.as_dict().values():
                     if isinstance(obj, tuple):
                         if obj[1] == schema:
                             yield obj
+                    elif isinstance(obj, list):
+                        if obj[-1][1] == schema:
+                            yield obj  # Not built global with redefinitions
                     elif obj.schema == schema:
                         yield obj
 
@@ -682,9 +782,42 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         if xsd_classes is None or isinstance(self, xsd_classes):
             yield self
         for xsd_global in self.iter_globals(self):
+            if not isinstance(xsd_global, XsdComponent):
+                continue  # Not built global of an on demand build
             for obj in xsd_global.iter_components(xsd_classes):
                 yield obj
 
+    def components_by_class(self, xsd_classes=None):
+        """
+        Returns a list with the XSD components of the schema, taken from an index where
+        the components are registered by class when they are created, without traversing
+        the component tree. The index is reset when the globals of the schema are loaded
+        again by a build of the global maps.
+
+        :param xsd_classes: returns only the components that are instances of a class \
+        or of a tuple of classes, otherwise returns all the components of the schema.
+        """
+        if xsd_classes is None:
+            return [c for components in self._components.values() for c in components]
+        return list(self._iter_indexed_components(xsd_classes))
+
+    def _iter_indexed_components(self, xsd_classes):
+        # Iterates the index while it grows, so the components created by
+        # the consumer of the iterator (eg. building groups) are included.
+        positions = {}
+        while True:
+            found = False
+            for cls, components in list(self._components.items()):
+                if issubclass(cls, xsd_classes):
+                    k = positions.get(cls, 0)
+                    while k < len(components):
+                        yield components[k]
+                        k += 1
+                        found = True
+                    positions[cls] = k
+            if not found:
+                break
+
     def get_locations(self, namespace):
         """
         Get a list of location hints for a namespace.
@@ -717,12 +850,107 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
 
     def get_element(self, tag, path=None, namespaces=None):
         if not path:
+            if self.maps.lazy:
+                if tag not in self.maps.elements or get_namespace(tag) != self.target_namespace:
+                    return
+                return self.maps.lookup_element(tag)
             return self.find(tag)
         elif path[-1] == '*':
             return self.find(path[:-1] + tag, namespaces)
         else:
             return self.find(path, namespaces)
 
+    def _iter_prefetch_locations(self, resource):
+        """
+        Yields the locations of schema documents referred by include, redefine, override and
+        import statements of an XML resource. For imports only the first location that will be
+        tried by :meth:`_import_namespaces` is yielded.
+        """
+        include_tags = {XSD_INCLUDE, XSD_REDEFINE} if self.XSD_VERSION == '1.0' \
+            else {XSD_INCLUDE, XSD_REDEFINE, XSD_OVERRIDE}
+
+        for child in resource.root:
+            if child.tag in include_tags:
+                if child.get('schemaLocation'):
+                    yield child.attrib['schemaLocation']
+
+            elif child.tag == XSD_IMPORT:
+                namespace = child.get('namespace', '')
+                if namespace in self.maps.namespaces:
+                    continue
+
+                location = child.get('schemaLocation')
+                if namespace and (not location or is_remote_url(location)):
+                    for url in self.get_locations(namespace):
+                        if url and (not location or url_path_is_file(url)):
+                            location = url
+                            break
+                if location:
+                    yield location
+
+    def _prefetch_resources(self, max_workers):
+        """
+        Discovers the include/import graph of the schema and loads the schema documents
+        using a pool of threads, one level of the graph at a time. Loaded resources are
+        stored in the global maps and then consumed by :meth:`include_schema` and
+        :meth:`import_schema`, so the registration order of the components is unchanged.
+        Documents that fail to load are skipped, leaving the error processing to the
+        sequential include/import steps.
+
+        :param max_workers: the number of threads of the pool.
+        """
+        def load_resource(url):
+            try:
+                fp = open_url(url, timeout=self.timeout)
+                try:
+                    data = fp.read()
+                finally:
+                    fp.close()
+                resource = XMLResource(UrlResponse(data, url), defuse=self.defuse, timeout=self.timeout, lazy=False)
+                resource.load(data)  # Keep the text for namespace extraction without fetching again
+            except (OSError, IOError, ValueError, TypeError, ParseError):
+                return
+            else:
+                return resource
+
+        prefetched_resources = self.maps.prefetched_resources
+        visited = {self.url}
+        resources = [self.source]
+        pool = ThreadPool(max_workers)
+        try:
+            while resources:
+                urls = []
+                for resource in resources:
+                    for location in self._iter_prefetch_locations(resource):
+                        url = resolve_location(location, resource.base_url)
+                        if url not in visited:
+                            visited.add(url)
+                            urls.append(url)
+
+                resources = []
+                for url, resource in zip(urls, pool.map(load_resource, urls)):
+                    if resource is not None:
+                        prefetched_resources[url] = resource
+                        resources.append(resource)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _fetch_schema_source(self, location, base_url=None):
+        """
+        Returns the URL and the source for creating a schema instance from a location,
+        using a prefetched resource if available. Skips the access to the resource if
+        the location refers to an already loaded schema.
+        """
+        url = resolve_location(location, base_url) if location else None
+        try:
+            return url, self.maps.prefetched_resources.pop(url)
+        except KeyError:
+            if url is not None and any(url == schema.url for schema in self.maps.iter_schemas()):
+                return url, url
+            url = fetch_resource(location, base_url)
+            return url, url
+
     def _include_schemas(self):
         """Processes schema document inclusions and redefinitions."""
         for child in iterchildren_xsd_include(self.root):
@@ -775,13 +1003,13 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         :param base_url: is an optional base URL for fetching the schema resource.
         :return: the included :class:`XMLSchema` instance.
         """
-        schema_url = fetch_resource(location, base_url)
+        schema_url, source = self._fetch_schema_source(location, base_url)
         for schema in self.maps.namespaces[self.target_namespace]:
             if schema_url == schema.url:
                 break
         else:
             schema = self.create_schema(
-                schema_url, self.target_namespace, self.validation, self.maps, self.converter,
+                source, self.target_namespace, self.validation, self.maps, self.converter,
                 self.locations, self.base_url, self.defuse, self.timeout, False
             )
 
@@ -836,6 +1064,10 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                 if local_hints:
                     locations = local_hints + locations
 
+            if namespace and resolve_namespace(namespace) is not None:
+                # A namespace mapped by the XML catalog is imported from its local copy
+                locations = [resolve_namespace(namespace)] + locations
+
             import_error = None
             for url in locations:
                 try:
@@ -883,7 +1115,7 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                 self.imports[namespace] = self.maps.namespaces[namespace][0]
                 return self.imports[namespace]
 
-        schema_url = fetch_resource(location, base_url)
+        schema_url, source = self._fetch_schema_source(location, base_url)
         if self.imports.get(namespace) is not None and self.imports[namespace].url == schema_url:
             return self.imports[namespace]
         elif namespace in self.maps.namespaces:
@@ -893,7 +1125,7 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                     return schema
 
         schema = self.create_schema(
-            schema_url, None, self.validation, self.maps, self.converter,
+            source, None, self.validation, self.maps, self.converter,
             self.locations, self.base_url, self.defuse, self.timeout, False
         )
         if schema.target_namespace != namespace:
@@ -943,24 +1175,27 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             )
         return '{%s}%s' % (namespace, local_name)
 
-    def validate(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None):
+    def validate(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None,
+                 id_index=None, cache=None):
         """
         Validates an XML data against the XSD schema/component instance.
 
         :raises: :exc:`XMLSchemaValidationError` if XML *data* instance is not a valid.
         """
-        for error in self.iter_errors(source, path, schema_path, use_defaults, namespaces):
+        for error in self.iter_errors(source, path, schema_path, use_defaults, namespaces, id_index, cache):
             raise error
 
-    def is_valid(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None):
+    def is_valid(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None,
+                 id_index=None, cache=None):
         """
         Like :meth:`validate` except that do not raises an exception but returns ``True`` if
         the XML document is valid, ``False`` if it's invalid.
         """
-        error = next(self.iter_errors(source, path, schema_path, use_defaults, namespaces), None)
+        error = next(self.iter_errors(source, path, schema_path, use_defaults, namespaces, id_index, cache), None)
         return error is None
 
-    def iter_errors(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None):
+    def iter_errors(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None,
+                    id_index=None, cache=None):
         """
         Creates an iterator for the errors generated by the validation of an XML data
         against the XSD schema/component instance.
@@ -974,10 +1209,28 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         decoding. Useful if the root of the XML data doesn't match an XSD global element of the schema.
         :param use_defaults: Use schema's default values for filling missing data.
         :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param id_index: an optional :class:`IdIndex` instance to fill with the IDs of the \
+        XML data. Provide it for looking up elements by ID after the validation or for \
+        bounding the memory used by the index. IDREF values are checked only if the \
+        whole document is validated.
+        :param cache: an optional :class:`ResultCache` instance. If the source has already \
+        been validated with the same options the stored errors are returned, otherwise the \
+        whole document is validated and the errors are stored.
         """
-        if not self.built:
+        if not self.built and not self.maps.lazy:
             raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
-        elif not isinstance(source, XMLResource):
+        elif cache is not None:
+            key = cache.get_key(self, source, 'errors', path, schema_path, use_defaults, namespaces, id_index)
+            if key is not None:
+                errors = cache.get(key)
+                if errors is None:
+                    errors = list(self.iter_errors(source, path, schema_path, use_defaults, namespaces))
+                    cache.put(key, errors)
+                for error in errors:
+                    yield error
+                return
+
+        if not isinstance(source, XMLResource):
             source = XMLResource(source=source, defuse=self.defuse, timeout=self.timeout, lazy=False)
 
         if not schema_path and path:
@@ -986,7 +1239,9 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         namespaces = {} if namespaces is None else namespaces.copy()
         namespaces.update(source.get_namespaces())
 
-        id_map = Counter()
+        check_idrefs = path is None
+        if id_index is None:
+            id_index = IdIndex(keep_elements=not source.is_lazy())
 
         if source.is_lazy() and path is None:
             # TODO: Document validation in lazy mode.
@@ -997,7 +1252,7 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                 yield self.validation_error('lax', "%r is not an element of the schema" % source.root, source.root)
 
             for result in xsd_element.iter_decode(source.root, source=source, namespaces=namespaces,
-                                                  use_defaults=use_defaults, id_map=id_map, _no_deep=None):
+                                                  use_defaults=use_defaults, id_index=id_index, _no_deep=None):
                 if isinstance(result, XMLSchemaValidationError):
                     yield result
                 else:
@@ -1013,15 +1268,102 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                 yield self.validation_error('lax', "%r is not an element of the schema" % elem, elem)
 
             for result in xsd_element.iter_decode(elem, source=source, namespaces=namespaces,
-                                                  use_defaults=use_defaults, id_map=id_map):
+                                                  use_defaults=use_defaults, id_index=id_index):
                 if isinstance(result, XMLSchemaValidationError):
                     yield result
                 else:
                     del result
 
+        if check_idrefs:
+            for error in self.iter_idref_errors(id_index, source):
+                yield error
+
+    def iter_idref_errors(self, id_index, source, validation='lax'):
+        """
+        Yields an error for each IDREF value that is not resolved by the IDs of an index.
+        The errors refer to the element that contains the IDREF value, or to the root of
+        the XML resource if the index doesn't keep element references.
+
+        :param id_index: an :class:`IdIndex` instance filled by the validation of a document.
+        :param source: the :class:`XMLResource` instance of the validated document.
+        :param validation: the XSD validation mode, can be 'strict' or 'lax'.
+        """
+        for value, elem in id_index.iter_unresolved():
+            reason = "IDREF value {!r} does not match any xsd:ID of the document".format(value)
+            yield self.validation_error(validation, reason, source.root if elem is None else elem)
+
+    def incremental_validator(self, decode=False, validation='lax', namespaces=None, use_defaults=True, **kwargs):
+        """
+        Creates a push-style validator for XML data that are provided in chunks, validating
+        and eventually decoding each child of the root element as soon as it's completed.
+
+        :param decode: if `True` the decoded data of the children of the root are returned \
+        together with validation errors.
+        :param validation: the XSD validation mode, can be 'strict', 'lax' or 'skip'.
+        :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param use_defaults: indicates whether to use default values for filling missing data.
+        :param kwargs: keyword arguments with other options for converter and decoder.
+        :return: an :class:`IncrementalValidator` instance.
+        """
+        if not self.built and not self.maps.lazy:
+            raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
+        return IncrementalValidator(self, decode, validation, namespaces, use_defaults, **kwargs)
+
+    def validation_session(self, source, namespaces=None, use_defaults=True):
+        """
+        Creates a validation session for an element tree that is modified in place, that
+        after the first validation revalidates only the changed parts of the tree.
+
+        :param source: the Element or the ElementTree instance to validate.
+        :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param use_defaults: indicates whether to use default values for filling missing data.
+        :return: a :class:`ValidationSession` instance.
+        """
+        if not self.built and not self.maps.lazy:
+            raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
+        return ValidationSession(self, source, namespaces, use_defaults)
+
+    def aiter_errors(self, chunks, use_defaults=True, namespaces=None, **kwargs):
+        """
+        Creates an asynchronous iterator for the errors generated by the validation of an
+        asynchronous stream of XML data. The data are parsed and validated incrementally,
+        returning the control to the event loop between bounded steps. Requires Python 3.6+.
+
+        :param chunks: an asynchronous iterable of bytes or string chunks of XML data.
+        :param use_defaults: Use schema's default values for filling missing data.
+        :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param kwargs: options for the processing of the stream: *slice_size* is the maximum \
+        size of the data parsed in a single step, *offload_threshold* is the minimum number \
+        of elements of a child of the root for validating it in an *executor* (the default \
+        executor of the event loop if it's not provided).
+        """
+        if async_iter_errors is None:
+            raise XMLSchemaValueError("the asynchronous API requires Python 3.6+")
+        return async_iter_errors(self, chunks, use_defaults, namespaces, **kwargs)
+
+    def aiter_decode(self, chunks, validation='lax', namespaces=None, use_defaults=True, **kwargs):
+        """
+        Creates an asynchronous iterator for decoding an asynchronous stream of XML data,
+        yielding the decoded data of each child of the root element, eventually preceded by
+        validation errors. Requires Python 3.6+.
+
+        :param chunks: an asynchronous iterable of bytes or string chunks of XML data.
+        :param validation: defines the XSD validation mode to use for decode, can be 'strict', \
+        'lax' or 'skip'.
+        :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param use_defaults: indicates whether to use default values for filling missing data.
+        :param kwargs: the options of :meth:`aiter_errors` for the processing of the stream \
+        and other options for converter and decoder.
+        """
+        if async_iter_decode is None:
+            raise XMLSchemaValueError("the asynchronous API requires Python 3.6+")
+        return async_iter_decode(self, chunks, validation, namespaces, use_defaults, **kwargs)
+
     def iter_decode(self, source, path=None, schema_path=None, validation='lax', process_namespaces=True,
                     namespaces=None, use_defaults=True, decimal_type=None, datetime_types=False,
-                    converter=None, filler=None, fill_missing=False, **kwargs):
+                    converter=None, filler=None, fill_missing=False, projection=None,
+                    validate_unprojected=False, cache=None, intern_strings=False, share_values=False,
+                    **kwargs):
         """
         Creates an iterator for decoding an XML source to a data structure.
 
@@ -1049,15 +1391,52 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         an attribute declaration. If not provided undecodable data is replaced by `None`.
         :param fill_missing: if set to `True` the decoder fills also missing attributes. \
         The filling value is `None` or a typed value if the *filler* callback is provided.
+        :param projection: an optional iterable of paths, relative to the decoded elements, \
+        or a :class:`Projection` instance. If provided only the selected elements and \
+        attributes and their ancestors are decoded, see :class:`Projection`.
+        :param validate_unprojected: if set to `True` the subtrees outside the projection \
+        are validated, discarding their decoded data. For default they are skipped without \
+        validation and the xs:IDREF values are not checked.
+        :param cache: an optional :class:`ResultCache` instance. If the source has already \
+        been decoded with the same options the stored results are returned, otherwise the \
+        whole document is decoded and the results are stored.
+        :param intern_strings: if set to `True` the keys of the decoded data and the string \
+        values of the types restricted by an enumeration are shared, reducing the memory used \
+        by large decoded data. The keys of declared names and the enumeration values are kept \
+        by the table of the schema (see :class:`InternTable`), the keys that depend on the \
+        document by a table created for the decoding call.
+        :param share_values: if set to `True` also the other string and integer values of the \
+        decoded data are shared, through the table created for the decoding call. Implies \
+        *intern_strings*.
         :param kwargs: keyword arguments with other options for converter and decoder.
         :return: yields a decoded data object, eventually preceded by a sequence of validation \
         or decoding errors.
         """
-        if not self.built:
+        if not self.built and not self.maps.lazy:
             raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
         elif validation not in XSD_VALIDATION_MODES:
             raise XMLSchemaValueError("validation argument can be 'strict', 'lax' or 'skip': %r" % validation)
-        elif not isinstance(source, XMLResource):
+        elif cache is not None:
+            key = cache.get_key(
+                self, source, 'decode', path, schema_path, validation, process_namespaces, namespaces,
+                use_defaults, decimal_type, datetime_types, converter, filler, fill_missing,
+                projection, validate_unprojected, intern_strings, share_values, kwargs
+            )
+            if key is not None:
+                results = cache.get(key)
+                if results is None:
+                    results = list(self.iter_decode(
+                        source, path, schema_path, validation, process_namespaces, namespaces,
+                        use_defaults, decimal_type, datetime_types, converter, filler, fill_missing,
+                        projection, validate_unprojected, intern_strings=intern_strings,
+                        share_values=share_values, **kwargs
+                    ))
+                    cache.put(key, results)
+                for obj in results:
+                    yield obj
+                return
+
+        if not isinstance(source, XMLResource):
             source = XMLResource(source=source, defuse=self.defuse, timeout=self.timeout, lazy=False)
 
         if not schema_path and path:
@@ -1069,8 +1448,27 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         else:
             namespaces = {}
 
+        if intern_strings or share_values:
+            kwargs['intern_table'] = self.intern_table
+            kwargs['value_table'] = InternTable()  # released with the decoded data
+            kwargs['declared_names'] = self.maps.declared_names
+            if share_values:
+                kwargs['share_values'] = True
+
         converter = self.get_converter(converter, namespaces, **kwargs)
-        id_map = Counter()
+        check_idrefs = path is None
+        if projection is not None:
+            if not isinstance(projection, Projection):
+                projection = Projection(projection, namespaces)
+            kwargs['projection'] = projection
+            if validate_unprojected:
+                kwargs['validate_unprojected'] = True
+            else:
+                check_idrefs = False
+
+        id_index = kwargs.pop('id_index', None)
+        if id_index is None:
+            id_index = IdIndex(keep_elements=not source.is_lazy())
         if decimal_type is not None:
             kwargs['decimal_type'] = decimal_type
 
@@ -1082,9 +1480,13 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             for obj in xsd_element.iter_decode(
                     elem, validation, converter=converter, source=source, namespaces=namespaces,
                     use_defaults=use_defaults, datetime_types=datetime_types,
-                    filler=filler, fill_missing=fill_missing, id_map=id_map, **kwargs):
+                    filler=filler, fill_missing=fill_missing, id_index=id_index, **kwargs):
                 yield obj
 
+        if check_idrefs and validation != 'skip':
+            for error in self.iter_idref_errors(id_index, source, validation):
+                yield error
+
     def decode(self, source, path=None, schema_path=None, validation='strict', *args, **kwargs):
         """
         Decodes XML data. Takes the same arguments of the method :func:`XMLSchema.iter_decode`.
@@ -1122,7 +1524,7 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         :param kwargs: Keyword arguments containing options for converter and encoding.
         :return: yields an Element instance/s or validation/encoding errors.
         """
-        if not self.built:
+        if not self.built and not self.maps.lazy:
             raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
         elif validation not in XSD_VALIDATION_MODES:
             raise XMLSchemaValueError("validation argument can be 'strict', 'lax' or 'skip': %r" % validation)
@@ -1179,6 +1581,34 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
 
     to_etree = encode
 
+    def encode_to_stream(self, obj, stream, path=None, validation='strict', namespaces=None,
+                         converter=None, encoding='utf-8', xml_declaration=False, **kwargs):
+        """
+        Encodes data writing the XML text directly to a stream. The elements are written
+        as soon as they are encoded and then discarded, so the encoded tree is never kept
+        in memory. Takes the arguments of the method
+        :func:`XMLSchema.iter_encode`, the *indent* option sets the indentation spaces.
+
+        :param obj: the data that has to be encoded to XML data.
+        :param stream: a text or a binary file-like object.
+        :param encoding: the encoding used for binary streams.
+        :param xml_declaration: if set to `True` writes the XML declaration at the head.
+        :return: a list containing the errors for 'lax' validation mode, an empty list \
+        otherwise. For 'strict' mode the first error is raised, leaving the written XML \
+        data incomplete. The written elements are not reordered for solving the errors \
+        of the content model, like it's done by :meth:`encode`.
+        """
+        writer = XMLStreamWriter(stream, encoding, xml_declaration, namespaces)
+        errors = []
+        for result in self.iter_encode(obj, path, validation, namespaces, converter, _writer=writer, **kwargs):
+            if not isinstance(result, XMLSchemaValidationError):
+                writer.write_child(result)
+            elif validation == 'lax':
+                errors.append(result)
+            elif validation == 'strict':
+                raise result
+        return errors
+
 
 class XMLSchema10(XMLSchemaBase):
     """
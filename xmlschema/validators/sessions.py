@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a validation session for revalidating element trees modified in place.
+"""
+from ..exceptions import XMLSchemaValueError, XMLSchemaTypeError
+from ..etree import is_etree_element
+from ..resources import XMLResource
+
+from .exceptions import XMLSchemaValidationError
+from .ids import IdIndex
+
+
+class SessionIdIndex(IdIndex):
+    """
+    An index of the xs:ID values that records the IDs and the IDREF values contributed
+    by each element, so the contributions of a revalidated or a removed element can be
+    discarded. The index keeps all the references, that are resolved at the end of each
+    validation pass, and the elements that claimed an ID already taken by another element.
+    """
+    def __init__(self):
+        super(SessionIdIndex, self).__init__(keep_elements=True)
+        self._contributions = {}  # Map from elements to couples of lists (ID values, IDREF values)
+        self._claimants = {}  # Map from ID values to the elements with a duplicate of the ID
+
+    def add_id(self, value):
+        self._contributions.setdefault(self.current, ([], []))[0].append(value)
+        if value in self._ids:
+            self._claimants.setdefault(value, []).append(self.current)
+            return False
+
+        self._ids[value] = self.current
+        self._count += 1
+        return True
+
+    def add_idref(self, value):
+        self._refs.setdefault(value, []).append(self.current)
+        self._contributions.setdefault(self.current, ([], []))[1].append(value)
+
+    def discard(self, elem):
+        """
+        Discards the IDs and the IDREF values contributed by an element. Returns the
+        elements that claimed the IDs released by the element, that have to be validated
+        again for taking them.
+        """
+        try:
+            ids, idrefs = self._contributions.pop(elem)
+        except KeyError:
+            return []
+
+        released = []
+        for value in ids:
+            if self._ids.get(value) is elem:
+                del self._ids[value]
+                self._count -= 1
+                released.extend(e for e in self._claimants.pop(value, ()) if e is not elem)
+            elif value in self._claimants:
+                claimants = self._claimants[value]
+                claimants[:] = [e for e in claimants if e is not elem]
+                if not claimants:
+                    del self._claimants[value]
+        for value in idrefs:
+            elements = self._refs[value]
+            elements.remove(elem)
+            if not elements:
+                del self._refs[value]
+        return released
+
+    def iter_unresolved(self):
+        for value, elements in self._refs.items():
+            if value not in self._ids:
+                yield value, elements[0]
+
+    def clear(self):
+        super(SessionIdIndex, self).clear()
+        self._contributions.clear()
+        self._claimants.clear()
+
+
+class _Record(object):
+    """The validation state of an element: parent, children and matched XSD declaration."""
+    __slots__ = ('parent', 'children', 'xsd_element')
+
+    def __init__(self, parent, xsd_element):
+        self.parent = parent
+        self.xsd_element = xsd_element
+        self.children = ()
+
+
+class ValidationSession(object):
+    """
+    A validation session for an element tree that is modified in place. The first call of
+    :meth:`iter_errors` validates the whole tree, remembering for each element its parent,
+    its children, its XSD declaration, its own validation errors and the IDs that it
+    contributes. After a set of changes, that have to be notified with :meth:`mark_changed`,
+    only the changed elements, the new elements and the ancestors of the changes are validated
+    again. The other subtrees are not visited, so the cost of a revalidation is proportional
+    to the size of the changes and to the number of children of their ancestors, whose content
+    models are checked again. Use :meth:`XMLSchemaBase.validation_session` for creating instances.
+
+    >>> session = schema.validation_session(tree)
+    >>> session.is_valid()
+    True
+    >>> record = tree.getroot()[1]
+    >>> record.set('id', 'b0836217462')  # Duplicates the ID of the first record
+    >>> session.mark_changed(record)
+    >>> session.is_valid()
+    False
+
+    Mark an element when its attributes, its text or its children change, so mark the parent
+    for an insertion or a removal of a child. Identity constraints are checked again on the
+    ancestors of the changes that declare them, evaluating their selectors on the tree without
+    validating the unchanged subtrees.
+
+    :param schema: the schema instance used for validation.
+    :param source: the Element or the ElementTree instance to validate.
+    :param namespaces: is an optional mapping from namespace prefix to URI.
+    :param use_defaults: indicates whether to use default values for filling missing data.
+    """
+    def __init__(self, schema, source, namespaces=None, use_defaults=True):
+        root = source.getroot() if hasattr(source, 'getroot') else source
+        if not is_etree_element(root):
+            raise XMLSchemaTypeError("an Element or an ElementTree instance is required: %r" % source)
+
+        self.schema = schema
+        self.root = root
+        self.use_defaults = use_defaults
+        self.source = XMLResource(root)
+        self.namespaces = self.source.get_namespaces()
+        if namespaces:
+            self.namespaces.update(namespaces)
+
+        self._id_index = SessionIdIndex()
+        self._records = {}
+        self._errors = {}  # Map from elements to their own validation errors
+        self._changed = set()
+        self._pending = set()
+        self._visited = set()
+
+    def __repr__(self):
+        return '%s(schema=%r, root=%r)' % (self.__class__.__name__, self.schema, self.root)
+
+    def mark_changed(self, *elements):
+        """
+        Notifies the changes of elements of the tree, that are revalidated on the next
+        request of errors. Mark an element when its attributes or its text are changed
+        and the parent of the inserted, removed or replaced children.
+        """
+        for elem in elements:
+            if elem not in self._records:
+                if self._records:
+                    raise XMLSchemaValueError(
+                        "%r is not an element validated by the session, mark its parent instead." % elem
+                    )
+            else:
+                self._changed.add(elem)
+
+    def enter_child(self, child, parent, xsd_element):
+        """
+        Called by the content model validation of a parent element for each matched child.
+        Returns `True` if the child has to be validated, `False` if it's an unchanged subtree
+        already validated. The state of a child that has to be validated is reset.
+        """
+        try:
+            record = self._records[child]
+        except KeyError:
+            record = self._records[child] = _Record(parent, xsd_element)
+        else:
+            if child not in self._pending and record.parent is parent and record.xsd_element is xsd_element:
+                return False
+            record.parent = parent
+            record.xsd_element = xsd_element
+            self._errors.pop(child, None)
+            self._changed.update(self._id_index.discard(child))
+
+        children = tuple(e for e in child if not callable(e.tag))
+        if record.children:
+            current = set(children)
+            for elem in record.children:
+                if elem not in current and elem in self._records and self._records[elem].parent is child:
+                    self._discard(elem)  # A removed child
+        record.children = children
+        self._visited.add(child)
+        return True
+
+    def iter_errors(self):
+        """
+        Creates an iterator for the errors of the tree, revalidating the changes notified
+        after the previous request. The errors are grouped by element and are followed by
+        the unresolved IDREF values.
+        """
+        if not self._records:
+            self._revalidate()
+        while self._changed:
+            self._revalidate()  # Repeated for the elements that claim IDs released by the pass
+
+        for errors in self._errors.values():
+            for error in errors:
+                yield error
+
+        for error in self.schema.iter_idref_errors(self._id_index, self.source):
+            yield error
+
+    def validate(self):
+        """
+        Validates the tree, revalidating the notified changes.
+
+        :raises: :exc:`XMLSchemaValidationError` if the tree is not valid.
+        """
+        for error in self.iter_errors():
+            raise error
+
+    def is_valid(self):
+        """Returns `True` if the tree is valid, `False` otherwise."""
+        return next(self.iter_errors(), None) is None
+
+    def _revalidate(self):
+        for elem in self._changed:
+            while elem is not None and elem not in self._pending:
+                record = self._records.get(elem)
+                if record is None:
+                    break  # Removed from the tree by another change
+                self._pending.add(elem)
+                elem = record.parent
+        self._changed.clear()
+        self._pending.add(self.root)
+
+        try:
+            xsd_element = self.schema.get_element(self.root.tag, namespaces=self.namespaces)
+            self.enter_child(self.root, None, xsd_element)
+            if xsd_element is None:
+                error = self.schema.validation_error(
+                    'lax', "%r is not an element of the schema" % self.root, self.root
+                )
+                self._errors[self.root] = [error]
+                return
+
+            for result in xsd_element.iter_decode(self.root, source=self.source, namespaces=self.namespaces,
+                                                  use_defaults=self.use_defaults, id_index=self._id_index,
+                                                  _session=self):
+                if isinstance(result, XMLSchemaValidationError):
+                    self._add_error(result)
+                else:
+                    del result
+        finally:
+            self._pending.clear()
+            self._visited.clear()
+
+    def _add_error(self, error):
+        # The error is assigned to the nearest visited element, for discarding
+        # it with the other errors of the element when it's validated again.
+        elem = error.elem
+        while elem is not None and elem not in self._visited:
+            record = self._records.get(elem)
+            elem = record.parent if record is not None else None
+        self._errors.setdefault(self.root if elem is None else elem, []).append(error)
+
+    def _discard(self, elem):
+        stack = [elem]
+        while stack:
+            elem = stack.pop()
+            record = self._records.pop(elem)
+            self._errors.pop(elem, None)
+            self._changed.update(self._id_index.discard(elem))
+            stack.extend(e for e in record.children if e in self._records and self._records[e].parent is elem)
@@ -21,8 +21,8 @@ from ..qnames import (
     XSD_ANY_TYPE, XSD_SIMPLE_TYPE, XSD_ANY_ATOMIC_TYPE, XSD_ATTRIBUTE, XSD_ATTRIBUTE_GROUP,
     XSD_ANY_ATTRIBUTE, XSD_PATTERN, XSD_MIN_INCLUSIVE, XSD_MIN_EXCLUSIVE, XSD_MAX_INCLUSIVE,
     XSD_MAX_EXCLUSIVE, XSD_LENGTH, XSD_MIN_LENGTH, XSD_MAX_LENGTH, XSD_WHITE_SPACE, XSD_LIST,
-    XSD_ANY_SIMPLE_TYPE, XSD_UNION, XSD_RESTRICTION, XSD_ANNOTATION, XSD_ASSERTION, XSD_ID,
-    XSD_FRACTION_DIGITS, XSD_TOTAL_DIGITS
+    XSD_ANY_SIMPLE_TYPE, XSD_UNION, XSD_RESTRICTION, XSD_ANNOTATION, XSD_ASSERTION, XSD_ID, XSD_IDREF,
+    XSD_FRACTION_DIGITS, XSD_TOTAL_DIGITS, XSD_ENUMERATION
 )
 from ..helpers import get_qname, local_name, get_xsd_derivation_attribute
 
@@ -507,13 +507,17 @@ class XsdAtomicBuiltin(XsdAtomic):
 
         if self.name == XSD_ID:
             try:
-                id_map = kwargs['id_map']
+                id_index = kwargs['id_index']
             except KeyError:
                 pass
             else:
-                id_map[obj] += 1
-                if id_map[obj] > 1:
+                if not id_index.add_id(obj):
                     yield self.validation_error(validation, "Duplicated xsd:ID value {!r}".format(obj))
+        elif self.name == XSD_IDREF and validation != 'skip':
+            try:
+                kwargs['id_index'].add_idref(obj)
+            except KeyError:
+                pass
 
         if validation == 'skip':
             try:
@@ -1163,6 +1167,9 @@ class XsdAtomicRestriction(XsdAtomic):
                         for error in validator(result):
                             yield error
 
+                if XSD_ENUMERATION in self.facets and isinstance(result, string_base_type) \
+                        and 'intern_table' in kwargs:
+                    result = kwargs['intern_table'].intern(result)  # a low-cardinality value
                 yield result
                 return
 
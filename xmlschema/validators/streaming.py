@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2019, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a writer for serializing encoded XML data directly to a stream.
+"""
+import io
+
+from ..namespaces import XML_NAMESPACE
+
+BUFFER_SIZE = 65536
+
+
+def escape(text):
+    """Escapes the text content of an element."""
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def escape_attribute(value):
+    """Escapes an attribute value, for writing it between double quotes."""
+    value = escape(value)
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    if '\t' in value:
+        value = value.replace('\t', '&#09;')
+    return value
+
+
+class XMLStreamWriter(object):
+    """
+    Writes escaped XML text to a stream during the encoding of the data. The encoding is
+    driven by the XSD components, that call :meth:`start_element` after the encoding of
+    the attributes of an element with complex content, :meth:`start_child` before the
+    encoding of each child, :meth:`write_child` after it and :meth:`end_element` at the
+    end of the element. Written elements are cleared, keeping only the tail, so the
+    encoded tree is never kept in memory. Use :meth:`XMLSchemaBase.encode_to_stream`
+    for encoding data with a writer.
+
+    The namespaces of the converter are declared on the root element. A namespace not
+    mapped by the converter is declared locally on the elements that use it.
+
+    :param stream: a text or a binary file-like object.
+    :param encoding: the encoding used for binary streams.
+    :param xml_declaration: if set to `True` writes the XML declaration at the head.
+    :param namespaces: the namespaces declared on the root element when it's written \
+    without a converter, that happens for empty and simple content root elements.
+    """
+    def __init__(self, stream, encoding='utf-8', xml_declaration=False, namespaces=None):
+        self.stream = stream
+        self.encoding = encoding
+        self.xml_declaration = xml_declaration
+        self.namespaces = {} if namespaces is None else namespaces
+        self._text_stream = isinstance(stream, io.TextIOBase)
+        self._buffer = []
+        self._buffer_size = 0
+        self._started = False
+        self._frames = []  # The open elements: [qname, scope, padding, opened, last_child]
+        self._closed = None
+        self._ns_count = 0
+
+    def __repr__(self):
+        return '%s(stream=%r, encoding=%r)' % (self.__class__.__name__, self.stream, self.encoding)
+
+    def _write(self, text):
+        self._buffer.append(text)
+        self._buffer_size += len(text)
+        if self._buffer_size >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered XML text to the stream."""
+        text = ''.join(self._buffer)
+        if self._text_stream:
+            self.stream.write(text)
+        else:
+            self.stream.write(text.encode(self.encoding, 'xmlcharrefreplace'))
+        del self._buffer[:]
+        self._buffer_size = 0
+
+    @property
+    def depth(self):
+        """The number of open elements."""
+        return len(self._frames)
+
+    def _head(self, namespaces, parts):
+        """Writes the XML declaration and returns the root scope and namespace declarations."""
+        self._started = True
+        if self.xml_declaration:
+            parts.append('<?xml version="1.0" encoding="%s"?>\n' % self.encoding)
+
+        prefixes = {XML_NAMESPACE: 'xml'}
+        declarations = []
+        for prefix, uri in namespaces.items():
+            if prefix:
+                prefixes.setdefault(uri, prefix)
+            declarations.append(('xmlns:%s' % prefix if prefix else 'xmlns', uri))
+        return (namespaces.get('', ''), prefixes, {}, {}), declarations
+
+    def start_element(self, tag, attrib, converter, level=0):
+        """
+        Writes the start tag of an element, without closing it. The namespaces of the
+        converter are declared on the root element.
+
+        :param tag: the tag of the element.
+        :param attrib: the encoded attributes of the element, a dictionary or a \
+        sequence of name and value couples.
+        :param converter: the converter instance used for the encoding.
+        :param level: the level of the element (0 means the root).
+        """
+        parts = []
+        if self._frames:
+            declarations = None
+            scope = self._frames[-1][1]
+        else:
+            scope, declarations = self._head(converter, parts)
+
+        if isinstance(attrib, dict):
+            attrib = attrib.items()
+        qname, scope = self._start_tag(tag, attrib or (), scope, parts, declarations)
+        self._frames.append([qname, scope, '\n' + ' ' * converter.indent * (level + 1), False, None])
+        self._write(''.join(parts))
+
+    def start_child(self, text=None):
+        """
+        Prepares the writing of a child of the current element, writing the end of the
+        start tag followed by the text of the element, or the tail of the previous child.
+
+        :param text: the text of the element, written before the first child.
+        """
+        frame = self._frames[-1]
+        if not frame[3]:
+            frame[3] = True
+            self._write('>%s' % escape(text or frame[2]))
+        elif frame[4] is not None:
+            if frame[4].tail:
+                self._write(escape(frame[4].tail))
+            frame[4] = None
+
+    def write_child(self, elem):
+        """
+        Writes an encoded child of the current element, if it's not already written by
+        :meth:`end_element`. The tail is written later, because it can still be changed
+        by the encoding of the content. Returns the child cleared of its content.
+
+        :param elem: the encoded child element.
+        """
+        if elem is not self._closed:
+            parts = []
+            if not self._frames:
+                scope, declarations = self._head(self.namespaces, parts)
+                self._serialize(elem, scope, parts, declarations)
+                if elem.tail:
+                    parts.append(escape(elem.tail))
+                self._write(''.join(parts))
+                self.flush()
+                return elem
+
+            self._serialize(elem, self._frames[-1][1], parts)
+            self._write(''.join(parts))
+            tail = elem.tail
+            elem.clear()
+            elem.tail = tail
+
+        self._closed = None
+        if self._frames:
+            self._frames[-1][4] = elem
+        return elem
+
+    def end_element(self, elem):
+        """
+        Completes the current element writing its end tag. The tail is written only
+        for the root element.
+
+        :param elem: the encoded element.
+        """
+        qname, _, _, opened, last_child = self._frames.pop()
+        if not opened:
+            if elem.text:
+                text = '>%s</%s>' % (escape(elem.text), qname)
+            else:
+                text = ' />'
+        elif last_child is not None and last_child.tail:
+            text = '%s</%s>' % (escape(last_child.tail), qname)
+        else:
+            text = '</%s>' % qname
+
+        if self._frames:
+            self._write(text)
+        else:
+            if elem.tail:
+                text += escape(elem.tail)
+            self._write(text)
+            self.flush()
+
+        tail = elem.tail
+        elem.clear()
+        elem.tail = tail
+        self._closed = elem
+
+    def _new_prefix(self):
+        self._ns_count += 1
+        return 'ns%d' % self._ns_count
+
+    def _start_tag(self, tag, attributes, scope, parts, declarations=None):
+        # A scope is a tuple with the default namespace, a map from URIs to prefixes
+        # and the caches of the mapped names of elements and attributes.
+        default_namespace, prefixes, tags, names = scope
+        try:
+            qname = tags[tag]
+        except KeyError:
+            if tag[0] != '{':
+                qname = tag
+                if default_namespace:
+                    default_namespace = ''
+                    declarations = [('xmlns', '')] + (declarations or [])
+            else:
+                uri, qname = tag[1:].split('}')
+                if uri == default_namespace:
+                    pass
+                elif uri in prefixes:
+                    qname = '%s:%s' % (prefixes[uri], qname)
+                else:
+                    default_namespace = uri
+                    declarations = [('xmlns', uri)] + (declarations or [])
+
+            if not declarations:
+                tags[tag] = qname
+
+        items = []
+        for name, value in attributes:
+            try:
+                items.append((names[name], value))
+            except KeyError:
+                if name[0] != '{':
+                    names[name] = name
+                else:
+                    uri, local_name = name[1:].split('}')
+                    if uri in prefixes:
+                        name = names[name] = '%s:%s' % (prefixes[uri], local_name)
+                    else:
+                        prefixes = prefixes.copy()
+                        prefixes[uri] = prefix = self._new_prefix()
+                        declarations = (declarations or []) + [('xmlns:%s' % prefix, uri)]
+                        name = '%s:%s' % (prefix, local_name)
+                items.append((name, value))
+
+        parts.append('<' + qname)
+        if declarations:
+            for name, value in declarations:
+                parts.append(' %s="%s"' % (name, escape_attribute(value)))
+            scope = default_namespace, prefixes, {}, {}
+        for name, value in items:
+            parts.append(' %s="%s"' % (name, escape_attribute(value)))
+        return qname, scope
+
+    def _serialize(self, elem, scope, parts, declarations=None):
+        qname, scope = self._start_tag(elem.tag, elem.attrib.items(), scope, parts, declarations)
+        if elem.text or len(elem):
+            parts.append('>')
+            if elem.text:
+                parts.append(escape(elem.text))
+            for child in elem:
+                self._serialize(child, scope, parts)
+                if child.tail:
+                    parts.append(escape(child.tail))
+            parts.append('</%s>' % qname)
+        else:
+            parts.append(' />')
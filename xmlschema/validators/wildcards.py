@@ -58,8 +58,8 @@ class XsdWildcard(XsdComponent, ValidationMixin):
             self.parse_error("wrong value %r for 'processContents' attribute." % self.process_contents)
 
     def _load_namespace(self, namespace):
-        if namespace in self.schema.maps.namespaces:
-            return
+        if namespace in self.schema.maps.namespaces or self.schema.maps.frozen:
+            return  # Already loaded or not loadable (frozen schemas are never extended)
 
         for url in self.schema.get_locations(namespace):
             try:
@@ -228,13 +228,30 @@ class XsdComponent(XsdValidator):
             self._parse()
             return
         elif name == "schema":
-            if hasattr(self, 'schema') and self.schema.target_namespace != value.target_namespace:
+            if not hasattr(self, 'schema'):
+                value._components.setdefault(self.__class__, []).append(self)
+            elif self.schema.target_namespace != value.target_namespace:
                 raise XMLSchemaValueError(
                     "cannot change 'schema' attribute of %r: the actual %r has a different "
                     "target namespace than %r." % (self, self.schema, value)
                 )
+            elif self.schema is not value:
+                # A redefinition: the component is moved to the index of the new schema
+                components = self.schema._components.get(self.__class__, [])
+                for k, component in enumerate(components):
+                    if component is self:
+                        del components[k]
+                        break
+                value._components.setdefault(self.__class__, []).append(self)
         super(XsdComponent, self).__setattr__(name, value)
 
+    def copy(self):
+        component = super(XsdComponent, self).copy()
+        self.schema._components.setdefault(self.__class__, []).append(component)
+        return component
+
+    __copy__ = copy
+
     @property
     def is_global(self):
         """Is `True` if the instance is a global component, `False` if it's local."""